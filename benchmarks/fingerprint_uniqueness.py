@@ -0,0 +1,92 @@
+# -*- coding: utf-8 -*-
+
+"""
+This script benchmarks structure uniqueness checks in `FingerprintValidator`
+for growing pool sizes. We compare:
+    - a full (vectorized) scan of the fingerprint pool (the default)
+    - a nearest-neighbor index of the pool (`use_index=True`)
+
+Fingerprints are random vectors (rather than from real structures) so that
+very large pools can be tested quickly. Like real fingerprints (e.g. RDFs),
+their features are correlated: each vector is made from a few underlying
+values. Note, index performance depends heavily on this -- for completely
+uncorrelated vectors, the index is no faster than a full scan. Half of the
+checked fingerprints are slightly perturbed copies of pool members, so both
+unique and non-unique results are tested. We also confirm that both methods
+give the same results.
+"""
+
+from timeit import default_timer as time
+
+import numpy
+import pandas
+
+from simmate.toolkit.validators.fingerprint import FingerprintValidator
+
+pool_sizes = [1_000, 10_000, 100_000, 1_000_000]
+nfeatures = 50
+nlatent = 5  # the number of underlying values that make each fingerprint
+nchecks = 200
+
+
+class RandomFingerprint(FingerprintValidator):
+    # We only use the comparison methods, so no featurizer is needed
+    distance_tolerance = 0.1
+
+    @staticmethod
+    def get_featurizer(**kwargs):
+        return None
+
+
+def run_trials(pool_size: int) -> dict:
+    generator = numpy.random.default_rng(12345)
+    projection = generator.random((nlatent, nfeatures))
+    pool = generator.random((pool_size, nlatent)) @ projection
+    fingerprints = numpy.concatenate(
+        [
+            generator.random((nchecks // 2, nlatent)) @ projection,
+            pool[: nchecks // 2]
+            + generator.normal(0, 0.005, (nchecks // 2, nfeatures)),
+        ]
+    )
+
+    scan_validator = RandomFingerprint()
+    index_validator = RandomFingerprint(use_index=True)
+
+    start = time()
+    scan_validator._add_many_to_pool(pool, [{}] * pool_size, skip_database=True)
+    scan_build = time() - start
+
+    start = time()
+    index_validator._add_many_to_pool(pool, [{}] * pool_size, skip_database=True)
+    index_build = time() - start
+
+    start = time()
+    scan_results = [
+        scan_validator._check_fingerprint(fp, scan_validator.fingerprint_pool)
+        for fp in fingerprints
+    ]
+    scan_time = (time() - start) / nchecks
+
+    start = time()
+    index_results = [
+        index_validator._check_fingerprint_with_index(fp) for fp in fingerprints
+    ]
+    index_time = (time() - start) / nchecks
+
+    assert scan_results == index_results
+
+    return {
+        "pool_size": pool_size,
+        "scan_build_s": scan_build,
+        "index_build_s": index_build,
+        "scan_check_ms": scan_time * 1000,
+        "index_check_ms": index_time * 1000,
+    }
+
+
+# -----------------------------------------------------------------------------
+
+df = pandas.DataFrame([run_trials(pool_size) for pool_size in pool_sizes])
+df.to_csv("fingerprint_uniqueness_times.csv")
+print(df)
@@ -0,0 +1,76 @@
+# -*- coding: utf-8 -*-
+
+"""
+This script benchmarks the per-request overhead of the dynamic REST API views
+made by `SimmateAPIViewSet.from_table`. We compare:
+    - building a new serializer + viewset class for every request (the
+      behavior before views were cached)
+    - reusing the cached views (the current behavior)
+
+Both list and retrieve endpoints are tested with `format=json`, using the
+test app's `TestStructure` table. Run this from a django test database that
+has a few structures loaded (e.g. the sqlite database from `simmate database
+reset`).
+"""
+
+from timeit import default_timer as time
+
+import pandas
+from django.test import RequestFactory
+
+from simmate.database import connect  # this sets up django
+from simmate.database.base_data_types import Structure
+from simmate.website.core_components.base_api_view import SimmateAPIViewSet
+from simmate.website.data_explorer.views import ALL_PROVIDERS
+
+ntrials = 200
+
+# grab the first structure table that has data in it
+table = [
+    t for t in ALL_PROVIDERS.values() if issubclass(t, Structure) and t.objects.exists()
+][0]
+entry_id = table.objects.values_list("id", flat=True).first()
+
+factory = RequestFactory()
+list_request = factory.get(f"/data/{table.table_name}/", {"format": "json"})
+retrieve_request = factory.get(
+    f"/data/{table.table_name}/{entry_id}/", {"format": "json"}
+)
+
+
+def get_uncached_view(view_type):
+    # Mimics the old from_table, which made new classes on every request
+    SimmateAPIViewSet.get_table_serializer_class.cache_clear()
+    SimmateAPIViewSet.get_table_viewset_class.cache_clear()
+    SimmateAPIViewSet._get_cached_view.cache_clear()
+    return SimmateAPIViewSet.from_table(table=table, view_type=view_type)
+
+
+def get_cached_view(view_type):
+    return SimmateAPIViewSet.from_table(table=table, view_type=view_type)
+
+
+def run_trials(get_view, view_type, request, **kwargs):
+    trial_times = []
+    for x in range(ntrials):
+        start = time()
+        view = get_view(view_type)
+        response = view(request, **kwargs)
+        response.render()
+        stop = time()
+        trial_times.append(stop - start)
+    return trial_times
+
+
+# -----------------------------------------------------------------------------
+
+all_times = {}
+for name, get_view in [("uncached", get_uncached_view), ("cached", get_cached_view)]:
+    all_times[f"{name}_list"] = run_trials(get_view, "list", list_request)
+    all_times[f"{name}_retrieve"] = run_trials(
+        get_view, "retrieve", retrieve_request, pk=entry_id
+    )
+
+df = pandas.DataFrame(all_times)
+df.to_csv("website_api_views_times.csv")
+print(df.describe().loc[["mean", "50%"]] * 1000)  # in milliseconds
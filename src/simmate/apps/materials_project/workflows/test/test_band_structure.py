@@ -49,7 +49,7 @@ def test_band_structure_run(sample_structures, tmp_path, mocker):
     # run the full workflow, where the output files were pre-generated with
     # a specific structures
     structure = sample_structures["Fe_mp-13_primitive"]
-    ElectronicStructure__Vasp__MatprojBandStructure.run(
+    state = ElectronicStructure__Vasp__MatprojBandStructure.run(
         structure=structure,
         directory=tmp_path,
     )
@@ -59,3 +59,21 @@ def test_band_structure_run(sample_structures, tmp_path, mocker):
     plot_filename = tmp_path / "band_diagram.png"
     assert summary_filename.exists()
     assert plot_filename.exists()
+
+    # the stored arrays should match the full toolkit object
+    result = state.result()
+    result = result.__class__.objects.get(id=result.id)
+    band_structure = result.to_toolkit_band_structure()
+    data = result.get_band_structure_arrays()
+    nkpoints = len(band_structure.kpoints)
+    assert data["eigenvalues"].shape == (
+        len(data["spins"]),
+        band_structure.nb_bands,
+        nkpoints,
+    )
+    assert len(data["kpoint_labels"]) == nkpoints
+
+    # downsampling keeps all labeled k-points
+    data = result.get_band_structure_arrays(["distances"], max_points=10)
+    nlabels = len([k for k in band_structure.kpoints if k.label])
+    assert 10 <= len(data["distances"]) <= 10 + nlabels
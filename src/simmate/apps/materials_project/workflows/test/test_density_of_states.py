@@ -25,7 +25,7 @@ def test_density_of_states_run(sample_structures, tmp_path, mocker):
     # run the full workflow, where the output files were pre-generated with
     # a specific structures
     structure = sample_structures["Fe_mp-13_primitive"]
-    ElectronicStructure__Vasp__MatprojDensityOfStates.run(
+    state = ElectronicStructure__Vasp__MatprojDensityOfStates.run(
         structure=structure,
         directory=tmp_path,
     )
@@ -35,3 +35,17 @@ def test_density_of_states_run(sample_structures, tmp_path, mocker):
     plot_filename = tmp_path / "dos_diagram.png"
     assert summary_filename.exists()
     assert plot_filename.exists()
+
+    # the stored arrays should match the full toolkit object
+    result = state.result()
+    result = result.__class__.objects.get(id=result.id)
+    dos = result.to_toolkit_density_of_states()
+    data = result.get_density_of_states_arrays()
+    assert (data["energies"] == dos.energies).all()
+    assert data["densities"].shape == (len(data["spins"]), len(dos.energies))
+    assert list(data["elements"]) == ["Fe"]
+
+    # downsampling averages neighboring energies
+    data = result.get_density_of_states_arrays(["energies"], max_points=100)
+    assert list(data.keys()) == ["energies"]
+    assert len(data["energies"]) == 100
@@ -123,3 +123,77 @@ def load_remote_archives(parallel: bool = False):
     from simmate.database.third_parties import load_remote_archives
 
     load_remote_archives(parallel=parallel)
+
+
+@database_app.command()
+def remove_duplicates(
+    table_name: str,
+    filename: Path = "unique_structures.csv",
+    validator_name: str = "PartialCrystalNNFingerprint",
+    order_by: str = "energy_per_atom",
+    distance_tolerance: float = None,
+    nprocesses: int = 1,
+    filter: list[str] = [],
+):
+    """
+    Finds the unique structures in a database table and writes them to a csv
+
+    Near-identical structures (with the same reduced formula) are grouped
+    together, and only one structure from each group is kept. Note, no rows
+    are deleted from the database.
+
+    - `TABLE_NAME`: the name of the table to search (e.g. MatprojStructure)
+
+    - `--filename`: the csv file to write the unique structures to
+
+    - `--validator-name`: the fingerprint validator used to compare structures
+
+    - `--order-by`: the column used to pick which structure is kept from each
+    group (the lowest value is kept). Start the column name with "-" to keep
+    the highest value instead.
+
+    - `--distance-tolerance`: the fingerprint distance that structures must be
+    within to count as duplicates. Defaults to the validator's default.
+
+    - `--nprocesses`: the number of processes to make fingerprints with
+
+    - `--filter`: limits the search to rows matching a `column=value` filter.
+    This can be given multiple times (e.g. `--filter nsites=4`).
+    """
+
+    import pandas
+
+    from simmate.database import connect
+    from simmate.database.base_data_types import DatabaseTable
+    from simmate.utilities import chunk_iterable
+
+    table = DatabaseTable.get_table(table_name)
+    filters = dict(f.split("=", 1) for f in filter)
+
+    validator_kwargs = {}
+    if distance_tolerance:
+        validator_kwargs["distance_tolerance"] = distance_tolerance
+
+    unique_ids = table.objects.filter(**filters).remove_duplicates(
+        validator_name=validator_name,
+        order_by=order_by,
+        nprocesses=nprocesses,
+        **validator_kwargs,
+    )
+
+    fieldnames = ["id", "formula_reduced"]
+    if order_by:
+        fieldnames.append(order_by.lstrip("-"))
+
+    # rows are written in chunks so that we never query with (or load) the
+    # full list of unique ids at once
+    pandas.DataFrame(columns=fieldnames).to_csv(filename, index=False)
+    for chunk in chunk_iterable(unique_ids, 1000):
+        entries = table.objects.filter(id__in=chunk).order_by("id")
+        entries.to_dataframe(fieldnames).to_csv(
+            filename,
+            index=False,
+            header=False,
+            mode="a",
+        )
+    print(f"Found {len(unique_ids)} unique structures. Written to {filename}")
@@ -2,6 +2,7 @@
 
 from pathlib import Path
 
+import pandas
 import pytest
 
 from simmate.command_line.database import database_app
@@ -44,3 +45,24 @@ def test_database_dump_and_load(command_line_runner):
 
     # delete the dump file
     Path("database_dump.json").unlink()
+
+
+@pytest.mark.django_db
+def test_database_remove_duplicates(command_line_runner, tmp_path):
+    filename = tmp_path / "unique.csv"
+    result = command_line_runner.invoke(
+        database_app,
+        [
+            "remove-duplicates",
+            "simmate.website.test_app.models.TestStructure",
+            f"--filename={filename}",
+            "--validator-name=RdfFingerprint",
+            "--order-by=-nsites",
+            "--filter",
+            "nsites__lte=10",
+        ],
+    )
+    assert result.exit_code == 0
+    df = pandas.read_csv(filename)
+    assert list(df.columns) == ["id", "formula_reduced", "nsites"]
+    assert (df.nsites <= 10).all()
@@ -14,15 +14,20 @@ This file helps share fixtures accross files as described
 """
 
 
+import hashlib
 import shutil
+import threading
+from functools import partial
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
 from pathlib import Path
 
 import pytest
 from django.contrib.auth.models import User
+from django.core.cache import cache
 from typer.testing import CliRunner
 
 from simmate.apps.vasp.inputs import Potcar
-from simmate.database.base_data_types import Spacegroup
+from simmate.database.base_data_types import Spacegroup, Thermodynamics
 from simmate.engine import S3Workflow
 from simmate.toolkit import Composition, Structure, base_data_types
 from simmate.utilities import get_directory
@@ -191,6 +196,115 @@ def command_line_runner():
     return CliRunner()
 
 
+@pytest.fixture
+def local_file_server(tmp_path):
+    """
+    Starts a local HTTP server that acts as a stand-in for remote file hosts
+    (such as archives.simmate.org). Files written to the `directory` attribute
+    can be downloaded from the `url` attribute. Like most file hosts, the
+    server gives ETag headers and supports range requests.
+
+    The Range header of every request is recorded in the `range_requests`
+    attribute (with None for requests of the full file). Setting the
+    `allow_head` attribute to False makes the server reject HEAD requests,
+    which some file hosts do.
+
+    ``` python
+    def test_example(local_file_server):
+        (local_file_server.directory / "example.txt").write_text("hello")
+        url = f"{local_file_server.url}/example.txt"
+    ```
+    """
+    directory = get_directory(tmp_path / "served_files")
+    server = ThreadingHTTPServer(
+        ("127.0.0.1", 0),
+        partial(_RangeRequestHandler, directory=str(directory)),
+    )
+    server.directory = directory
+    server.url = f"http://127.0.0.1:{server.server_port}"
+    server.range_requests = []
+    server.allow_head = True
+
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+class _RangeRequestHandler(SimpleHTTPRequestHandler):
+    """
+    The request handler for the `local_file_server` fixture.
+    """
+
+    def do_GET(self):
+        self._send_file(include_body=True)
+
+    def do_HEAD(self):
+        if not self.server.allow_head:
+            self.send_error(405)
+            return
+        self._send_file(include_body=False)
+
+    def _send_file(self, include_body: bool):
+        filename = Path(self.translate_path(self.path))
+        if not filename.is_file():
+            self.send_error(404)
+            return
+
+        content = filename.read_bytes()
+        etag = f'"{hashlib.md5(content).hexdigest()}"'
+
+        # only use the range if the file matches the version the client has
+        range_header = self.headers.get("Range")
+        if include_body:
+            self.server.range_requests.append(range_header)
+        start = 0
+        if range_header and self.headers.get("If-Range", etag) == etag:
+            start = int(range_header.split("=")[1].split("-")[0])
+
+        self.send_response(206 if start else 200)
+        self.send_header("ETag", etag)
+        self.send_header("Accept-Ranges", "bytes")
+        self.send_header("Content-Length", str(len(content) - start))
+        if start:
+            self.send_header(
+                "Content-Range", f"bytes {start}-{len(content) - 1}/{len(content)}"
+            )
+        self.end_headers()
+        if include_body:
+            self.wfile.write(content[start:])
+
+    def log_message(self, *args):
+        pass  # keeps the test output clean
+
+
+@pytest.fixture(autouse=True)
+def api_throttle_reset():
+    """
+    Clears the cache that the REST API uses to throttle anonymous requests.
+    Otherwise, the requests of all tests add up and later tests are limited.
+    """
+    cache.clear()
+
+
+@pytest.fixture(autouse=True)
+def phase_diagram_cache(tmp_path, monkeypatch):
+    """
+    Keeps the phase diagrams that are cached by `Thermodynamics` tables in a
+    temporary directory (rather than the simmate config directory) and starts
+    each test with an empty in-memory cache. The directory is returned.
+    """
+    directory = tmp_path / "phase_diagrams"
+    monkeypatch.setattr(Thermodynamics, "_phase_diagram_cache", {})
+    monkeypatch.setattr(
+        Thermodynamics,
+        "_get_phase_diagram_cache_directory",
+        classmethod(lambda cls: directory / cls.table_name),
+    )
+    return directory
+
+
 # !!! Disable harness until prefect is reimplemented
 # from prefect.testing.utilities import prefect_test_harness
 # @pytest.fixture(autouse=True, scope="session")
@@ -15,7 +15,7 @@ from .thermodynamics import Thermodynamics
 
 from .static_energy import StaticEnergy
 from .relaxation import Relaxation, IonicStep
-from .dynamics import Dynamics, DynamicsIonicStep
+from .dynamics import Dynamics, DynamicsIonicStep, DynamicsTrajectory
 from .calculation_nested import NestedCalculation
 from .band_structure import BandStructure, BandStructureCalc
 from .density_of_states import DensityofStates, DensityofStatesCalc
@@ -3,9 +3,11 @@
 import json
 from pathlib import Path
 
+import numpy
 from pymatgen.electronic_structure.bandstructure import (
     BandStructureSymmLine as ToolkitBandStructure,
 )
+from pymatgen.electronic_structure.core import Spin
 from pymatgen.electronic_structure.plotter import BSPlotter
 from pymatgen.io.vasp.outputs import Vasprun
 
@@ -15,6 +17,11 @@ from simmate.database.base_data_types import (
     Structure,
     table_column,
 )
+from simmate.database.utilities import (
+    get_downsample_indices,
+    pack_arrays,
+    unpack_arrays,
+)
 from simmate.visualization.plotting import MatplotlibFigure
 
 
@@ -27,10 +34,14 @@ class BandStructure(DatabaseTable):
     class Meta:
         abstract = True
 
-    exclude_from_summary = ["band_structure_data"]
+    exclude_from_summary = ["band_structure_data", "band_structure_arrays"]
 
     archive_fields = ["band_structure_data"]
 
+    api_exclude_by_default = ["band_structure_data", "band_structure_arrays"]
+
+    html_defer_fields = ["band_structure_data", "band_structure_arrays"]
+
     api_filters = dict(
         nbands=["range"],
         band_gap=["range"],
@@ -53,6 +64,17 @@ class BandStructure(DatabaseTable):
     currently unoptimized for small storage.
     """
 
+    band_structure_arrays = table_column.BinaryField(blank=True, null=True)
+    """
+    The main data of the band structure (k-points, eigenvalues, and
+    orbital projections) stored as compressed, typed arrays. This is much
+    smaller and faster to load than `band_structure_data`. See
+    `get_band_structure_arrays` for loading this data.
+
+    Note, `band_structure_data` is still needed to build the full toolkit
+    object, as these arrays sum the projections over sites.
+    """
+
     nbands = table_column.IntegerField(blank=True, null=True)
     """
     The number of bands used in this calculation.
@@ -116,6 +138,9 @@ class BandStructure(DatabaseTable):
         data = (
             dict(
                 band_structure_data=band_structure.to_json(),
+                band_structure_arrays=pack_arrays(
+                    cls._get_arrays_from_toolkit(band_structure)
+                ),
                 nbands=band_structure.nb_bands,
                 band_gap=band_structure.get_band_gap()["energy"],
                 is_gap_direct=band_structure.get_band_gap()["direct"],
@@ -141,6 +166,103 @@ class BandStructure(DatabaseTable):
         data = json.loads(self.band_structure_data)
         return ToolkitBandStructure.from_dict(data)
 
+    # The axis of each array that goes through the k-points
+    _kpoint_axis_arrays = {
+        "kpoints": 0,
+        "kpoint_labels": 0,
+        "distances": 0,
+        "eigenvalues": 2,
+        "projections": 2,
+    }
+
+    @staticmethod
+    def _get_arrays_from_toolkit(band_structure: ToolkitBandStructure) -> dict:
+        # For spin-polarized calculations, bands are given as [up, down]
+        spins = [Spin.up, Spin.down] if Spin.down in band_structure.bands else [Spin.up]
+        kpoints = band_structure.kpoints
+        data = dict(
+            spins=numpy.array([int(spin) for spin in spins], dtype=numpy.int8),
+            kpoints=numpy.array([k.frac_coords for k in kpoints], dtype=numpy.float64),
+            kpoint_labels=numpy.array([k.label or "" for k in kpoints]),
+            distances=numpy.array(band_structure.distance, dtype=numpy.float64),
+            eigenvalues=numpy.array(
+                [band_structure.bands[spin] for spin in spins],
+                dtype=numpy.float32,
+            ),
+        )
+        # Projections are given for every orbital of every site, which is
+        # often larger than everything else combined. We only keep the sum
+        # over all sites.
+        if band_structure.projections:
+            data["projections"] = numpy.array(
+                [band_structure.projections[spin].sum(axis=-1) for spin in spins],
+                dtype=numpy.float32,
+            )
+        return data
+
+    def get_band_structure_arrays(
+        self,
+        arrays: list[str] = None,
+        max_points: int = None,
+    ) -> dict:
+        """
+        Loads the band structure as a dictionary of numpy arrays, which is
+        much faster than building the full toolkit object
+        (`to_toolkit_band_structure`).
+
+        The arrays available are:
+
+        - `spins`: the spins included (1 for up, -1 for down)
+        - `kpoints`: fractional coordinates of each k-point, with shape
+          (nkpoints, 3)
+        - `kpoint_labels`: the label of each k-point (e.g. "X"), which
+          is an empty string for k-points that aren't high-symmetry points
+        - `distances`: the distance of each k-point along the path, which is
+          used as the x-axis of band structure plots
+        - `eigenvalues`: the band energies in eV, with shape
+          (nspins, nbands, nkpoints)
+        - `projections`: the orbital projections summed over all sites, with
+          shape (nspins, nbands, nkpoints, norbitals). This is only present
+          if the calculation included projections.
+
+        #### Parameters
+
+        - `arrays`:
+            The names of the arrays to load. By default, all are loaded.
+
+        - `max_points`:
+            The maximum number of k-points to return. If there are more than
+            this, evenly spaced k-points are selected (always keeping the
+            labeled high-symmetry k-points). This is useful for plots.
+        """
+        # labels are needed to keep the high-symmetry k-points when downsampling
+        keys = arrays
+        if arrays and max_points and "kpoint_labels" not in arrays:
+            keys = [*arrays, "kpoint_labels"]
+
+        if self.band_structure_arrays:
+            data = unpack_arrays(self.band_structure_arrays, keys)
+        else:
+            # Rows made before this column existed (or loaded from an archive)
+            # only have the JSON data, so we fall back to using it.
+            data = self._get_arrays_from_toolkit(self.to_toolkit_band_structure())
+
+        if max_points:
+            labels = data["kpoint_labels"]
+            indices = get_downsample_indices(
+                npoints=len(labels),
+                max_points=max_points,
+                keep=numpy.flatnonzero(labels != ""),
+            )
+            for key, axis in self._kpoint_axis_arrays.items():
+                if key in data:
+                    data[key] = numpy.take(data[key], indices, axis=axis)
+
+        if arrays:
+            data = {key: data[key] for key in arrays}
+
+        return data
+
 
 class BandStructureCalc(Structure, BandStructure, Calculation):
     """
@@ -9,18 +9,23 @@ this one) for example usage.
 """
 
 import inspect
+import io
 import json
 import logging
 import shutil
-import urllib
 import warnings
-from functools import cache
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, as_completed, wait
+from functools import cache, partial
 from pathlib import Path
 
 import pandas
 import yaml
-from django.db import models  # see comment below
+from django.db import connections
+from django.db import models
 from django.db import models as table_column
+from django.db import transaction
+from django.db.models import F, Q
 from django.urls import reverse
 from django.utils.module_loading import import_string
 from django.utils.timezone import datetime
@@ -30,6 +35,7 @@ from rich.progress import track
 
 from simmate.configuration import settings
 from simmate.database.utilities import check_db_conn
+from simmate.utilities import chunk_iterable, get_cached_download, get_directory
 
 # The "as table_column" line does NOTHING but rename a module.
 # I have this because I want to use "table_column.CharField(...)" instead
@@ -39,6 +45,36 @@ from simmate.database.utilities import check_db_conn
 # Experts may find this annoying, so I'm sorry :(
 
 
+class _ByteStreamSink(io.RawIOBase):
+    """
+    A write-only file object that holds on to written bytes until they are
+    collected with `pop`. Unlike `io.BytesIO`, the position reported by `tell`
+    keeps counting after data is collected, which writers such as pyarrow's
+    ParquetWriter rely on to record offsets within the file.
+    """
+
+    def __init__(self):
+        self._chunks = []
+        self._position = 0
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data) -> int:
+        data = bytes(data)
+        self._chunks.append(data)
+        self._position += len(data)
+        return len(data)
+
+    def tell(self) -> int:
+        return self._position
+
+    def pop(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks = []
+        return data
+
+
 class SearchResults(models.QuerySet):
     """
     This class adds some extra methods to the results returned from a database
@@ -108,6 +144,172 @@ class SearchResults(models.QuerySet):
             datetime_index=datetime_index,
         )
 
+    def iter_dataframe_chunks(
+        self,
+        columns: list[str] = None,
+        chunk_size: int = 10000,
+    ):
+        """
+        Streams the search results as a series of Pandas DataFrames, where each
+        DataFrame has at most `chunk_size` rows.
+
+        Unlike `to_dataframe`, only the requested columns are fetched, rows are
+        streamed from the database (using a server-side cursor on Postgres),
+        and column types are set from the table definition. The dtypes are
+        therefore the same for every chunk -- even if a chunk only has
+        missing values for a column.
+
+        ``` python
+        for df in MatprojStructure.objects.iter_dataframe_chunks(
+            columns=["id", "energy_per_atom", "formula_reduced"],
+        ):
+            ...  # do something with this chunk
+        ```
+
+        #### Parameters
+
+        - `columns`:
+            The columns to include in each DataFrame. Relations can be spanned
+            using the normal django syntax (e.g. "spacegroup__symbol").
+            By default, all columns of this table are included.
+
+        - `chunk_size`:
+            The number of rows to include in each DataFrame. Defaults to 10000.
+        """
+        if not columns:
+            columns = [field.attname for field in self.model._meta.concrete_fields]
+
+        dtypes = self.model._get_pandas_dtypes(columns)
+
+        rows = self.values_list(*columns).iterator(chunk_size=chunk_size)
+        for chunk in chunk_iterable(rows, chunk_size):
+            df = pandas.DataFrame.from_records(chunk, columns=columns)
+            for column, dtype in dtypes.items():
+                if dtype == "datetime":
+                    df[column] = pandas.to_datetime(df[column], utc=True)
+                else:
+                    df[column] = df[column].astype(dtype)
+            yield df
+
+    def to_parquet(
+        self,
+        filename: Path | str,
+        columns: list[str] = None,
+        chunk_size: int = 10000,
+    ):
+        """
+        Writes the search results to a parquet file (a compressed, columnar
+        file format) one chunk at a time. This lets you export very large
+        queries without loading everything into memory.
+
+        Requires `pyarrow` to be installed. JSON columns are written as
+        JSON-formatted strings.
+
+        #### Parameters
+
+        - `filename`:
+            The parquet file to write to.
+
+        - `columns`:
+            The columns to include in the file. By default, all columns of
+            this table are included. See `iter_dataframe_chunks` for details.
+
+        - `chunk_size`:
+            The number of rows to fetch and write at a time. Defaults to 10000.
+        """
+        try:
+            import pyarrow
+            import pyarrow.parquet
+        except ModuleNotFoundError:
+            raise ModuleNotFoundError(
+                "You must have pyarrow installed to write parquet files. "
+                "Install it with 'pip install pyarrow'"
+            )
+
+        writer = None
+        try:
+            for table in self._iter_arrow_tables(columns, chunk_size):
+                if writer is None:
+                    writer = pyarrow.parquet.ParquetWriter(filename, table.schema)
+                writer.write_table(table)
+        finally:
+            if writer is not None:
+                writer.close()
+
+    def iter_parquet_bytes(
+        self,
+        columns: list[str] = None,
+        chunk_size: int = 10000,
+    ):
+        """
+        Same as `to_parquet`, but instead of writing to a file, this yields
+        the bytes of the parquet file as each chunk is written. This is useful
+        for streaming a large export (e.g. in a web response) without holding
+        the full file in memory.
+
+        ``` python
+        with open("my_export.parquet", "wb") as file:
+            for data in MatprojStructure.objects.iter_parquet_bytes():
+                file.write(data)
+        ```
+        """
+        try:
+            import pyarrow
+            import pyarrow.parquet
+        except ModuleNotFoundError:
+            raise ModuleNotFoundError(
+                "You must have pyarrow installed to write parquet files. "
+                "Install it with 'pip install pyarrow'"
+            )
+
+        sink = _ByteStreamSink()
+        writer = None
+        try:
+            for table in self._iter_arrow_tables(columns, chunk_size):
+                if writer is None:
+                    writer = pyarrow.parquet.ParquetWriter(sink, table.schema)
+                writer.write_table(table)
+                yield sink.pop()
+        finally:
+            if writer is not None:
+                writer.close()
+        # closing the writer adds the file footer
+        yield sink.pop()
+
+    def _iter_arrow_tables(self, columns: list[str] = None, chunk_size: int = 10000):
+        """
+        Converts the DataFrames from `iter_dataframe_chunks` into pyarrow
+        tables. This is the shared logic behind the parquet methods above.
+        """
+        import pyarrow
+
+        if not columns:
+            columns = [field.attname for field in self.model._meta.concrete_fields]
+
+        # The schema is set up front so that every chunk (and therefore the
+        # parquet file) has the same column types, even if a chunk only has
+        # missing values for a column.
+        schema = self.model._get_arrow_schema(columns)
+
+        def to_string(value):
+            # pyarrow can't store arbitrary python objects, so JSON values
+            # (lists, dicts) are written as strings. Other values that aren't
+            # already strings are converted with str().
+            if value is None or isinstance(value, str):
+                return value
+            elif isinstance(value, (dict, list)):
+                return json.dumps(value)
+            return str(value)
+
+        string_columns = [
+            field.name for field in schema if pyarrow.types.is_string(field.type)
+        ]
+        for df in self.iter_dataframe_chunks(columns, chunk_size):
+            for column in string_columns:
+                if df[column].dtype == object:
+                    df[column] = df[column].map(to_string)
+            yield pyarrow.Table.from_pandas(df, schema=schema, preserve_index=False)
+
     def to_toolkit(
         self,
     ) -> list:  # type of object varies (e.g. Structure, BandStructure, etc.)
@@ -126,6 +328,180 @@ class SearchResults(models.QuerySet):
         # pymatgen objects as a list
         return [obj.to_toolkit() for obj in self]
 
+    def iter_toolkit_batches(
+        self,
+        chunk_size: int = 1000,
+        nprocesses: int = 1,
+    ):
+        """
+        Converts your SearchResults to toolkit Structures in chunks, yielding
+        one list of structures at a time.
+
+        This should be preferred over `to_toolkit` for large queries because
+        only the `structure` column is fetched (no full database objects are
+        made) and rows are streamed from the database in chunks. For Postgres,
+        this uses a server-side cursor, so memory use stays bounded no matter
+        how many rows are in the query.
+
+        Note, rows with an empty structure column are skipped and the
+        `database_object` attribute is NOT set on the returned structures.
+
+        ``` python
+        for structures in MatprojStructure.objects.iter_toolkit_batches():
+            ...  # do something with this list of structures
+        ```
+
+        #### Parameters
+
+        - `chunk_size`:
+            The number of rows to fetch and convert at a time. Defaults to 1000.
+
+        - `nprocesses`:
+            The number of processes to parse structures with. Chunks are
+            still yielded in the same order as the query. Defaults to 1, which
+            parses everything in the current process.
+        """
+
+        if "structure" not in self.model.get_column_names():
+            raise Exception(
+                "This database table does not have a structure column, so "
+                "batched conversion to toolkit objects is not supported"
+            )
+
+        # local import to avoid circular dependency
+        from simmate.file_converters.structure.database import DatabaseAdapter
+
+        convert_chunk = DatabaseAdapter.get_toolkits_from_database_strings
+
+        structure_strings = (
+            self.filter(structure__isnull=False)
+            .values_list("structure", flat=True)
+            .iterator(chunk_size=chunk_size)
+        )
+        chunks = chunk_iterable(structure_strings, chunk_size)
+
+        if nprocesses == 1:
+            for chunk in chunks:
+                yield convert_chunk(chunk)
+            return
+
+        # We only keep a few chunks submitted at any given time (rather than
+        # using executor.map, which would read the entire query up front).
+        # Results are returned in the order they were submitted.
+        with ProcessPoolExecutor(max_workers=nprocesses) as executor:
+            pending = deque()
+            for chunk in chunks:
+                pending.append(executor.submit(convert_chunk, chunk))
+                if len(pending) >= nprocesses * 2:
+                    yield pending.popleft().result()
+            while pending:
+                yield pending.popleft().result()
+
+    def remove_duplicates(
+        self,
+        validator_name: str = "PartialCrystalNNFingerprint",
+        order_by: str = "energy_per_atom",
+        nprocesses: int = 1,
+        **validator_kwargs,
+    ):
+        """
+        Removes structures that are near-identical to one another, keeping a
+        single structure from each group of duplicates (e.g. the one with the
+        lowest energy).
+
+        Structures are only compared to others with the same reduced formula.
+        For each formula, fingerprints are made with a fingerprint validator
+        and then grouped under its `distance_tolerance` (see
+        `FingerprintValidator.group_duplicates`). This uses a nearest-neighbor
+        index, so it scales to large numbers of structures.
+
+        Note, no rows are deleted from the database. The ids of the unique
+        structures are returned (sorted), rather than a filtered SearchResults,
+        because filtering by a very long list of ids makes for slow queries (or
+        ones that the database refuses). Rows can then be loaded in chunks:
+
+        ``` python
+        from simmate.utilities import chunk_iterable
+
+        unique_ids = MyTable.objects.filter(...).remove_duplicates(
+            order_by="energy_per_atom",
+            distance_tolerance=0.2,
+        )
+        for chunk in chunk_iterable(unique_ids, 1000):
+            entries = MyTable.objects.filter(id__in=chunk)
+            ...
+        ```
+
+        #### Parameters
+
+        - `validator_name`:
+            The name of the fingerprint validator to compare structures with.
+            Options are the validators in `simmate.toolkit.validators.fingerprint`.
+            Defaults to "PartialCrystalNNFingerprint".
+
+        - `order_by`:
+            The column used to pick which structure is kept from each group.
+            The structure with the lowest value is kept, unless the column
+            starts with "-" (e.g. "-volume"), in which case the highest is kept.
+            Rows with no value are considered last. If None, the structure with
+            the lowest id is kept. Defaults to "energy_per_atom".
+
+        - `nprocesses`:
+            The number of processes to make fingerprints with. Defaults to 1.
+
+        - `**validator_kwargs`:
+            Extra settings for the fingerprint validator, such as
+            `distance_tolerance`.
+
+        #### Returns
+
+        A sorted list of the ids of the unique structures.
+        """
+
+        for column in ["structure", "formula_reduced"]:
+            if column not in self.model.get_column_names():
+                raise Exception(
+                    f"This database table does not have a {column} column, so "
+                    "duplicates cannot be removed"
+                )
+
+        # local imports to avoid circular dependencies
+        from simmate.toolkit import Composition
+        from simmate.toolkit.validators import fingerprint as validator_module
+
+        validator_class = getattr(validator_module, validator_name)
+        # some featurizers are specific to a composition
+        needs_composition = (
+            "composition"
+            in inspect.signature(validator_class.get_featurizer).parameters
+        )
+
+        ordering = ["id"]
+        if order_by:
+            column = F(order_by.lstrip("-"))
+            if order_by.startswith("-"):
+                ordering.insert(0, column.desc(nulls_last=True))
+            else:
+                ordering.insert(0, column.asc(nulls_last=True))
+
+        formulas = self.order_by().values_list("formula_reduced", flat=True).distinct()
+
+        unique_ids = []
+        for formula in formulas:
+            if needs_composition:
+                validator_kwargs["composition"] = Composition(formula)
+            validator = validator_class(
+                structure_pool=self.filter(formula_reduced=formula).order_by(*ordering),
+                nprocesses=nprocesses,
+                **validator_kwargs,
+            )
+            groups = validator.group_duplicates(validator.fingerprint_pool)
+            unique_ids += [
+                validator.source_pool[group[0]]["database_id"] for group in groups
+            ]
+
+        return sorted(unique_ids)
+
     def to_archive(self, filename: Path | str = None):
         """
         Writes a compressed zip file using the table's `archive_fieldset`
@@ -197,6 +573,45 @@ class SearchResults(models.QuerySet):
         # we can now delete the csv file
         csv_filename.unlink()
 
+    def count_approximate(self, exact_below: int = 10000) -> int:
+        """
+        Counts the number of rows in the search results, but uses an estimate
+        from the database's statistics when an exact count would be expensive.
+
+        Counting is surprisingly slow for large tables (see
+        [here](https://wiki.postgresql.org/wiki/Slow_Counting)), so we first
+        count up to `exact_below` rows. If there are fewer rows than this, the
+        exact count is returned. Otherwise, the query planner's estimate is
+        returned (which will never be less than `exact_below`).
+
+        Estimates are only available for Postgres. For all other backends, the
+        exact count is always returned.
+
+        #### Parameters
+
+        - `exact_below`:
+            The maximum number of rows to count exactly. Defaults to 10000.
+        """
+        if settings.database_backend != "postgresql":
+            return self.count()
+
+        # the LIMIT here keeps this count fast, no matter the table size
+        nrows_bounded = self[:exact_below].count()
+        if nrows_bounded < exact_below:
+            return nrows_bounded
+
+        # otherwise we ask the query planner for its estimate of the total
+        sql, params = self.query.sql_with_params()
+        with connections[self.db].cursor() as cursor:
+            cursor.execute(f"EXPLAIN (FORMAT JSON) {sql}", params)
+            plan = cursor.fetchone()[0]
+        # depending on the driver, the plan is given as a string or as json
+        if isinstance(plan, str):
+            plan = json.loads(plan)
+        nrows_estimate = int(plan[0]["Plan"]["Plan Rows"])
+
+        return max(nrows_estimate, exact_below)
+
     def filter_by_tags(self, tags: list[str]):
         """
         A utility filter() method that helps query the 'tags' column of a table.
@@ -220,6 +635,87 @@ class SearchResults(models.QuerySet):
 
     # -------------------------------------------------------------------------
 
+    # These methods query the elements_mask_low/high columns of Structure
+    # tables. Each element is a single bit, so element-based searches are
+    # simple integer operations rather than string matching. We also add
+    # plain range filters (e.g. a subset can never have a larger mask) so that
+    # the database can use the index on each column to narrow the search.
+    #
+    # Rows with NULL masks (e.g. added before these columns existed) are not
+    # matched. The migrations that add these columns fill them in, and
+    # `Structure.update_all_elements_masks` can be used for any others.
+
+    def _get_elements_mask(self, elements: list[str] | str) -> tuple[int, int]:
+        if isinstance(elements, str):
+            elements = elements.split("-")
+        return self.model.get_elements_mask(elements)
+
+    def filter_elements_subset(self, elements: list[str] | str):
+        """
+        Filters to structures that only contain the given elements (or some
+        of them). For example, ["Y", "C", "F"] would return structures in the
+        Y, C, F, C-Y, C-F, F-Y, and C-F-Y chemical systems.
+
+        A chemical system string (e.g. "Y-C-F") can also be given.
+        """
+        mask_low, mask_high = self._get_elements_mask(elements)
+        return (
+            self.filter(
+                elements_mask_low__lte=mask_low,
+                elements_mask_high__lte=mask_high,
+            )
+            .alias(
+                _elements_low=F("elements_mask_low").bitor(mask_low),
+                _elements_high=F("elements_mask_high").bitor(mask_high),
+            )
+            .filter(
+                # the OR of a subset with its superset is the superset itself
+                _elements_low=mask_low,
+                _elements_high=mask_high,
+            )
+        )
+
+    def filter_elements_contains_all(self, elements: list[str] | str):
+        """
+        Filters to structures that contain all of the given elements (and
+        possibly others). For example, ["Y", "C"] would return structures in
+        the C-Y, C-F-Y, C-O-Y, etc. chemical systems.
+
+        A chemical system string (e.g. "Y-C") can also be given.
+        """
+        mask_low, mask_high = self._get_elements_mask(elements)
+        return (
+            self.filter(
+                elements_mask_low__gte=mask_low,
+                elements_mask_high__gte=mask_high,
+            )
+            .alias(
+                _elements_low=F("elements_mask_low").bitand(mask_low),
+                _elements_high=F("elements_mask_high").bitand(mask_high),
+            )
+            .filter(
+                _elements_low=mask_low,
+                _elements_high=mask_high,
+            )
+        )
+
+    def filter_elements_contains_any(self, elements: list[str] | str):
+        """
+        Filters to structures that contain at least one of the given elements.
+        For example, ["Y", "C"] would return structures in the Y, C, Y-F,
+        C-O, C-Y, etc. chemical systems.
+
+        A chemical system string (e.g. "Y-C") can also be given.
+        """
+        mask_low, mask_high = self._get_elements_mask(elements)
+        # Masks never use the sign bit, so any shared element gives a value > 0
+        return self.alias(
+            _elements_low=F("elements_mask_low").bitand(mask_low),
+            _elements_high=F("elements_mask_high").bitand(mask_high),
+        ).filter(Q(_elements_low__gt=0) | Q(_elements_high__gt=0))
+
+    # -------------------------------------------------------------------------
+
     # These methods behaves exactly the save as django's default ones, but they
     # are wrapped to catch errors such as "connection closed" failures
     # and retries with a new connection.
@@ -428,6 +924,18 @@ class DatabaseTable(models.Model):
     exclude because its not very readable and is available elsewhere.
     """
 
+    api_exclude_by_default: list[str] = []
+    """
+    Columns that are left out of REST API responses unless they are explicitly
+    requested (e.g. with `?fields=id,structure`). This is for large columns,
+    such as full structures or JSON arrays of site forces, that would make
+    every page of results slow to query and download.
+    
+    Columns listed by mix-ins and parent tables are automatically included. 
+    To see the final list of columns returned by default, see the
+    `api_default_fields` property.
+    """
+
     workflow_columns: dict = {}
     """
     WARNING: advanced users only (this is still in early testing)
@@ -563,6 +1071,99 @@ class DatabaseTable(models.Model):
         ]
         return extra_columns
 
+    @classmethod
+    def _get_pandas_dtypes(cls, columns: list[str]) -> dict:
+        """
+        Maps the given column names to pandas dtypes based on the table's field
+        types. This is used to give consistent dtypes when building DataFrames
+        in chunks. Columns that span relations or that store python objects
+        (such as JSON columns) are left out and keep the default "object" dtype.
+        """
+        field_types = {
+            "AutoField": "Int64",
+            "BigAutoField": "Int64",
+            "IntegerField": "Int64",
+            "BigIntegerField": "Int64",
+            "PositiveIntegerField": "Int64",
+            "SmallIntegerField": "Int64",
+            "FloatField": "float64",
+            "BooleanField": "boolean",
+            "CharField": "string",
+            "TextField": "string",
+            "DateTimeField": "datetime",
+        }
+        dtypes = {}
+        for column in columns:
+            field = cls._get_column_field(column)
+            if not field:
+                continue
+            dtype = field_types.get(field.get_internal_type())
+            if dtype:
+                dtypes[column] = dtype
+        return dtypes
+
+    @classmethod
+    def _get_arrow_schema(cls, columns: list[str]):
+        """
+        Builds a pyarrow schema for the given column names based on the
+        table's field types. This is used so that every chunk of a parquet
+        export has the same schema -- even if a chunk only has missing values
+        for a column. JSON columns are stored as JSON-formatted strings, and
+        any column whose type can't be determined is stored as a string.
+        """
+        import pyarrow
+
+        field_types = {
+            "AutoField": pyarrow.int64(),
+            "BigAutoField": pyarrow.int64(),
+            "IntegerField": pyarrow.int64(),
+            "BigIntegerField": pyarrow.int64(),
+            "PositiveIntegerField": pyarrow.int64(),
+            "SmallIntegerField": pyarrow.int64(),
+            "FloatField": pyarrow.float64(),
+            "BooleanField": pyarrow.bool_(),
+            "CharField": pyarrow.string(),
+            "TextField": pyarrow.string(),
+            "JSONField": pyarrow.string(),
+            "BinaryField": pyarrow.binary(),
+            "DateTimeField": pyarrow.timestamp("ns", tz="UTC"),
+        }
+        schema = []
+        for column in columns:
+            field = cls._get_column_field(column)
+            arrow_type = (
+                field_types.get(field.get_internal_type(), pyarrow.string())
+                if field
+                else pyarrow.string()
+            )
+            schema.append((column, arrow_type))
+        return pyarrow.schema(schema)
+
+    @classmethod
+    def _get_column_field(cls, column: str):
+        """
+        Gives the field for a column name, which can span relations using the
+        normal django syntax (e.g. "spacegroup__symbol"). For relations, the
+        related table's primary key field is returned (some tables use strings
+        as primary keys, such as "mp-123"). Returns None if no field is found.
+        """
+        model = cls
+        field = None
+        for name in column.split("__"):
+            if model is None:
+                return None
+            # We key fields by their "attname" so that foreign keys are matched
+            # when given as the id column (e.g. "spacegroup_id")
+            fields = {f.attname: f for f in model._meta.concrete_fields}
+            fields.update({f.name: f for f in model._meta.concrete_fields})
+            field = fields.get(name)
+            if not field:
+                return None
+            model = field.related_model if field.is_relation else None
+        if field.is_relation:
+            field = field.target_field
+        return field
+
     def write_output_summary(self, directory: Path):
         """
         This writes a "simmate_summary.yaml" file with key output information.
@@ -850,6 +1451,8 @@ class DatabaseTable(models.Model):
         all_data.pop("band_structure", None)
         all_data.pop("density_of_states", None)
         all_data.pop("molecule", None)
+        # this is a flag for the Structure mixin rather than a column
+        all_data.pop("include_symmetry", None)
 
         for parent in parents:
             # Skip the parent class if it doesn't directly inherit from the
@@ -887,6 +1490,37 @@ class DatabaseTable(models.Model):
         # return the dictionary
         return all_data if as_dict else cls(**all_data)
 
+    @classmethod
+    def bulk_from_toolkit(cls, entries: list[dict], batch_size: int = 1000) -> list:
+        """
+        Given a list of "raw data" dictionaries, this method builds a database
+        object for each one (using `from_toolkit`) and then saves all of them
+        to the database with batched inserts inside of a single transaction.
+
+        This should be preferred over calling `from_toolkit(...).save()` in a
+        loop when you have many rows to add, such as the ionic steps of a
+        relaxation or dynamics run.
+
+        #### Parameters
+
+        - `entries` :
+            A list of dictionaries, where each dictionary gives the kwargs
+            that would normally be passed to `from_toolkit`.
+        - `batch_size` :
+            The number of rows to include in each INSERT statement. Defaults
+            to 1000.
+
+        Returns
+        -------
+        a list of the saved database objects, in the same order as `entries`.
+        Note, whether the `id` of each object is populated depends on the
+        database backend (Postgres and SQLite both support this).
+        """
+        db_objects = [cls.from_toolkit(**entry) for entry in entries]
+        with transaction.atomic():
+            cls.objects.bulk_create(db_objects, batch_size=batch_size)
+        return db_objects
+
     # -------------------------------------------------------------------------
     # Methods creating new archives
     # -------------------------------------------------------------------------
@@ -1096,6 +1730,8 @@ class DatabaseTable(models.Model):
         confirm_override: bool = False,
         parallel: bool = False,
         confirm_sqlite_parallel: bool = False,
+        cache_directory: Path | str = None,
+        force_reload: bool = False,
     ):
         """
         Downloads a compressed zip file made by `objects.to_archive` and loads
@@ -1105,6 +1741,12 @@ class DatabaseTable(models.Model):
         empty database. After this call, all data will be stored locally and
         you don't need to call this method again (even accross python sessions).
 
+        Downloads are kept in a local cache and verified (see the
+        `get_cached_download` utility), so interrupted downloads are resumed
+        and the same archive is never downloaded twice. If this table was
+        already loaded from the exact same archive, loading is skipped (unless
+        `force_reload` is set).
+
         #### Parameters
 
         - `remote_archive_link`:
@@ -1126,14 +1768,15 @@ class DatabaseTable(models.Model):
             If the database backend is sqlite, this parameter ensures the user
             knows what they are doing and know the risks of parallelization.
             Default is False.
-        """
 
-        # make sure the user actually wants to do this!
-        cls._confirm_override(
-            confirm_override,
-            parallel,
-            confirm_sqlite_parallel,
-        )
+        - `cache_directory`:
+            Where to keep downloaded archives. Defaults to the `archives`
+            folder in the simmate config directory.
+
+        - `force_reload`:
+            Whether to load the archive even if this table was already loaded
+            from it. This still requires `confirm_override`. Default is False.
+        """
 
         # confirm that we have a link to download from
         if not remote_archive_link:
@@ -1154,23 +1797,52 @@ class DatabaseTable(models.Model):
                 f"should be cited: {cls.source_doi}"
             )
 
-        # Predetermine the file name, which is just the ending of the URL
-        archive_filename = remote_archive_link.split("/")[-1]
+        # Download the archive zip file (or grab it from our cache)
+        if not cache_directory:
+            cache_directory = settings.config_directory / "archives"
+        archive_filename, archive_hash = get_cached_download(
+            remote_archive_link,
+            directory=cache_directory,
+        )
 
-        # Download the archive zip file from the URL to the current working dir
-        logging.info("Downloading archive file...")
-        urllib.request.urlretrieve(remote_archive_link, archive_filename)
-        logging.info("Done.")
+        # We keep a record of which archive each table was last loaded from,
+        # so that the same data isn't loaded twice.
+        imports_filename = Path(cache_directory) / "imports.json"
+        imports = {}
+        if imports_filename.exists():
+            with imports_filename.open() as file:
+                imports = json.load(file)
+        import_key = f"{settings.database.name}:{cls.table_name}"
+        if (
+            not force_reload
+            and imports.get(import_key) == archive_hash
+            and cls.objects.exists()
+        ):
+            logging.info(
+                f"{cls.table_name} was already loaded from this archive. "
+                "Skipping import."
+            )
+            return
+
+        # make sure the user actually wants to do this!
+        cls._confirm_override(
+            confirm_override,
+            parallel,
+            confirm_sqlite_parallel,
+        )
 
         # now that the archive is downloaded, we can load it into our db
         logging.info("Loading data into Simmate database")
         cls.load_archive(
             archive_filename,
-            delete_on_completion=True,
+            delete_on_completion=False,  # the archive stays in our cache
             confirm_override=True,  # we already confirmed this above
             parallel=parallel,
             confirm_sqlite_parallel=True,  # we already confirmed this above
         )
+        imports[import_key] = archive_hash
+        with imports_filename.open("w") as file:
+            json.dump(imports, file)
         logging.info("Done.")
 
     @classmethod
@@ -1436,6 +2108,37 @@ class DatabaseTable(models.Model):
         ]
         return extra_columns
 
+    @classmethod
+    @property
+    @cache
+    def api_default_fields(cls) -> list[str]:
+        """
+        The columns returned by REST API endpoints when no `fields` are given
+        in the request. This is every column except for those listed in the
+        `api_exclude_by_default` attribute of this table and its parents.
+        """
+        columns_excluded = cls._get_columns_from_parents("api_exclude_by_default")
+        return [
+            field.name
+            for field in cls._meta.concrete_fields
+            if field.name not in columns_excluded
+        ]
+
+    @classmethod
+    def _get_columns_from_parents(cls, attribute: str) -> list[str]:
+        """
+        Combines a list of columns (such as `api_exclude_by_default`) that is
+        set on this table and all of its parent tables and mix-ins.
+        """
+        # We check every parent class (not just the direct mix-ins) because
+        # workflow tables often inherit from a table like Relaxation, which
+        # then inherits from Structure, Forces, etc.
+        return [
+            column
+            for parent in inspect.getmro(cls)
+            for column in parent.__dict__.get(attribute, [])
+        ]
+
     # -------------------------------------------------------------------------
     # Methods that link to the website UI
     # -------------------------------------------------------------------------
@@ -1444,6 +2147,26 @@ class DatabaseTable(models.Model):
     html_template_entry: str = None
     # experimental override for templates using by the Data Explorer app
 
+    html_defer_fields: list[str] = []
+    """
+    Columns that the website's html views do not load up front. These are
+    instead loaded only if a template (or plot) actually uses them. This is
+    for raw data columns, such as full band structures, that are rarely
+    displayed directly.
+
+    Columns listed by mix-ins and parent tables are automatically included.
+    """
+
+    @classmethod
+    @property
+    @cache
+    def html_deferred_fields(cls) -> list[str]:
+        """
+        The final list of columns that website html views do not load up front.
+        See `html_defer_fields` for more info.
+        """
+        return cls._get_columns_from_parents("html_defer_fields")
+
     @classmethod
     @property
     def url_table(self) -> str:
@@ -1478,13 +2201,201 @@ class DatabaseTable(models.Model):
         return {}
 
     # -------------------------------------------------------------------------
-    # Methods that populate "workflow columns" of custom tables
+    # Methods that populate derived columns (e.g. "workflow columns")
     # -------------------------------------------------------------------------
 
     @classmethod
-    def populate_workflow_columns(cls, batch_size: int = 1000):
+    def backfill_column(
+        cls,
+        column_name: str,
+        update_function: callable,
+        filters: dict = None,
+        partition_size: int = 1000,
+        nprocesses: int = 1,
+        checkpoint_filename: Path | str = None,
+    ) -> int:
+        """
+        Fills in (or recalculates) a column for many rows of this table, such as
+        when a new column is added and existing rows need a value.
+
+        The rows are split into partitions of consecutive primary keys (each
+        with up to `partition_size` rows), and each partition is processed and
+        saved on its own. Partitions can be processed in parallel, and
+        completed partitions are written to a checkpoint file. If the backfill
+        is stopped, running it again will skip any partitions that were
+        already completed. The checkpoint file is removed once every partition
+        is done.
+
+        ``` python
+        def get_energies_per_site(entries):
+            return [entry.energy / entry.nsites for entry in entries]
+
+        MyTable.backfill_column(
+            column_name="energy_per_atom",
+            update_function=get_energies_per_site,
+            filters=dict(energy_per_atom__isnull=True, energy__isnull=False),
+            nprocesses=4,
+        )
+        ```
+
+        #### Parameters
+
+        - `column_name`:
+            The name of the column to update.
+
+        - `update_function`:
+            A function that is given a list of database objects (one partition)
+            and returns a list with the new column value for each. The new
+            values are saved for you, but the function is free to use the
+            database otherwise (e.g. `populate_workflow_columns` runs
+            workflows that save their own results). When `nprocesses > 1`,
+            this function is run in separate processes, so it must be
+            importable (e.g. not a lambda).
+
+        - `filters`:
+            Limits which rows are updated. By default, only rows where the
+            column is empty (null) are updated.
+
+        - `partition_size`:
+            The number of rows in each partition. Defaults to 1000.
+
+        - `nprocesses`:
+            The number of partitions to process at the same time. Defaults to 1,
+            which processes everything in the current process. Otherwise,
+            each child process loads its partitions with its own database
+            connection, and the new values are saved by the current process.
+            Because open database connections are closed before the child
+            processes are started, this should not be called inside of a
+            transaction when `nprocesses > 1`.
+
+        - `checkpoint_filename`:
+            Where to record completed partitions. By default, this is a file
+            in the simmate config directory named after the table and column.
+
+        #### Returns
+
+        The number of rows that were updated.
+        """
+
+        if filters is None:
+            filters = {f"{column_name}__isnull": True}
+
+        if not checkpoint_filename:
+            directory = get_directory(settings.config_directory / "backfills")
+            checkpoint_filename = directory / f"{cls.table_name}-{column_name}.json"
+        checkpoint_filename = Path(checkpoint_filename)
+
+        # Each partition is a range of primary keys that starts at a value in
+        # "partition_starts" and ends before the next one (the last is open-ended).
+        # These are saved with the checkpoint so that a restarted backfill
+        # uses the same partitions -- even though completed rows may no
+        # longer match the filters.
+        if checkpoint_filename.exists():
+            with checkpoint_filename.open() as file:
+                checkpoint = json.load(file)
+            if checkpoint["partition_size"] != partition_size:
+                raise Exception(
+                    f"The checkpoint file {checkpoint_filename} was written "
+                    f"with a partition_size of {checkpoint['partition_size']}. "
+                    "Use this same value to continue the backfill, or delete "
+                    "the file to start over."
+                )
+        else:
+            # We walk through the keys in order and only keep the first of
+            # every partition. Ordering (rather than arithmetic on keys) means
+            # this also works for tables with string primary keys.
+            pks = (
+                cls.objects.filter(**filters)
+                .order_by("pk")
+                .values_list("pk", flat=True)
+                .iterator(chunk_size=partition_size)
+            )
+            checkpoint = {
+                "partition_size": partition_size,
+                "partition_starts": [
+                    chunk[0] for chunk in chunk_iterable(pks, partition_size)
+                ],
+                "completed": [],
+            }
+        completed = set(checkpoint["completed"])
+        starts = checkpoint["partition_starts"]
+        partition_bounds = list(zip(starts, starts[1:] + [None]))
+        partitions = [
+            partition
+            for partition in range(len(partition_bounds))
+            if partition not in completed
+        ]
+        logging.info(
+            f"Backfilling '{column_name}' for {len(partitions)} partition(s) "
+            f"of {cls.table_name}"
+        )
+
+        def save_partition(partition: int, entries: list, values: list) -> int:
+            for entry, value in zip(entries, values):
+                setattr(entry, column_name, value)
+            # each partition is committed on its own, and only then is it
+            # marked as completed
+            with transaction.atomic():
+                cls.objects.bulk_update(entries, [column_name])
+            completed.add(partition)
+            checkpoint["completed"] = sorted(completed)
+            with checkpoint_filename.open("w") as file:
+                json.dump(checkpoint, file)
+            return len(entries)
+
+        nupdated = 0
+        if nprocesses == 1:
+            for partition in track(partitions):
+                entries, values = _backfill_partition(
+                    cls, filters, *partition_bounds[partition], update_function
+                )
+                nupdated += save_partition(partition, entries, values)
+        else:
+            # Child processes are forked from this one, and they must not
+            # share our open database connections. We therefore close them
+            # (Django reopens them when they are next needed) and each child
+            # opens its own.
+            connections.close_all()
+            # We only keep a few partitions submitted at any given time so
+            # that the results of the full table aren't held in memory at once.
+            with ProcessPoolExecutor(
+                max_workers=nprocesses,
+                initializer=_close_db_connections,
+            ) as executor:
+                pending = {}
+                for partition in track(partitions):
+                    future = executor.submit(
+                        _backfill_partition,
+                        cls,
+                        filters,
+                        *partition_bounds[partition],
+                        update_function,
+                    )
+                    pending[future] = partition
+                    if len(pending) >= nprocesses * 2:
+                        finished, _ = wait(pending, return_when=FIRST_COMPLETED)
+                        for future in finished:
+                            nupdated += save_partition(
+                                pending.pop(future), *future.result()
+                            )
+                for future in as_completed(pending):
+                    nupdated += save_partition(pending[future], *future.result())
+
+        checkpoint_filename.unlink(missing_ok=True)
+        logging.info(f"Updated '{column_name}' for {nupdated} entries")
+        return nupdated
+
+    @classmethod
+    def populate_workflow_columns(
+        cls,
+        batch_size: int = 1000,
+        nprocesses: int = 1,
+    ):
         """
         Uses the `workflow_columns` property to fill a column with data.
+
+        This is a restartable backfill (see `backfill_column`), where
+        `batch_size` sets the number of rows in each partition.
         """
         # local import to avoid circular dependency
         from simmate.workflows.utilities import get_workflow
@@ -1494,7 +2405,7 @@ class DatabaseTable(models.Model):
 
             # BUG: I assume inputs are the common ones for now...
             # but I need a way to specify this for more diverse workflows
-            # (I give one suggested fix to this in the while-loop below)
+            # (I give one suggested fix to this below)
             if "molecules" not in workflow.parameter_names:
                 raise Exception(
                     "We are still at early stage testing for this method, so "
@@ -1503,40 +2414,65 @@ class DatabaseTable(models.Model):
                     "us to add additional support."
                 )
 
-            filters = {f"{column_name}__isnull": True}
-            nobjs_total = cls.objects.filter(**filters).count()
-            logging.info(
-                f"Updating '{column_name}' column using '{workflow_name}' "
-                f"for {nobjs_total} entries"
+            # First check for a user-defined method.
+            predefined_method = f"_format_inputs_for__{column_name}"
+            if hasattr(cls, predefined_method):
+                # method = getattr(cls, predefined_method)
+                # method(workflow, objs_to_update)
+                raise NotImplementedError("This feature is still being developed")
+
+            logging.info(f"Updating '{column_name}' column using '{workflow_name}'")
+            cls.backfill_column(
+                column_name=column_name,
+                update_function=partial(_run_workflow_on_entries, workflow_name),
+                partition_size=batch_size,
+                nprocesses=nprocesses,
             )
 
-            # Continue the loop until
-            while True:
-                # grab the next set of objects to update
-                objs_to_update = cls.objects.filter(**filters).all()[:batch_size]
-
-                # exit the while loop if there aren't any entries left
-                if not objs_to_update:
-                    break
-
-                # First check for a user-defined method.
-                predefined_method = f"_format_inputs_for__{column_name}"
-                if hasattr(cls, predefined_method):
-                    # method = getattr(cls, predefined_method)
-                    # method(workflow, objs_to_update)
-                    raise NotImplementedError("This feature is still being developed")
-                else:
-                    # OPTIMIZE: should I support run_cloud for parallelization?
-                    # BUG: see comment at start of for-loop where I say I assume
-                    # a 'molecules' input
-                    status = workflow.run(
-                        molecules=objs_to_update.to_toolkit(),
-                        compress_output=True,
-                    )
-                    results = status.result()
-                    logging.info("Saving results to db")
 
-                    # update the column with the new value and save
-                    for entry, entry_result in zip(objs_to_update, results):
-                        setattr(entry, column_name, entry_result)
-                    cls.objects.bulk_update(objs_to_update, [column_name])
+def _close_db_connections():
+    """
+    Used when starting child processes that may need the database. This
+    closes any connections that were copied from the parent process so that
+    the child opens its own when they are needed.
+    """
+    connections.close_all()
+
+
+def _backfill_partition(
+    table: DatabaseTable,
+    filters: dict,
+    start,
+    end,
+    update_function: callable,
+) -> tuple[list, list]:
+    """
+    Loads the rows of a table with primary keys from `start` up to (but not
+    including) `end` and gives them to `update_function`. This is used by
+    `DatabaseTable.backfill_column` and is a module-level function so that
+    it can be sent to other processes.
+    """
+    queryset = table.objects.filter(**filters).filter(pk__gte=start)
+    if end is not None:
+        queryset = queryset.filter(pk__lt=end)
+    entries = list(queryset.order_by("pk"))
+    return entries, update_function(entries)
+
+
+def _run_workflow_on_entries(workflow_name: str, entries: list) -> list:
+    """
+    Runs a workflow that takes 'molecules' as an input for a list of database
+    objects. This is used by `DatabaseTable.populate_workflow_columns` and is
+    a module-level function so that it can be sent to other processes.
+    """
+    # local import to avoid circular dependency
+    from simmate.workflows.utilities import get_workflow
+
+    workflow = get_workflow(workflow_name)
+    # BUG: see comment in populate_workflow_columns where I say I assume
+    # a 'molecules' input
+    status = workflow.run(
+        molecules=[entry.to_toolkit() for entry in entries],
+        compress_output=True,
+    )
+    return status.result()
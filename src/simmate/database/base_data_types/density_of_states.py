@@ -3,7 +3,10 @@
 import json
 from pathlib import Path
 
-from pymatgen.electronic_structure.dos import CompleteDos
+import numpy
+from pymatgen.core import Element
+from pymatgen.electronic_structure.core import Spin
+from pymatgen.electronic_structure.dos import CompleteDos, Dos
 from pymatgen.electronic_structure.plotter import DosPlotter
 from pymatgen.io.vasp.outputs import Vasprun
 
@@ -13,6 +16,7 @@ from simmate.database.base_data_types import (
     Structure,
     table_column,
 )
+from simmate.database.utilities import downsample_array, pack_arrays, unpack_arrays
 from simmate.visualization.plotting import MatplotlibFigure
 
 
@@ -25,10 +29,14 @@ class DensityofStates(DatabaseTable):
     class Meta:
         abstract = True
 
-    exclude_from_summary = ["density_of_states_data"]
+    exclude_from_summary = ["density_of_states_data", "density_of_states_arrays"]
 
     archive_fields = ["density_of_states_data"]
 
+    api_exclude_by_default = ["density_of_states_data", "density_of_states_arrays"]
+
+    html_defer_fields = ["density_of_states_data", "density_of_states_arrays"]
+
     api_filters = dict(
         band_gap=["range"],
         energy_fermi=["range"],
@@ -47,6 +55,18 @@ class DensityofStates(DatabaseTable):
     therefore currently unoptimized for small storage.
     """
 
+    density_of_states_arrays = table_column.BinaryField(blank=True, null=True)
+    """
+    The main data of the DOS (energies, total densities, and element- and
+    orbital-projected densities) stored as compressed, typed arrays. This is
+    much smaller and faster to load than `density_of_states_data`, so it is
+    used for plotting and analysis. See `get_density_of_states_arrays` for
+    loading this data.
+
+    Note, `density_of_states_data` is still needed to build the full toolkit
+    object, as these arrays don't include site projections.
+    """
+
     band_gap = table_column.FloatField(blank=True, null=True)
     """
     The band gap energy in eV.
@@ -91,6 +111,9 @@ class DensityofStates(DatabaseTable):
         data = (
             dict(
                 density_of_states_data=density_of_states.to_json(),
+                density_of_states_arrays=pack_arrays(
+                    cls._get_arrays_from_toolkit(density_of_states)
+                ),
                 band_gap=float(density_of_states.get_gap()),
                 energy_fermi=density_of_states.efermi,
                 conduction_band_minimum=float(density_of_states.get_cbm_vbm()[0]),
@@ -112,6 +135,103 @@ class DensityofStates(DatabaseTable):
         data = json.loads(self.density_of_states_data)
         return CompleteDos.from_dict(data)
 
+    # These arrays all have energy as their last axis
+    _energy_axis_arrays = [
+        "energies",
+        "densities",
+        "element_densities",
+        "orbital_densities",
+    ]
+
+    @staticmethod
+    def _get_arrays_from_toolkit(density_of_states: CompleteDos) -> dict:
+        # For spin-polarized calculations, densities are given as [up, down]
+        spins = (
+            [Spin.up, Spin.down]
+            if Spin.down in density_of_states.densities
+            else [Spin.up]
+        )
+        nenergies = len(density_of_states.energies)
+
+        def get_densities(dos_dict: dict) -> numpy.ndarray:
+            densities = [
+                [dos.densities[spin] for spin in spins] for dos in dos_dict.values()
+            ]
+            # reshaping keeps the expected shape when there are no projections
+            return numpy.array(densities, dtype=numpy.float32).reshape(
+                -1, len(spins), nenergies
+            )
+
+        element_dos = density_of_states.get_element_dos()
+        orbital_dos = density_of_states.get_spd_dos()
+        return dict(
+            spins=numpy.array([int(spin) for spin in spins], dtype=numpy.int8),
+            energies=numpy.array(density_of_states.energies, dtype=numpy.float64),
+            densities=numpy.array(
+                [density_of_states.densities[spin] for spin in spins],
+                dtype=numpy.float32,
+            ),
+            elements=numpy.array([str(element) for element in element_dos]),
+            element_densities=get_densities(element_dos),
+            orbitals=numpy.array([str(orbital) for orbital in orbital_dos]),
+            orbital_densities=get_densities(orbital_dos),
+        )
+
+    def get_density_of_states_arrays(
+        self,
+        arrays: list[str] = None,
+        max_points: int = None,
+    ) -> dict:
+        """
+        Loads the DOS as a dictionary of numpy arrays, which is much faster
+        than building the full toolkit object (`to_toolkit_density_of_states`).
+
+        The arrays available are:
+
+        - `spins`: the spins included (1 for up, -1 for down)
+        - `energies`: the energies in eV, with shape (nenergies,)
+        - `densities`: the total DOS, with shape (nspins, nenergies)
+        - `elements`: the element symbols used for `element_densities`
+        - `element_densities`: the DOS projected onto each element, with shape
+          (nelements, nspins, nenergies)
+        - `orbitals`: the orbital types used for `orbital_densities`
+        - `orbital_densities`: the DOS projected onto each orbital type (s, p,
+          d, f), with shape (norbitals, nspins, nenergies)
+
+        #### Parameters
+
+        - `arrays`:
+            The names of the arrays to load. By default, all are loaded.
+
+        - `max_points`:
+            The maximum number of energies to return. If the DOS has more than
+            this, neighboring energies are averaged together. This is useful
+            for plots, where thousands of points are more than can be seen.
+
+        If you only need these arrays from a query, you can avoid loading the
+        other large columns with...
+
+        ``` python
+        for dos in MyTable.objects.only("id", "density_of_states_arrays"):
+            data = dos.get_density_of_states_arrays(max_points=500)
+        ```
+        """
+        if self.density_of_states_arrays:
+            data = unpack_arrays(self.density_of_states_arrays, arrays)
+        else:
+            # Rows made before this column existed (or loaded from an archive)
+            # only have the JSON data, so we fall back to using it.
+            data = self._get_arrays_from_toolkit(self.to_toolkit_density_of_states())
+            if arrays:
+                data = {key: data[key] for key in arrays}
+
+        if max_points:
+            for key in self._energy_axis_arrays:
+                if key in data:
+                    data[key] = downsample_array(data[key], max_points)
+
+        return data
+
 
 class DensityofStatesCalc(Structure, DensityofStates, Calculation):
     """
@@ -136,7 +256,7 @@ class DensityofStatesCalc(Structure, DensityofStates, Calculation):
 
 
 class DosDiagram(MatplotlibFigure):
-    def get_plot(result: DensityofStates):
+    def get_plot(result: DensityofStates, max_points: int = 2000):
         # NOTE: This method should be moved to a toolkit object
 
         # DEV NOTE: Pymatgen only implements matplotlib for their DOS
@@ -146,13 +266,31 @@ class DosDiagram(MatplotlibFigure):
         # https://github.com/materialsproject/crystaltoolkit/blob/main/crystal_toolkit/components/bandstructure.py
 
         plotter = DosPlotter()
-        complete_dos = result.to_toolkit_density_of_states()
+
+        # Building the full CompleteDos is slow, so we make the (much simpler)
+        # Dos objects needed for this plot from the stored arrays instead.
+        data = result.get_density_of_states_arrays(max_points=max_points)
+        spins = [Spin(spin) for spin in data["spins"]]
+
+        def get_dos(densities):
+            return Dos(
+                efermi=result.energy_fermi,
+                energies=data["energies"],
+                densities={spin: d for spin, d in zip(spins, densities)},
+            )
 
         # Add the total density of States
-        plotter.add_dos("Total DOS", complete_dos)
+        plotter.add_dos("Total DOS", get_dos(data["densities"]))
 
         # add element-projected density of states
-        plotter.add_dos_dict(complete_dos.get_element_dos())
+        plotter.add_dos_dict(
+            {
+                Element(element): get_dos(densities)
+                for element, densities in zip(
+                    data["elements"], data["element_densities"]
+                )
+            }
+        )
 
         # If I want plots for individual orbitals
         # for site in vasprun.final_structure:
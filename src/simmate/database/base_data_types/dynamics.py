@@ -2,17 +2,21 @@
 
 from pathlib import Path
 
+import numpy
 import plotly.graph_objects as plotly_go
 from plotly.subplots import make_subplots
 from pymatgen.io.vasp.outputs import Vasprun
 
 from simmate.database.base_data_types import (
     Calculation,
+    DatabaseTable,
     Forces,
     Structure,
     Thermodynamics,
     table_column,
 )
+from simmate.database.utilities import pack_arrays, unpack_arrays
+from simmate.toolkit import Structure as ToolkitStructure
 from simmate.visualization.plotting import PlotlyFigure
 
 
@@ -23,7 +27,9 @@ class Dynamics(Structure, Calculation):
 
     In addition to the attributes listed, you can also access all ionic steps
     of the run via the `structures` attribute. This attribute gives a list of
-    `DynamicsIonicSteps`.
+    `DynamicsIonicSteps`. The full trajectory is also stored as compressed
+    arrays via the `trajectory` attribute (see `DynamicsTrajectory`), which
+    is much faster to load for long runs.
     """
 
     class Meta:
@@ -85,20 +91,29 @@ class Dynamics(Structure, Calculation):
         vasprun = Vasprun.from_directory(directory)
         self.update_from_vasp_run(vasprun)
 
-    def update_from_vasp_run(self, vasprun: Vasprun):
+    def update_from_vasp_run(
+        self,
+        vasprun: Vasprun,
+        include_symmetry_all_steps: bool = False,
+        include_ionic_steps: bool = True,
+    ):
         """
         Given a Vasprun object from a finished dynamics run, this will update the
-        Dynamics table entry and the corresponding DynamicsIonicStep entries.
+        Dynamics table entry, its DynamicsTrajectory, and the corresponding
+        DynamicsIonicStep entries.
 
         #### Parameters
 
         vasprun :
             The final Vasprun object from the dynamics run outputs.
-        corrections :
-            List of errors and corrections applied to during the relaxation.
-        directory :
-            name of the directory that relaxation was ran in. This is only used
-            to reference the archive file if it's ever needed again.
+        include_symmetry_all_steps :
+            Whether to run the (slow) symmetry analysis for every ionic step.
+            By default, only the start and final structures are analyzed and
+            intermediate steps are saved without spacegroup info.
+        include_ionic_steps :
+            Whether to save a DynamicsIonicStep row for every step. For long
+            runs, you may want to set this to False and only rely on the
+            (much more compact) trajectory.
         """
 
         # The data is actually easier to access as a dictionary and everything
@@ -108,25 +123,44 @@ class Dynamics(Structure, Calculation):
         # The only other data we need to grab is the list of structures. We can
         # pull the structure for each ionic step from the vasprun class directly.
         structures = vasprun.structures
-
-        # Now let's iterate through the ionic steps and save these to the database.
-        for number, (structure, ionic_step) in enumerate(
-            zip(structures, data["ionic_steps"])
-        ):
-            # first pull all the data together and save it to the database. We
-            # are saving this to an DynamicsIonicStepStructure datatable. To access this
-            # model, we look need to use "structures.model".
-            structure = self.structures.model.from_toolkit(
-                number=number,
-                structure=structure,
-                energy=ionic_step.get("e_wo_entrp", None),
-                site_forces=ionic_step.get("forces", None),
-                lattice_stress=ionic_step.get("stress", None),
-                temperature=self._get_temperature_at_step(number),
-                # simulation_time=number*self.time_step,
-                dynamics_run=self,  # this links the structure to this dynamics run
-            )
-            structure.save()
+        final_number = len(structures) - 1
+
+        # The full trajectory is always saved as a single compressed row
+        DynamicsTrajectory.objects.filter(dynamics_run=self).delete()
+        DynamicsTrajectory.from_frames(
+            structures=structures,
+            energies=[step.get("e_wo_entrp", None) for step in data["ionic_steps"]],
+            site_forces=[step.get("forces", None) for step in data["ionic_steps"]],
+            lattice_stresses=[step.get("stress", None) for step in data["ionic_steps"]],
+            dynamics_run=self,
+        ).save()
+
+        if not include_ionic_steps:
+            self.save()
+            return
+
+        # Now let's build all of the ionic steps and save them to the database
+        # in bulk. We are saving these to an DynamicsIonicStep datatable. To
+        # access this model, we look need to use "structures.model".
+        self.structures.model.bulk_from_toolkit(
+            [
+                dict(
+                    number=number,
+                    structure=structure,
+                    energy=ionic_step.get("e_wo_entrp", None),
+                    site_forces=ionic_step.get("forces", None),
+                    lattice_stress=ionic_step.get("stress", None),
+                    temperature=self._get_temperature_at_step(number),
+                    # simulation_time=number*self.time_step,
+                    dynamics_run=self,  # this links the structure to this run
+                    include_symmetry=include_symmetry_all_steps
+                    or number in (0, final_number),
+                )
+                for number, (structure, ionic_step) in enumerate(
+                    zip(structures, data["ionic_steps"])
+                )
+            ]
+        )
 
         # Now we have the relaxation data all loaded and can save it to the database
         self.save()
@@ -200,6 +234,307 @@ class DynamicsIonicStep(Structure, Thermodynamics, Forces):
     # nosepot
 
 
+class DynamicsTrajectory(DatabaseTable):
+    """
+    Holds the full trajectory of a `Dynamics` entry as compressed arrays. Unlike
+    `DynamicsIonicStep`, where there is one row per step, this table has a
+    single row per run. Frames are stored in chunks, so a range of frames can
+    be loaded without decompressing the full trajectory.
+
+    You should typically access this data through the `trajectory` attribute
+    of a `Dynamics` entry:
+
+    ``` python
+    dynamics_run = Dynamics.objects.get(id=123)
+    trajectory = dynamics_run.trajectory
+
+    # a dictionary of numpy arrays for frames 100 to 200
+    data = trajectory.get_frames(start=100, stop=200)
+
+    # or convert the frames to toolkit or ASE objects
+    structures = trajectory.to_toolkit(start=100, stop=200)
+    atoms = trajectory.to_ase(start=100, stop=200, step=10)
+    ```
+    """
+
+    class Meta:
+        app_label = "workflows"
+
+    exclude_from_summary = ["trajectory_data"]
+
+    api_exclude_by_default = ["trajectory_data"]
+
+    html_defer_fields = ["trajectory_data"]
+
+    api_filters = dict(
+        nframes=["range"],
+        nsites=["range"],
+    )
+
+    dynamics_run = table_column.OneToOneField(
+        Dynamics,
+        on_delete=table_column.CASCADE,
+        related_name="trajectory",
+    )
+    """
+    The dynamics run that this trajectory belongs to.
+    """
+
+    nframes = table_column.IntegerField()
+    """
+    The total number of frames (ionic steps) in the trajectory.
+    """
+
+    nsites = table_column.IntegerField()
+    """
+    The number of sites in each frame.
+    """
+
+    species = table_column.JSONField()
+    """
+    The element of each site. This is the same for every frame.
+    """
+
+    array_names = table_column.JSONField()
+    """
+    The per-frame arrays that are available for this trajectory (e.g.
+    "positions", "lattices", "energies", etc.). See `from_frames` for the
+    full list.
+    """
+
+    frame_chunk_size = table_column.IntegerField(default=100)
+    """
+    The number of frames that are compressed together. Loading any frame
+    requires decompressing the full chunk that it belongs to.
+    """
+
+    trajectory_data = table_column.BinaryField()
+    """
+    The compressed arrays for all frames. Use `get_frames` to load this data.
+    """
+
+    # These are the arrays that can be stored for each frame. We save space
+    # with float32 where the extra precision of float64 isn't meaningful.
+    _array_dtypes = dict(
+        positions=numpy.float64,
+        lattices=numpy.float64,
+        energies=numpy.float64,
+        site_forces=numpy.float32,
+        lattice_stresses=numpy.float32,
+    )
+
+    @classmethod
+    def from_frames(
+        cls,
+        structures: list[ToolkitStructure],
+        energies: list[float] = None,
+        site_forces: list = None,
+        lattice_stresses: list = None,
+        frame_chunk_size: int = 100,
+        **kwargs,
+    ):
+        """
+        Builds a (unsaved) trajectory from the data of each frame.
+
+        #### Parameters
+
+        - `structures`:
+            The structure of every frame. Each must have the same sites in the
+            same order. Positions (in Angstroms) and lattices are taken from these.
+
+        - `energies`:
+            The energy (in eV) of every frame. Optional.
+
+        - `site_forces`:
+            The forces (in eV/Angstrom) on each site of every frame, giving a
+            shape of (nframes, nsites, 3). Optional.
+
+        - `lattice_stresses`:
+            The stress tensor (in kbar) of every frame. Optional.
+
+        - `frame_chunk_size`:
+            The number of frames to compress together. Defaults to 100.
+
+        - `**kwargs`:
+            Any extra columns to set, such as `dynamics_run`.
+
+        Frames that are missing a value (e.g. `None` from a failed step) are
+        stored as NaN. If no frames have a value, that array is not stored.
+        """
+        nsites = len(structures[0])
+        if any(len(structure) != nsites for structure in structures):
+            raise Exception("All frames of a trajectory must have the same sites")
+
+        frames = dict(
+            positions=[structure.cart_coords for structure in structures],
+            lattices=[structure.lattice.matrix for structure in structures],
+            energies=energies,
+            site_forces=site_forces,
+            lattice_stresses=lattice_stresses,
+        )
+        frame_shapes = dict(
+            positions=(nsites, 3),
+            lattices=(3, 3),
+            energies=(),
+            site_forces=(nsites, 3),
+            lattice_stresses=(3, 3),
+        )
+        arrays = {}
+        for name, values in frames.items():
+            if values is None or all(value is None for value in values):
+                continue
+            # missing values (e.g. from a failed step) are stored as NaN
+            array = numpy.full(
+                (len(structures), *frame_shapes[name]),
+                numpy.nan,
+                dtype=cls._array_dtypes[name],
+            )
+            for frame, value in enumerate(values):
+                if value is not None:
+                    array[frame] = value
+            arrays[name] = array
+
+        # each array is split into chunks of frames that are compressed separately
+        chunks = {
+            f"{name}_{chunk_number}": array[start : start + frame_chunk_size]
+            for name, array in arrays.items()
+            for chunk_number, start in enumerate(
+                range(0, len(structures), frame_chunk_size)
+            )
+        }
+
+        return cls(
+            nframes=len(structures),
+            nsites=nsites,
+            species=[site.specie.symbol for site in structures[0]],
+            array_names=list(arrays.keys()),
+            frame_chunk_size=frame_chunk_size,
+            trajectory_data=pack_arrays(chunks),
+            **kwargs,
+        )
+
+    def get_frames(
+        self,
+        start: int = None,
+        stop: int = None,
+        step: int = None,
+        arrays: list[str] = None,
+    ) -> dict:
+        """
+        Loads a range of frames as a dictionary of numpy arrays, where the
+        first axis of each array is the frame. The range follows the same
+        rules as python slicing (e.g. `start=-10` gives the last 10 frames).
+        Only the chunks that hold the requested frames are decompressed.
+
+        #### Parameters
+
+        - `start`, `stop`, `step`:
+            The range of frames to load. By default, all frames are loaded.
+
+        - `arrays`:
+            The names of the arrays to load (see `array_names` for options).
+            By default, all available arrays are loaded.
+        """
+        arrays = arrays or self.array_names
+        frames = numpy.arange(self.nframes)[start:stop:step]
+
+        # Find which chunk each frame is in and its position once the chunks
+        # are joined. Every chunk is full except the final one, so this is
+        # simple indexing even when chunks in between are skipped.
+        chunk_numbers = numpy.unique(frames // self.frame_chunk_size)
+        if not chunk_numbers.size:
+            chunk_numbers = [0]  # we still load a chunk to give empty arrays
+        chunk_positions = numpy.searchsorted(
+            chunk_numbers, frames // self.frame_chunk_size
+        )
+        indices = (
+            chunk_positions * self.frame_chunk_size + frames % self.frame_chunk_size
+        )
+
+        chunks = unpack_arrays(
+            self.trajectory_data,
+            keys=[f"{name}_{number}" for name in arrays for number in chunk_numbers],
+        )
+        return {
+            name: numpy.concatenate(
+                [chunks[f"{name}_{number}"] for number in chunk_numbers]
+            )[indices]
+            for name in arrays
+        }
+
+    def to_toolkit(
+        self,
+        start: int = None,
+        stop: int = None,
+        step: int = None,
+    ) -> list[ToolkitStructure]:
+        """
+        Converts a range of frames into toolkit Structures. See `get_frames`
+        for details on the parameters.
+        """
+        data = self.get_frames(start, stop, step, arrays=["positions", "lattices"])
+        return [
+            ToolkitStructure(
+                lattice=lattice,
+                species=self.species,
+                coords=positions,
+                coords_are_cartesian=True,
+            )
+            for positions, lattice in zip(data["positions"], data["lattices"])
+        ]
+
+    def to_ase(
+        self,
+        start: int = None,
+        stop: int = None,
+        step: int = None,
+    ) -> list:
+        """
+        Converts a range of frames into a list of ASE Atoms objects. Energies,
+        forces, and stresses (if available) are attached as a single-point
+        calculator on each Atoms object. See `get_frames` for details on the
+        parameters.
+
+        These can be written to an ASE trajectory file with:
+
+        ``` python
+        from ase.io import write
+
+        atoms = trajectory.to_ase()
+        write("md.traj", atoms)
+        ```
+        """
+        from ase import Atoms, units
+        from ase.calculators.singlepoint import SinglePointCalculator
+        from ase.stress import full_3x3_to_voigt_6_stress
+
+        data = self.get_frames(start, stop, step)
+
+        atoms_list = []
+        for frame in range(len(data["positions"])):
+            atoms = Atoms(
+                symbols=self.species,
+                positions=data["positions"][frame],
+                cell=data["lattices"][frame],
+                pbc=True,
+            )
+            results = {}
+            if "energies" in data:
+                results["energy"] = data["energies"][frame]
+            if "site_forces" in data:
+                results["forces"] = data["site_forces"][frame]
+            if "lattice_stresses" in data:
+                # kbar (VASP convention) to eV/A^3 (ASE convention), where ASE
+                # also uses the opposite sign
+                stress = -data["lattice_stresses"][frame] * units.GPa / 10
+                results["stress"] = full_3x3_to_voigt_6_stress(stress)
+            if results:
+                atoms.calc = SinglePointCalculator(atoms, **results)
+
+            atoms_list.append(atoms)
+        return atoms_list
+
+
 class SimmulationDetail(PlotlyFigure):
     def get_plot(result: Dynamics):
         # Grab the calculation's structure and convert it to a dataframe
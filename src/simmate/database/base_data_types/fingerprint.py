@@ -1,6 +1,15 @@
 # -*- coding: utf-8 -*-
 
+import re
+from pathlib import Path
+
+import numpy
+from django.db import connections
+
+from simmate.configuration import settings
 from simmate.database.base_data_types import DatabaseTable, table_column
+from simmate.toolkit import Structure
+from simmate.utilities import get_directory
 
 
 class FingerprintPool(DatabaseTable):
@@ -25,6 +34,24 @@ class FingerprintPool(DatabaseTable):
     The kwargs used to initialized the fingerprint validator class used
     """
 
+    settings_hash = table_column.CharField(
+        max_length=64,
+        blank=True,
+        null=True,
+        db_index=True,
+    )
+    """
+    A hash of the featurizer class and the settings used to make it (see
+    `FingerprintValidator.settings_hash`). Validators with the same hash
+    reuse the fingerprints in this pool.
+    """
+
+    featurizer_version = table_column.CharField(max_length=25, blank=True, null=True)
+    """
+    The version of the featurizer code that made these fingerprints (see
+    `FingerprintValidator.featurizer_version`)
+    """
+
     database_table = table_column.CharField(max_length=50, blank=True, null=True)
     """
     The database table that structures are being pulled from. 
@@ -34,6 +61,193 @@ class FingerprintPool(DatabaseTable):
     this is not a relation to the Structure table because its an abstract model.
     """
 
+    _similarity_indexes: dict = {}
+    # Indexes that have already been loaded in this python session (keyed by
+    # `similarity_index_key`). This prevents (potentially large) index files
+    # being reread for every search.
+
+    similarity_metrics: dict = {"linalg_norm": "euclidean", "cos": "cosine"}
+    """
+    The fingerprint comparison modes that similarity searches support, and the
+    index metric that is used for each.
+    """
+
+    def get_validator(self):
+        """
+        Initializes the fingerprint validator that made this pool's fingerprints.
+        This is useful for making the fingerprint of a new structure that can
+        then be compared to this pool.
+        """
+        from simmate.engine import Workflow
+        from simmate.toolkit.validators.fingerprint import FingerprintValidator
+
+        # search all subclasses (and their subclasses) for a matching name
+        validator_classes = FingerprintValidator.__subclasses__()
+        while validator_classes:
+            validator_class = validator_classes.pop()
+            if validator_class.name == self.method:
+                break
+            validator_classes += validator_class.__subclasses__()
+        else:
+            raise Exception(f"Unable to find a fingerprint validator for {self.method}")
+
+        init_kwargs = Workflow._deserialize_parameters(
+            add_defaults=False,
+            **self.init_kwargs,
+        )
+        return validator_class(**init_kwargs)
+
+    @property
+    def similarity_index_key(self) -> str:
+        """
+        A name for this pool's similarity index. Pool ids alone are not unique
+        (e.g. when switching between databases or when the id of a deleted pool
+        is reused), so this includes the database name and when the pool was
+        created.
+        """
+        database_name = connections[self._state.db or "default"].settings_dict["NAME"]
+        database_name = re.sub(r"\W+", "_", str(database_name)).strip("_")
+        created_at = (
+            self.created_at.strftime("%Y%m%d%H%M%S%f") if self.created_at else None
+        )
+        return f"{database_name}-pool-{self.id}-{created_at}"
+
+    @property
+    def similarity_index_filename(self) -> Path:
+        """
+        The file where this pool's similarity index is stored. This is in the
+        simmate config directory, alongside the default database file.
+        """
+        directory = get_directory(settings.config_directory / "fingerprint_indexes")
+        return directory / f"{self.similarity_index_key}.npz"
+
+    def delete_similarity_index(self):
+        """
+        Removes this pool's similarity index from disk and memory. A new index
+        will be built on the next search.
+        """
+        self._similarity_indexes.pop(self.similarity_index_key, None)
+        self.similarity_index_filename.unlink(missing_ok=True)
+        self.similarity_index_filename.with_suffix(".hnsw").unlink(missing_ok=True)
+
+    def get_similarity_index(self, update: bool = True):
+        """
+        Loads the nearest-neighbor index of all fingerprints in this pool.
+        The index is stored on disk (see `similarity_index_filename`) and only
+        fingerprints added since the last update are added to it.
+
+        #### Parameters
+
+        - `update`:
+            Whether to check the database for new fingerprints and add them
+            to the index. Defaults to True.
+        """
+        from simmate.toolkit.validators.fingerprint import FingerprintIndex
+
+        index = self._similarity_indexes.get(self.similarity_index_key)
+        if index is None and self.similarity_index_filename.exists():
+            index = FingerprintIndex.load(self.similarity_index_filename)
+        elif index is None:
+            comparison_mode = self.get_validator().comparison_mode
+            if comparison_mode not in self.similarity_metrics:
+                raise Exception(
+                    "Similarity search is only supported for fingerprints "
+                    "that use 'linalg_norm' or 'cos' comparison modes."
+                )
+            index = FingerprintIndex(metric=self.similarity_metrics[comparison_mode])
+            index.metadata["last_fingerprint_id"] = 0
+        self._similarity_indexes[self.similarity_index_key] = index
+
+        if not update:
+            return index
+
+        # Fingerprints are never edited once added, so the new ones can be
+        # found by their id alone.
+        new_fingerprints = list(
+            self.fingerprints.filter(id__gt=index.metadata["last_fingerprint_id"])
+            .order_by("id")
+            .values_list("id", "database_id", "fingerprint")
+        )
+        if not new_fingerprints:
+            return index
+
+        ids, database_ids, vectors = zip(*new_fingerprints)
+        # BUG: race conditions can give duplicate fingerprints for a single
+        # structure, so we make sure each structure is only added once
+        database_ids, first_entries = numpy.unique(database_ids, return_index=True)
+        is_new = ~numpy.isin(database_ids, index.ids)
+        index.add(
+            vectors=[vectors[i] for i in first_entries[is_new]],
+            ids=database_ids[is_new],
+        )
+        index.metadata["last_fingerprint_id"] = max(ids)
+        index.save(self.similarity_index_filename)
+
+        return index
+
+    def search_similar(
+        self,
+        structure: Structure = None,
+        fingerprint: list[float] = None,
+        database_id: int = None,
+        k: int = 10,
+        radius: float = None,
+    ) -> list[dict]:
+        """
+        Finds the structures in this pool that are most similar to the one
+        given, using a nearest-neighbor index of the pool's fingerprints
+        (see `get_similarity_index`).
+
+        Only one of `structure`, `fingerprint`, or `database_id` should be given.
+
+        #### Parameters
+
+        - `structure`:
+            A structure to find similar ones to. Its fingerprint will be made
+            using the same settings as the rest of this pool.
+
+        - `fingerprint`:
+            A fingerprint (vector) to find similar ones to.
+
+        - `database_id`:
+            The id of a structure in this pool's `database_table`.
+
+        - `k`:
+            The number of structures to return. Defaults to 10.
+
+        - `radius`:
+            If given, all structures within this fingerprint distance are
+            returned instead of the closest `k`.
+
+        #### Returns
+
+        A list of dictionaries, with the keys "database_id" and "distance",
+        sorted with the most similar structure first.
+        """
+        index = self.get_similarity_index()
+
+        if database_id is not None:
+            existing = self.fingerprints.filter(database_id=database_id).first()
+            if existing:
+                fingerprint = existing.fingerprint
+            else:
+                table = DatabaseTable.get_table(self.database_table)
+                structure = table.objects.get(id=database_id).to_toolkit()
+        if structure is not None:
+            fingerprint = self.get_validator()._get_fingerprint(structure)
+        if fingerprint is None:
+            raise Exception("A structure, fingerprint, or database_id is required")
+
+        if radius is not None:
+            ids, distances = index.query_radius(fingerprint, radius=radius)
+        else:
+            ids, distances = index.query(fingerprint, k=k)
+
+        return [
+            {"database_id": int(i), "distance": float(d)}
+            for i, d in zip(ids, distances)
+        ]
+
 
 class Fingerprint(DatabaseTable):
     """
@@ -46,6 +260,8 @@ class Fingerprint(DatabaseTable):
     class Meta:
         app_label = "core_components"
 
+    api_exclude_by_default = ["fingerprint"]
+
     database_id = table_column.IntegerField(blank=True, null=True)
     """
     The id of the structure that this fingerprint came from
@@ -20,6 +20,11 @@ class Forces(DatabaseTable):
         "lattice_stress",
     ]
 
+    api_exclude_by_default = [
+        "site_forces",
+        "lattice_stress",
+    ]
+
     api_filters = dict(
         site_force_norm_max=["range"],
         site_forces_norm_per_atom=["range"],
@@ -25,6 +25,14 @@ class PopulationAnalysis(StaticEnergy):
         "element_list",
     ]
 
+    api_exclude_by_default = [
+        "oxidation_states",
+        "charges",
+        "min_dists",
+        "atomic_volumes",
+        "element_list",
+    ]
+
     oxidation_states = table_column.JSONField(blank=True, null=True)
     """
     A list of calculated oxidation states for each site.
@@ -116,14 +116,12 @@ class Relaxation(Structure, Thermodynamics, Forces, Calculation):
     # structure_final --> points to final IonicStep
     # structures --> gives list of all IonicSteps
 
-    structure_start = (
-        table_column.OneToOneField(
-            "IonicStep",
-            on_delete=table_column.CASCADE,
-            related_name="relaxations_as_start",
-            blank=True,
-            null=True,
-        ),
+    structure_start = table_column.OneToOneField(
+        "IonicStep",
+        on_delete=table_column.CASCADE,
+        related_name="relaxations_as_start",
+        blank=True,
+        null=True,
     )
     structure_final = table_column.OneToOneField(
         "IonicStep",
@@ -174,7 +172,11 @@ class Relaxation(Structure, Thermodynamics, Forces, Calculation):
         vasprun = Vasprun.from_directory(directory)
         self.update_from_vasp_run(vasprun)
 
-    def update_from_vasp_run(self, vasprun: Vasprun):
+    def update_from_vasp_run(
+        self,
+        vasprun: Vasprun,
+        include_symmetry_all_steps: bool = False,
+    ):
         """
         Given a Vasprun object from a finished relaxation, this will update the
         Relaxation table entry and the corresponding IonicStep entries.
@@ -183,11 +185,10 @@ class Relaxation(Structure, Thermodynamics, Forces, Calculation):
 
         vasprun :
             The final Vasprun object from the relaxation outputs.
-        corrections :
-            List of errors and corrections applied to during the relaxation.
-        directory :
-            name of the directory that relaxation was ran in. This is only used
-            to reference the archive file if it's ever needed again.
+        include_symmetry_all_steps :
+            Whether to run the (slow) symmetry analysis for every ionic step.
+            By default, only the start and final structures are analyzed and
+            intermediate steps are saved without spacegroup info.
         """
 
         # The data is actually easier to access as a dictionary and everything
@@ -196,39 +197,56 @@ class Relaxation(Structure, Thermodynamics, Forces, Calculation):
 
         # The only other data we need to grab is the list of structures. We can
         # pull the structure for each ionic step from the vasprun class directly.
-        structures = vasprun.structures
-
-        # Now let's iterate through the ionic steps and save these to the database.
-        for number, (structure, ionic_step) in enumerate(
-            zip(structures, data["ionic_steps"])
-        ):
-            # first pull all the data together and save it to the database. We
-            # are saving this to an IonicStepStructure datatable. To access this
-            # model, we look need to use "structures.model".
-            structure = self.structures.model.from_toolkit(
-                number=number,
-                structure=structure,
-                energy=ionic_step["e_wo_entrp"],
-                site_forces=ionic_step["forces"],
-                lattice_stress=ionic_step["stress"],
-                relaxation=self,  # this links the structure to this relaxation
-            )
-            structure.save()
+        # If a run was cut short, there may be fewer ionic steps than
+        # structures (or vice versa), so we only keep the steps that have both.
+        steps = list(zip(vasprun.structures, data["ionic_steps"]))
+        structures = [structure for structure, _ in steps]
+        final_number = len(steps) - 1
+
+        # Now let's build all of the ionic steps and save them to the database
+        # in bulk. We are saving these to an IonicStep datatable. To access this
+        # model, we look need to use "structures.model".
+        ionic_steps = self.structures.model.bulk_from_toolkit(
+            [
+                dict(
+                    number=number,
+                    structure=structure,
+                    energy=ionic_step["e_wo_entrp"],
+                    site_forces=ionic_step["forces"],
+                    lattice_stress=ionic_step["stress"],
+                    relaxation=self,  # this links the structure to this relaxation
+                    include_symmetry=include_symmetry_all_steps
+                    or number in (0, final_number),
+                )
+                for number, (structure, ionic_step) in enumerate(steps)
+            ]
+        )
 
-            # If this is the first structure, we want to link it as such
-            if number == 0:
-                self.structure_start_id = structure.id
-            # and same for the final structure. Note, we can't use elif becuase
-            # there's a chance the start/end structure are the same, which occurs
-            # when the starting structure is found to be relaxed already.
-            if number == len(structures) - 1:
-                self.structure_final_id = structure.id
+        # Now link the first and final structures, using the steps that were
+        # actually saved. Note, there's a chance the start/end structure are
+        # the same, which occurs when the starting structure is found to be
+        # relaxed already.
+        # Some database backends don't return ids from bulk inserts, so we
+        # query for them if needed.
+        start_step = min(ionic_steps, key=lambda step: step.number)
+        final_step = max(ionic_steps, key=lambda step: step.number)
+        if start_step.id is None or final_step.id is None:
+            step_ids = dict(
+                self.structures.filter(
+                    number__in=[start_step.number, final_step.number]
+                ).values_list("number", "id")
+            )
+            self.structure_start_id = step_ids[start_step.number]
+            self.structure_final_id = step_ids[final_step.number]
+        else:
+            self.structure_start_id = start_step.id
+            self.structure_final_id = final_step.id
 
         # update our relaxation entry with new data
         self.update_from_toolkit(
             # use the final ionic setup for the structure and energy
             structure=structures[-1],
-            energy=data["ionic_steps"][-1]["e_wo_entrp"],
+            energy=final_step.energy,
             # calculate extra data for storing
             volume_change=structures[-1].volume
             - structures[0].volume / structures[0].volume,
@@ -1,21 +1,28 @@
 # -*- coding: utf-8 -*-
 
 from django_filters import rest_framework as django_api_filters
+from pymatgen.core.periodic_table import get_el_sp
 from scipy.constants import Avogadro
 
 from simmate.database.base_data_types import DatabaseTable, Spacegroup, table_column
 from simmate.toolkit import Structure as ToolkitStructure
-from simmate.utilities import get_chemical_subsystems
 
 
 class Structure(DatabaseTable):
     class Meta:
         abstract = True
 
-    exclude_from_summary = ["structure", "elements"]
+    exclude_from_summary = [
+        "structure",
+        "elements",
+        "elements_mask_low",
+        "elements_mask_high",
+    ]
 
     archive_fields = ["structure"]
 
+    api_exclude_by_default = ["structure"]
+
     api_filters = dict(
         nsites=["range"],
         nelements=["range"],
@@ -69,15 +76,43 @@ class Structure(DatabaseTable):
     List of elements in the structure (ex: ["Y", "C", "F"])
     """
 
-    chemical_system = table_column.CharField(max_length=25, blank=True, null=True)
+    chemical_system = table_column.CharField(
+        max_length=25,
+        blank=True,
+        null=True,
+        db_index=True,
+    )
     """
     the base chemical system (ex: "Y-C-F")
     
     Note: be careful when searching for elements! Running chemical_system__contains="C"
     on this field won't do what you expect -- because it will return structures
     containing Ca, Cs, Ce, Cl, and so on. If you want to search for structures
-    that contain a specific element, use elements__contains='"C"' instead. The
-    odd use of quotes '"C"' is required here!
+    that contain a specific element, use the `filter_elements_contains_all` 
+    method of your search results instead.
+    """
+
+    elements_mask_low = table_column.BigIntegerField(
+        blank=True,
+        null=True,
+        db_index=True,
+    )
+    """
+    A bitmask of the elements present in the structure, where bit (Z - 1) is
+    set for each element with atomic number Z from 1 to 63. Together with
+    `elements_mask_high`, this allows for fast element-based queries that don't
+    require parsing strings. You typically won't use this column directly, but
+    instead use methods such as `filter_elements_subset`.
+    """
+
+    elements_mask_high = table_column.BigIntegerField(
+        blank=True,
+        null=True,
+        db_index=True,
+    )
+    """
+    The same as `elements_mask_low`, but where bit (Z - 64) is set for each
+    element with atomic number Z of 64 and above.
     """
 
     density = table_column.FloatField(blank=True, null=True)
@@ -174,30 +209,76 @@ class Structure(DatabaseTable):
         # Make sure that the chemical system is made of valid elements and
         # separated by hyphens
 
-        # check if the user wants subsystems included (This will be True or False)
+        # check if the user wants subsystems included (This will be True or False).
+        # For this, we search for all structures whose elements are a subset of
+        # the chemical system -- which is exactly the list of subsystems, but
+        # avoids building a large "IN" query for many-element systems.
         if include_subsystems:
-            systems_cleaned = get_chemical_subsystems(value)
+            return queryset.filter_elements_subset(value.split("-"))
 
         # otherwise just clean the single system
-        else:
-            # Convert the system to a list of elements
-            systems_cleaned = value.split("-")
-            # now recombine the list back into alphabetical order
-            systems_cleaned = ["-".join(sorted(systems_cleaned))]
-            # NOTE: we call this "systems_cleaned" and put it in a list so
-            # that our other methods don't have to deal with multiple cases
-            # when running a django filter.
+        # Convert the system to a list of elements and then recombine the list
+        # back into alphabetical order
+        system_cleaned = "-".join(sorted(value.split("-")))
+        return queryset.filter(chemical_system=system_cleaned)
 
-        filtered_queryset = queryset.filter(chemical_system__in=systems_cleaned)
+    @staticmethod
+    def get_elements_mask(elements: list) -> tuple[int, int]:
+        """
+        Converts a list of elements (e.g. ["Y", "C", "F"]) to the pair of
+        bitmasks stored in the `elements_mask_low` and `elements_mask_high`
+        columns. Dummy species (with no atomic number) are ignored.
+        """
+        mask_low = 0
+        mask_high = 0
+        for element in elements:
+            atomic_number = get_el_sp(str(element)).Z
+            if not atomic_number:
+                continue
+            # we use 63 bits for each column so that the signed 64-bit integer
+            # is never negative
+            elif atomic_number <= 63:
+                mask_low |= 1 << (atomic_number - 1)
+            else:
+                mask_high |= 1 << (atomic_number - 64)
+        return mask_low, mask_high
 
-        # now return the cleaned value. Note that this is now a list of
-        # chemical systems, where all elements are in alphabetical order.
-        return filtered_queryset
+    @classmethod
+    def update_all_elements_masks(cls, batch_size: int = 5000):
+        """
+        Populates the `elements_mask_low` and `elements_mask_high` columns for
+        all rows that are missing them. New rows are populated automatically
+        when using `from_toolkit`, so this is only needed for older data.
+        """
+        entries = cls.objects.filter(
+            elements__isnull=False,
+            elements_mask_low__isnull=True,
+        ).only("id", "elements")
+
+        entries_to_update = []
+        for entry in entries.iterator(chunk_size=batch_size):
+            entry.elements_mask_low, entry.elements_mask_high = cls.get_elements_mask(
+                entry.elements
+            )
+            entries_to_update.append(entry)
+            if len(entries_to_update) >= batch_size:
+                cls.objects.bulk_update(
+                    entries_to_update,
+                    ["elements_mask_low", "elements_mask_high"],
+                )
+                entries_to_update = []
+
+        if entries_to_update:
+            cls.objects.bulk_update(
+                entries_to_update,
+                ["elements_mask_low", "elements_mask_high"],
+            )
 
     @classmethod
     def _from_toolkit(
         cls,
         structure: ToolkitStructure | str = None,
+        include_symmetry: bool = True,
         as_dict: bool = False,
         **kwargs,
     ):
@@ -232,6 +313,9 @@ class Structure(DatabaseTable):
         # Alternatively, add as a method to the table, similar to
         # the "update_all_stabilities" for thermodynamics
 
+        elements = [str(e) for e in structure.composition.elements]
+        elements_mask_low, elements_mask_high = cls.get_elements_mask(elements)
+
         # Given a pymatgen structure object, this will return a database structure
         # object, but will NOT save it to the database yet. The kwargs input
         # is only if you inherit from this class and add extra fields.
@@ -239,7 +323,9 @@ class Structure(DatabaseTable):
             structure=structure.to(fmt=storage_format),
             nsites=structure.num_sites,
             nelements=len(structure.composition),
-            elements=[str(e) for e in structure.composition.elements],
+            elements=elements,
+            elements_mask_low=elements_mask_low,
+            elements_mask_high=elements_mask_high,
             chemical_system=structure.composition.chemical_system,
             density=float(structure.density),
             density_atomic=structure.num_sites / structure.volume,
@@ -252,10 +338,14 @@ class Structure(DatabaseTable):
             * 1e-27
             * 1e3,
             # OPTIMIZE SPACEGROUP INFO
+            # Symmetry analysis is the slowest step here, so callers that add
+            # many structures at once (e.g. intermediate ionic steps) can skip it
             spacegroup_id=structure.get_space_group_info(
                 symprec=0.1,
                 # angle_tolerance=5.0,
-            )[1],
+            )[1]
+            if include_symmetry
+            else None,
             formula_full=structure.composition.formula,
             formula_reduced=structure.composition.reduced_formula,
             formula_anonymous=structure.composition.anonymized_formula,
@@ -1,5 +1,7 @@
 # -*- coding: utf-8 -*-
 
+import json
+
 import pytest
 
 from simmate.website.test_app.models import TestDatabaseTable
@@ -25,6 +27,25 @@ def test_to_dataframe():
     TestDatabaseTable.objects.to_dataframe()
 
 
+@pytest.mark.django_db
+def test_iter_dataframe_chunks():
+    for i in range(5):
+        TestDatabaseTable(column1=True, column2=float(i)).save()
+
+    chunks = list(
+        TestDatabaseTable.objects.iter_dataframe_chunks(
+            columns=["id", "column1", "column2"],
+            chunk_size=2,
+        )
+    )
+    assert [len(df) for df in chunks] == [2, 2, 1]
+    for df in chunks:
+        assert list(df.columns) == ["id", "column1", "column2"]
+        assert str(df["id"].dtype) == "Int64"
+        assert str(df["column1"].dtype) == "boolean"
+        assert str(df["column2"].dtype) == "float64"
+
+
 @pytest.mark.django_db
 def test_to_toolkit():
     with pytest.raises(Exception):
@@ -42,6 +63,128 @@ def test_from_toolkit():
     assert isinstance(y, dict)
 
 
+@pytest.mark.django_db
+def test_bulk_from_toolkit():
+    entries = [dict(column1=True, column2=float(i)) for i in range(5)]
+    objs = TestDatabaseTable.bulk_from_toolkit(entries, batch_size=2)
+    assert len(objs) == 5
+    assert TestDatabaseTable.objects.count() == 5
+    assert sorted(TestDatabaseTable.objects.values_list("column2", flat=True)) == [
+        0.0,
+        1.0,
+        2.0,
+        3.0,
+        4.0,
+    ]
+
+
+def _double_column2(entries):
+    return [entry.column2 * 2 for entry in entries]
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize("nprocesses", [1, 2])
+def test_backfill_column(tmp_path, nprocesses):
+    for i in range(7):
+        TestDatabaseTable(column1=bool(i % 2), column2=float(i)).save()
+    ids = list(TestDatabaseTable.objects.order_by("id").values_list("id", flat=True))
+    checkpoint_filename = tmp_path / "checkpoint.json"
+
+    # pretend the first partition (the first two matching rows) was completed
+    # by an earlier run
+    checkpoint_filename.write_text(
+        json.dumps(
+            {
+                "partition_size": 2,
+                "partition_starts": [ids[1], ids[5]],
+                "completed": [0],
+            }
+        )
+    )
+    skipped_ids = [ids[1], ids[3]]
+
+    nupdated = TestDatabaseTable.backfill_column(
+        column_name="column2",
+        update_function=_double_column2,
+        filters=dict(column1=True),
+        partition_size=2,
+        nprocesses=nprocesses,
+        checkpoint_filename=checkpoint_filename,
+    )
+
+    expected = {
+        id: float(i) * 2 if i % 2 and id not in skipped_ids else float(i)
+        for i, id in enumerate(ids)
+    }
+    assert nupdated == sum(1 for i, id in enumerate(ids) if expected[id] != i)
+    assert dict(TestDatabaseTable.objects.values_list("id", "column2")) == expected
+    assert not checkpoint_filename.exists()
+
+    # without a checkpoint, every matching row is updated
+    nupdated = TestDatabaseTable.backfill_column(
+        column_name="column2",
+        update_function=_double_column2,
+        filters=dict(column1=False),
+        partition_size=3,
+        nprocesses=nprocesses,
+        checkpoint_filename=checkpoint_filename,
+    )
+    assert nupdated == 4
+    for i, id in enumerate(ids):
+        if not i % 2:
+            expected[id] = float(i) * 2
+    assert dict(TestDatabaseTable.objects.values_list("id", "column2")) == expected
+
+    # a mismatched partition size can't continue an existing checkpoint
+    checkpoint_filename.write_text(
+        json.dumps({"partition_size": 3, "partition_starts": [], "completed": []})
+    )
+    with pytest.raises(Exception):
+        TestDatabaseTable.backfill_column(
+            column_name="column2",
+            update_function=_double_column2,
+            partition_size=5,
+            checkpoint_filename=checkpoint_filename,
+        )
+
+
+@pytest.mark.django_db
+def test_load_remote_archive(tmp_path, local_file_server, monkeypatch):
+    for i in range(3):
+        TestDatabaseTable(column1=True, column2=float(i)).save()
+    archive_filename = local_file_server.directory / "TestDatabaseTable-2022-02-08.zip"
+    TestDatabaseTable.objects.to_archive(archive_filename)
+    TestDatabaseTable.objects.all().delete()
+    link = f"{local_file_server.url}/{archive_filename.name}"
+
+    TestDatabaseTable.load_remote_archive(link, cache_directory=tmp_path)
+    assert TestDatabaseTable.objects.count() == 3
+    assert local_file_server.range_requests == [None]
+
+    # the same archive is not downloaded or loaded again
+    def fail_load_archive(*args, **kwargs):
+        raise Exception("This archive was already loaded")
+
+    monkeypatch.setattr(TestDatabaseTable, "load_archive", fail_load_archive)
+    TestDatabaseTable.load_remote_archive(link, cache_directory=tmp_path)
+    assert local_file_server.range_requests == [None]
+
+    # unless a reload is forced, which still needs the override confirmed
+    with pytest.raises(Exception, match="already loaded"):
+        TestDatabaseTable.load_remote_archive(
+            link,
+            cache_directory=tmp_path,
+            confirm_override=True,
+            force_reload=True,
+        )
+    with pytest.raises(Exception, match="confirm_override"):
+        TestDatabaseTable.load_remote_archive(
+            link,
+            cache_directory=tmp_path,
+            force_reload=True,
+        )
+
+
 @pytest.mark.django_db
 def test_archive():
     # BUG: This test does not save archives within a tmp_path -- but instead the
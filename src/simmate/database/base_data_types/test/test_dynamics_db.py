@@ -1,9 +1,14 @@
 # -*- coding: utf-8 -*-
 
+import numpy
 import pytest
 from pandas import DataFrame
 
-from simmate.database.base_data_types import Dynamics, DynamicsIonicStep
+from simmate.database.base_data_types import (
+    Dynamics,
+    DynamicsIonicStep,
+    DynamicsTrajectory,
+)
 from simmate.toolkit import Structure
 
 # from pymatgen.io.vasp.outputs import Vasprun
@@ -44,3 +49,81 @@ def test_static_energy_table(structure):
     structures = Dynamics.objects.to_toolkit()
     assert isinstance(structures, list)
     assert isinstance(structures[0], Structure)
+
+
+@pytest.mark.django_db
+def test_dynamics_trajectory(structure):
+    dynamics_db = Dynamics.from_run_context(
+        run_id="example-id-456",
+        workflow_name="example.test.workflow",
+        workflow_version="1.2.3",
+        structure=structure,
+    )
+    dynamics_db.save()
+
+    # make a fake trajectory where each frame is slightly strained
+    nframes = 25
+    structures = []
+    for frame in range(nframes):
+        new_structure = structure.copy()
+        new_structure.apply_strain(0.001 * frame)
+        structures.append(new_structure)
+    forces = numpy.random.random((nframes, len(structure), 3))
+
+    DynamicsTrajectory.from_frames(
+        structures=structures,
+        energies=[-1.0 * frame for frame in range(nframes)],
+        site_forces=forces,
+        lattice_stresses=numpy.zeros((nframes, 3, 3)),
+        frame_chunk_size=10,
+        dynamics_run=dynamics_db,
+    ).save()
+
+    trajectory = Dynamics.objects.get(id=dynamics_db.id).trajectory
+    assert trajectory.nframes == nframes
+
+    # slicing gives the same frames as the original data, including
+    # ranges that cross or skip chunks
+    for start, stop, step in [(None, None, None), (5, 15, None), (-3, None, None)]:
+        data = trajectory.get_frames(start, stop, step, arrays=["energies"])
+        expected = [-1.0 * frame for frame in range(nframes)][start:stop:step]
+        assert list(data["energies"]) == expected
+    data = trajectory.get_frames(step=12, arrays=["site_forces"])
+    assert numpy.allclose(data["site_forces"], forces[::12])
+    assert trajectory.get_frames(start=30)["positions"].shape == (0, len(structure), 3)
+
+    # convert only the requested frames
+    new_structures = trajectory.to_toolkit(start=20)
+    assert len(new_structures) == 5
+    assert new_structures[0] == structures[20]
+
+    atoms = trajectory.to_ase(stop=2)
+    assert len(atoms) == 2
+    assert atoms[1].get_potential_energy() == -1.0
+
+
+@pytest.mark.django_db
+def test_dynamics_trajectory_missing_values(structure):
+    # frames without forces or stresses (e.g. failed steps) are stored as NaN
+    # rather than giving ragged arrays
+    forces = numpy.random.random((len(structure), 3))
+    trajectory = DynamicsTrajectory.from_frames(
+        structures=[structure] * 3,
+        energies=[-1.0, None, -3.0],
+        site_forces=[forces, None, forces],
+        lattice_stresses=[None, numpy.eye(3), None],
+    )
+    data = trajectory.get_frames()
+    assert numpy.isnan(data["energies"][1])
+    assert data["site_forces"].shape == (3, len(structure), 3)
+    assert numpy.isnan(data["site_forces"][1]).all()
+    assert numpy.allclose(data["site_forces"][2], forces)
+    assert numpy.isnan(data["lattice_stresses"][[0, 2]]).all()
+    assert numpy.allclose(data["lattice_stresses"][1], numpy.eye(3))
+
+    # arrays without any values are not stored at all
+    trajectory = DynamicsTrajectory.from_frames(
+        structures=[structure] * 2,
+        site_forces=[None, None],
+    )
+    assert trajectory.array_names == ["positions", "lattices"]
@@ -0,0 +1,198 @@
+# -*- coding: utf-8 -*-
+
+import re
+
+import numpy
+import pytest
+from django.db import connection
+from django.utils import timezone
+
+from simmate.database.base_data_types import FingerprintPool
+from simmate.toolkit.validators.fingerprint import RdfFingerprint
+from simmate.website.test_app.models import TestStructure
+
+
+@pytest.fixture
+def fingerprint_pool(tmp_path, monkeypatch):
+    # keep the index file out of the user's config directory
+    monkeypatch.setattr(
+        FingerprintPool,
+        "similarity_index_filename",
+        property(lambda pool: tmp_path / f"pool-{pool.id}.npz"),
+    )
+    monkeypatch.setattr(FingerprintPool, "_similarity_indexes", {})
+
+    validator = RdfFingerprint(
+        cutoff=5,
+        structure_pool=TestStructure.objects.order_by("id").all(),
+        use_database=True,
+    )
+    return validator.database_pool
+
+
+@pytest.mark.django_db
+def test_search_similar(fingerprint_pool):
+    structures = TestStructure.objects.order_by("id").all()
+    structure_db = structures.first()
+
+    # the closest structure is always itself
+    results = fingerprint_pool.search_similar(database_id=structure_db.id, k=3)
+    assert len(results) == 3
+    assert results[0] == {"database_id": structure_db.id, "distance": 0}
+    assert results[1]["distance"] <= results[2]["distance"]
+
+    # searching by structure gives the same results
+    results_structure = fingerprint_pool.search_similar(
+        structure=structure_db.to_toolkit(),
+        k=3,
+    )
+    assert [r["database_id"] for r in results_structure] == [
+        r["database_id"] for r in results
+    ]
+
+    # a radius between the 2nd and 3rd results should only give the first two
+    radius = (results[1]["distance"] + results[2]["distance"]) / 2
+    results_radius = fingerprint_pool.search_similar(
+        database_id=structure_db.id,
+        radius=radius,
+    )
+    assert results_radius == results[:2]
+
+    # the index is saved to disk and only new fingerprints are added to it
+    index = fingerprint_pool.get_similarity_index()
+    assert len(index) == structures.count()
+    assert fingerprint_pool.similarity_index_filename.exists()
+    fingerprint = fingerprint_pool.fingerprints.first()
+    fingerprint_pool.fingerprints.create(
+        database_id=123456,
+        fingerprint=fingerprint.fingerprint,
+    )
+    index = fingerprint_pool.get_similarity_index()
+    assert len(index) == structures.count() + 1
+    results = fingerprint_pool.search_similar(database_id=123456, k=2)
+    assert {r["database_id"] for r in results} == {fingerprint.database_id, 123456}
+
+
+@pytest.mark.django_db
+def test_parallel_fingerprint_pool(monkeypatch):
+    structures = TestStructure.objects.order_by("id").all()
+    monkeypatch.setattr(RdfFingerprint, "featurize_chunk_size", 3)
+
+    serial = RdfFingerprint(cutoff=5, structure_pool=structures, use_database=True)
+    # remove the saved fingerprints so they are recalculated
+    serial.database_pool.fingerprints.all().delete()
+    parallel = RdfFingerprint(
+        cutoff=5,
+        structure_pool=structures,
+        use_database=True,
+        nprocesses=2,
+    )
+
+    assert len(parallel.fingerprint_pool) == structures.count()
+    assert (parallel.fingerprint_pool.data == serial.fingerprint_pool.data).all()
+    assert parallel.source_pool == serial.source_pool
+    assert [s["database_id"] for s in parallel.source_pool] == list(
+        structures.values_list("id", flat=True)
+    )
+    assert parallel.database_pool.fingerprints.count() == structures.count()
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize("use_index", [False, True])
+def test_fingerprint_pool_partial_failure(monkeypatch, use_index):
+    structures = TestStructure.objects.order_by("id").all()
+    monkeypatch.setattr(RdfFingerprint, "featurize_chunk_size", 3)
+    validator = RdfFingerprint(
+        cutoff=5,
+        structure_pool=structures,
+        use_database=True,
+        use_index=use_index,
+    )
+    expected = validator.fingerprint_pool.data.copy()
+
+    # start over, but fail after the first chunk is added
+    validator.database_pool.fingerprints.all().delete()
+    validator._truncate_pool(0)
+    last_update = validator.last_update = timezone.make_aware(
+        timezone.datetime.min, timezone.get_default_timezone()
+    )
+    iter_chunks = RdfFingerprint._iter_fingerprint_chunks
+
+    def fail_after_first_chunk(self, ids):
+        chunks = iter_chunks(self, ids)
+        yield next(chunks)
+        raise Exception("featurization failed")
+
+    monkeypatch.setattr(
+        RdfFingerprint, "_iter_fingerprint_chunks", fail_after_first_chunk
+    )
+    with pytest.raises(Exception):
+        validator.update_fingerprint_pool()
+    assert len(validator.fingerprint_pool) == 0
+    assert validator.source_pool == []
+    assert validator.last_update == last_update
+    assert validator.database_pool.fingerprints.count() == 3
+
+    # the retry adds every structure exactly once
+    monkeypatch.setattr(RdfFingerprint, "_iter_fingerprint_chunks", iter_chunks)
+    validator.update_fingerprint_pool()
+    assert [s["database_id"] for s in validator.source_pool] == list(
+        structures.values_list("id", flat=True)
+    )
+    assert numpy.allclose(validator.fingerprint_pool.data, expected)
+    if use_index:
+        assert len(validator.fingerprint_index) == structures.count()
+
+
+@pytest.mark.django_db
+def test_fingerprint_cache(fingerprint_pool, monkeypatch):
+    structures = TestStructure.objects.order_by("id").all()
+    assert fingerprint_pool.fingerprints.count() == structures.count()
+    fingerprint_pool.get_similarity_index()
+    assert fingerprint_pool.similarity_index_filename.exists()
+
+    # the featurizer settings are the same, so saved fingerprints are reused
+    # even though the tolerance changed
+    def fail(*args, **kwargs):
+        raise Exception("fingerprints should not be recalculated")
+
+    monkeypatch.setattr(RdfFingerprint, "_iter_fingerprint_chunks", fail)
+    validator = RdfFingerprint(
+        cutoff=5,
+        distance_tolerance=0.1,
+        structure_pool=structures,
+        use_database=True,
+    )
+    assert validator.database_pool.id == fingerprint_pool.id
+    assert len(validator.fingerprint_pool) == structures.count()
+
+    # new featurizer settings give a new pool
+    monkeypatch.undo()
+    monkeypatch.setattr(FingerprintPool, "_similarity_indexes", {})
+    validator = RdfFingerprint(cutoff=4, structure_pool=structures, use_database=True)
+    assert validator.database_pool.id != fingerprint_pool.id
+    assert FingerprintPool.objects.filter(id=fingerprint_pool.id).exists()
+
+    # a new featurizer version deletes outdated fingerprints
+    monkeypatch.setattr(RdfFingerprint, "featurizer_version", "2")
+    validator = RdfFingerprint(cutoff=5, structure_pool=structures, use_database=True)
+    assert validator.database_pool.id != fingerprint_pool.id
+    assert validator.database_pool.featurizer_version == "2"
+    assert validator.database_pool.fingerprints.count() == structures.count()
+    assert not FingerprintPool.objects.filter(id=fingerprint_pool.id).exists()
+    assert not fingerprint_pool.similarity_index_filename.exists()
+
+
+@pytest.mark.django_db
+def test_similarity_index_key(fingerprint_pool):
+    # the key includes the database name, so pools with the same id in
+    # different databases don't share an index
+    key = fingerprint_pool.similarity_index_key
+    database_name = re.sub(r"\W+", "_", connection.settings_dict["NAME"]).strip("_")
+    assert key.startswith(f"{database_name}-pool-{fingerprint_pool.id}-")
+
+    # a recreated pool with the same id gets its own index
+    pool_copy = FingerprintPool.objects.get(id=fingerprint_pool.id)
+    assert pool_copy.similarity_index_key == key
+    pool_copy.created_at = pool_copy.created_at.replace(year=2000)
+    assert pool_copy.similarity_index_key != key
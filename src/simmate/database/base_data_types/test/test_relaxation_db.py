@@ -44,3 +44,57 @@ def test_relaxation_table(structure):
     structures = Relaxation.objects.to_toolkit()
     assert isinstance(structures, list)
     assert isinstance(structures[0], Structure)
+
+
+class FakeVasprun:
+    """
+    A stand-in for pymatgen's Vasprun with only the data that
+    `Relaxation.update_from_vasp_run` uses.
+    """
+
+    def __init__(self, structures, energies):
+        self.structures = structures
+        self.energies = energies
+
+    def as_dict(self):
+        ionic_steps = [
+            dict(
+                e_wo_entrp=energy,
+                forces=[[0, 0, 0]] * len(structure),
+                stress=[[0, 0, 0]] * 3,
+            )
+            for structure, energy in zip(self.structures, self.energies)
+        ]
+        return {"output": {"ionic_steps": ionic_steps}}
+
+
+@pytest.mark.django_db
+def test_relaxation_ionic_steps(sample_structures):
+    structure = sample_structures["NaCl_mp-22862_primitive"]
+    structures = []
+    for step in range(4):
+        new_structure = structure.copy()
+        new_structure.apply_strain(0.01 * step)
+        structures.append(new_structure)
+
+    relaxation = Relaxation.from_run_context(
+        run_id="example-id-456",
+        workflow_name="example.test.workflow",
+        workflow_version="1.2.3",
+        structure=structure,
+    )
+    relaxation.save()
+
+    # the run was cut short, so there is one less energy than structures
+    relaxation.update_from_vasp_run(FakeVasprun(structures, [-1, -2, -3]))
+    relaxation.save()
+    relaxation = Relaxation.objects.get(id=relaxation.id)
+
+    steps = relaxation.structures.order_by("number")
+    assert [step.number for step in steps] == [0, 1, 2]
+    assert relaxation.structure_start_id == steps[0].id
+    assert relaxation.structure_final_id == steps[2].id
+    assert relaxation.energy == -3
+
+    # only the start and final steps are analyzed for symmetry by default
+    assert [step.spacegroup_id is not None for step in steps] == [True, False, True]
@@ -1,5 +1,8 @@
 # -*- coding: utf-8 -*-
 
+import io
+import json
+
 import pytest
 from pandas import DataFrame
 
@@ -26,6 +29,27 @@ def test_structure_table(structure):
     assert structure == structure_new
 
 
+@pytest.mark.django_db
+def test_structure_bulk_from_toolkit(sample_structures):
+    structures = list(sample_structures.values())[:3]
+    entries = TestStructure.bulk_from_toolkit(
+        [
+            dict(structure=structure, include_symmetry=number != 1)
+            for number, structure in enumerate(structures)
+        ]
+    )
+    entries = TestStructure.objects.filter(id__in=[e.id for e in entries])
+    spacegroups = dict(entries.values_list("formula_full", "spacegroup_id"))
+
+    # the symmetry analysis is skipped when include_symmetry=False
+    for number, structure in enumerate(structures):
+        spacegroup = spacegroups[structure.composition.formula]
+        if number == 1:
+            assert spacegroup is None
+        else:
+            assert spacegroup == structure.get_space_group_info(symprec=0.1)[1]
+
+
 @pytest.mark.django_db
 def test_structure_queries():
     # test converting search results to dataframe and to toolkit
@@ -36,6 +60,12 @@ def test_structure_queries():
     assert isinstance(structures, list)
     assert isinstance(structures[0], Structure)
 
+    # test the batched conversion gives the same structures in the same order
+    batches = list(TestStructure.objects.iter_toolkit_batches(chunk_size=2))
+    assert all(len(batch) <= 2 for batch in batches)
+    structures_batched = [s for batch in batches for s in batch]
+    assert structures_batched == structures
+
 
 @pytest.mark.django_db
 def test_structure_archives():
@@ -44,3 +74,133 @@ def test_structure_archives():
         confirm_override=True,
         delete_on_completion=True,
     )
+
+
+@pytest.mark.django_db
+def test_structure_element_filters():
+    all_entries = list(TestStructure.objects.values_list("id", "elements"))
+
+    def get_expected_ids(check):
+        return {i for i, elements in all_entries if check(set(elements))}
+
+    # subset of a chemical system
+    query = TestStructure.objects.filter_elements_subset("Si-O-N")
+    assert set(query.values_list("id", flat=True)) == get_expected_ids(
+        lambda e: e.issubset({"Si", "O", "N"})
+    )
+    assert query.exists()
+
+    # contains all elements
+    query = TestStructure.objects.filter_elements_contains_all(["Si", "O"])
+    assert set(query.values_list("id", flat=True)) == get_expected_ids(
+        lambda e: e.issuperset({"Si", "O"})
+    )
+    assert query.exists()
+
+    # contains any of the elements
+    query = TestStructure.objects.filter_elements_contains_any(["Fe", "Na"])
+    assert set(query.values_list("id", flat=True)) == get_expected_ids(
+        lambda e: bool(e.intersection({"Fe", "Na"}))
+    )
+    assert query.exists()
+
+    # elements with Z > 63 are stored in the second mask
+    assert TestStructure.get_elements_mask(["U", "H"]) == (1, 1 << (92 - 64))
+
+    # rows without masks (e.g. from before the columns were added) are not
+    # matched until their masks are filled in by update_all_elements_masks
+    null_ids = [i for i, _ in all_entries[::2]]
+    TestStructure.objects.filter(id__in=null_ids).update(
+        elements_mask_low=None,
+        elements_mask_high=None,
+    )
+    checks = [
+        ("filter_elements_subset", "Si-O-N", lambda e: e.issubset({"Si", "O", "N"})),
+        ("filter_elements_contains_all", ["Si", "O"], lambda e: e >= {"Si", "O"}),
+        ("filter_elements_contains_any", ["Fe", "Na"], lambda e: e & {"Fe", "Na"}),
+    ]
+    for method, elements, check in checks:
+        query = getattr(TestStructure.objects, method)(elements)
+        ids = set(query.values_list("id", flat=True))
+        assert ids == get_expected_ids(check) - set(null_ids)
+
+    TestStructure.update_all_elements_masks()
+    for method, elements, check in checks:
+        query = getattr(TestStructure.objects, method)(elements)
+        assert set(query.values_list("id", flat=True)) == get_expected_ids(check)
+    assert not TestStructure.objects.filter(elements_mask_low__isnull=True).exists()
+
+
+@pytest.mark.django_db
+def test_structure_remove_duplicates():
+    original_ids = list(TestStructure.objects.values_list("id", flat=True))
+
+    # add copies of a couple structures
+    copy_ids = []
+    for structure_db in TestStructure.objects.order_by("id")[:2]:
+        copy = TestStructure.from_toolkit(structure=structure_db.to_toolkit())
+        copy.save()
+        copy_ids.append(copy.id)
+
+    # copies are removed, keeping the lowest id. Only a sorted list of ids
+    # is returned, so no query is made with all of them at once.
+    unique_ids = TestStructure.objects.remove_duplicates(
+        validator_name="RdfFingerprint",
+        order_by=None,
+        cutoff=5,
+    )
+    assert isinstance(unique_ids, list)
+    assert unique_ids == sorted(unique_ids)
+    assert set(unique_ids).issubset(original_ids)
+    assert not set(unique_ids).intersection(copy_ids)
+
+    # the order_by column picks which duplicate is kept
+    unique_ids_reversed = TestStructure.objects.remove_duplicates(
+        validator_name="RdfFingerprint",
+        order_by="-id",
+        cutoff=5,
+    )
+    assert set(copy_ids).issubset(unique_ids_reversed)
+    assert len(unique_ids_reversed) == len(unique_ids)
+
+    # filters on the search results limit which structures are compared
+    unique_ids_filtered = TestStructure.objects.filter(
+        id__in=original_ids
+    ).remove_duplicates(
+        validator_name="RdfFingerprint",
+        order_by=None,
+        cutoff=5,
+    )
+    assert unique_ids_filtered == unique_ids
+
+
+@pytest.mark.django_db
+def test_structure_parquet(tmp_path):
+    pyarrow_parquet = pytest.importorskip("pyarrow.parquet")
+
+    # make sure the first chunk only has missing values for some columns
+    queryset = TestStructure.objects.order_by("id")
+    first_ids = list(queryset.values_list("id", flat=True)[:2])
+    TestStructure.objects.filter(id__in=first_ids).update(density=None, elements=None)
+
+    columns = ["id", "elements", "density", "chemical_system", "spacegroup__symbol"]
+    expected = list(queryset.values_list(*columns))
+
+    def check_table(table):
+        assert table.column_names == columns
+        assert str(table.schema.field("density").type) == "double"
+        assert str(table.schema.field("elements").type) == "string"
+        rows = list(zip(*[table.column(c).to_pylist() for c in columns]))
+        assert len(rows) == len(expected)
+        for row, expected_row in zip(rows, expected):
+            # JSON columns are written as strings, while others are unchanged
+            row = list(row)
+            row[1] = json.loads(row[1]) if row[1] is not None else None
+            assert row == list(expected_row)
+
+    filename = tmp_path / "export.parquet"
+    queryset.to_parquet(filename, columns=columns, chunk_size=2)
+    check_table(pyarrow_parquet.read_table(filename))
+
+    data = b"".join(queryset.iter_parquet_bytes(columns=columns, chunk_size=2))
+    check_table(pyarrow_parquet.read_table(io.BytesIO(data)))
@@ -40,3 +40,70 @@ def test_thermo_table(structure, tmp_path):
         confirm_override=True,
         delete_on_completion=True,
     )
+
+
+@pytest.mark.django_db
+def test_phase_diagram_cache(sample_structures, phase_diagram_cache):
+    structure = sample_structures["C_mp-48_primitive"]
+    for energy in [-1, -2]:
+        TestThermodynamics.from_toolkit(structure=structure, energy=energy).save()
+
+    # the second call is loaded from the cache
+    phase_diagram = TestThermodynamics.get_phase_diagram("C")
+    assert TestThermodynamics.get_phase_diagram("C") is phase_diagram
+    cache_directory = phase_diagram_cache / TestThermodynamics.table_name
+    assert len(list(cache_directory.iterdir())) == 1
+
+    # the cache is also kept on disk
+    TestThermodynamics._phase_diagram_cache.clear()
+    phase_diagram = TestThermodynamics.get_phase_diagram("C")
+    assert len(phase_diagram.all_entries) == 2
+
+    # adding rows or changing energies gives a new phase diagram
+    TestThermodynamics.from_toolkit(structure=structure, energy=-3).save()
+    phase_diagram = TestThermodynamics.get_phase_diagram("C")
+    assert len(phase_diagram.all_entries) == 3
+    TestThermodynamics.objects.filter(energy=-3).update(energy=-30)
+    phase_diagram = TestThermodynamics.get_phase_diagram("C")
+    assert min(e.energy for e in phase_diagram.all_entries) == -30
+
+    # this includes energies that are swapped between rows, which doesn't
+    # change the total energy
+    entry1, entry2 = TestThermodynamics.objects.order_by("id")[:2]
+    TestThermodynamics.objects.filter(id=entry1.id).update(energy=entry2.energy)
+    TestThermodynamics.objects.filter(id=entry2.id).update(energy=entry1.energy)
+    phase_diagram = TestThermodynamics.get_phase_diagram("C")
+    energies = {e.entry_id: e.energy for e in phase_diagram.all_entries}
+    assert energies[f"id={entry1.id}"] == entry2.energy
+
+    # updating stabilities doesn't change the cached diagram
+    TestThermodynamics.update_chemical_system_stabilities("C")
+    assert TestThermodynamics.get_phase_diagram("C") is phase_diagram
+
+
+@pytest.mark.django_db
+def test_phase_diagram_cache_limits(
+    sample_structures, phase_diagram_cache, monkeypatch
+):
+    monkeypatch.setattr(TestThermodynamics, "phase_diagram_cache_size", 2)
+    monkeypatch.setattr(TestThermodynamics, "phase_diagram_cache_files", 2)
+
+    chemical_systems = []
+    for name in ["C_mp-48_primitive", "Fe_mp-13_primitive", "Si_mp-149_primitive"]:
+        structure = sample_structures[name]
+        TestThermodynamics.from_toolkit(structure=structure, energy=-1).save()
+        chemical_systems.append(structure.composition.chemical_system)
+
+    for chemical_system in chemical_systems:
+        TestThermodynamics.get_phase_diagram(chemical_system)
+        # using the first diagram again makes it the most recently used
+        TestThermodynamics.get_phase_diagram(chemical_systems[0])
+
+    # the least recently used diagram is removed from memory and the oldest
+    # file is removed from disk
+    cached_systems = [
+        key.split("|")[-1] for key in TestThermodynamics._phase_diagram_cache.keys()
+    ]
+    assert cached_systems == [chemical_systems[2], chemical_systems[0]]
+    cache_directory = phase_diagram_cache / TestThermodynamics.table_name
+    assert len(list(cache_directory.glob("*.pkl"))) == 2
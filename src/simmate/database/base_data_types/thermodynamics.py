@@ -1,13 +1,20 @@
 # -*- coding: utf-8 -*-
 
+import hashlib
 import logging
+import os
+import pickle
+import shutil
 import warnings
+from pathlib import Path
 
+from django.db.models import Count, F, Max, Sum
 from rich.progress import track
 
+from simmate.configuration import settings
 from simmate.database.base_data_types import DatabaseTable, table_column
 from simmate.toolkit import Structure as ToolkitStructure
-from simmate.utilities import get_chemical_subsystems
+from simmate.utilities import get_chemical_subsystems, get_directory
 from simmate.visualization.plotting import PlotlyFigure
 
 # BUG: This prints a tqdm error so we silence it here.
@@ -183,13 +190,64 @@ class Thermodynamics(DatabaseTable):
             except ValueError as exception:
                 logging.warning(f"Failed for {chemical_system} with error: {exception}")
 
+    _phase_diagram_cache: dict = {}
+    # Phase diagrams that were already loaded in this python session. The
+    # keys are from `_get_phase_diagram_cache_key` and values are a tuple of
+    # (version, phase_diagram). See `get_phase_diagram` for more info.
+
+    phase_diagram_cache_size: int = 100
+    """
+    The maximum number of phase diagrams to keep in memory. The least recently
+    used diagrams are removed first.
+    """
+
+    phase_diagram_cache_files: int = 1000
+    """
+    The maximum number of phase diagrams to keep on disk for each table. The
+    oldest files are removed first.
+    """
+
     @classmethod
     def get_phase_diagram(
         cls,
         chemical_system: str,
         workflow_name: str = None,
         return_entries: bool = False,
+        use_cache: bool = True,
     ) -> PhaseDiagram:
+        """
+        Builds the phase diagram (convex hull) for a chemical system using all
+        completed entries of this table.
+
+        Phase diagrams are cached in memory and on disk (in the simmate config
+        directory). Each cached diagram is stored with a "version" of the rows
+        it was built from -- the row count, latest id, latest update time, total
+        energy, and an id-weighted total energy for the chemical system and all
+        of its subsystems. The version is checked with a single aggregate query
+        on each call, so rows that are added, deleted, or saved automatically
+        lead to a rebuild. The weighted energy also catches energies that are
+        changed (or swapped between rows) with `update()`, which doesn't set
+        `updated_at`. Other columns (such as `formula_full`) that are changed
+        with `update()` are not detected, so you should call
+        `clear_phase_diagram_cache` after doing this.
+
+        #### Parameters
+
+        - `chemical_system`:
+            The chemical system to build the hull for (e.g. "Y-C-F")
+
+        - `workflow_name`:
+            Only use entries from this workflow. This is required if the
+            table stores results from multiple workflows.
+
+        - `return_entries`:
+            Whether to also return the database entries and pymatgen PDEntries
+            that the phase diagram was built with. The entries are always
+            loaded from the database, even when the phase diagram is cached.
+
+        - `use_cache`:
+            Whether to use (and update) the phase diagram cache. Defaults to True.
+        """
         if workflow_name is None and hasattr(cls, "workflow_name"):
             raise Exception(
                 "This table contains results from multiple workflows, so you must "
@@ -211,6 +269,21 @@ class Thermodynamics(DatabaseTable):
         if workflow_name:
             entries = entries.filter(workflow_name=workflow_name)
 
+        if use_cache:
+            cache_key = cls._get_phase_diagram_cache_key(chemical_system, workflow_name)
+            version = entries.aggregate(
+                count=Count("id"),
+                max_id=Max("id"),
+                updated_at=Max("updated_at"),
+                total_energy=Sum("energy"),
+                weighted_energy=Sum(F("id") * F("energy")),
+            )
+            phase_diagram = cls._load_cached_phase_diagram(cache_key, version)
+            if phase_diagram and not return_entries:
+                return phase_diagram
+        else:
+            phase_diagram = None
+
         # now make the queryy
         entries = entries.only("id", "energy", "formula_full").all()
 
@@ -228,7 +301,11 @@ class Thermodynamics(DatabaseTable):
             pde.entry_id = f"id={entry.id}"
             entries_pmg.append(pde)
 
-        phase_diagram = PhaseDiagram(entries_pmg)
+        # only build the hull if we don't have a cached one
+        if not phase_diagram:
+            phase_diagram = PhaseDiagram(entries_pmg)
+            if use_cache:
+                cls._save_cached_phase_diagram(cache_key, version, phase_diagram)
 
         return (
             phase_diagram
@@ -240,6 +317,93 @@ class Thermodynamics(DatabaseTable):
             )
         )
 
+    @classmethod
+    def _get_phase_diagram_cache_key(
+        cls,
+        chemical_system: str,
+        workflow_name: str = None,
+    ) -> str:
+        # the order of elements doesn't matter (e.g. "C-Y" and "Y-C" are the same)
+        chemical_system = "-".join(sorted(chemical_system.split("-")))
+        return "|".join(
+            [
+                str(settings.database.name),
+                cls.table_name,
+                workflow_name or "",
+                chemical_system,
+            ]
+        )
+
+    @classmethod
+    def _get_phase_diagram_cache_directory(cls) -> Path:
+        return settings.config_directory / "phase_diagrams" / cls.table_name
+
+    @classmethod
+    def _get_phase_diagram_cache_filename(cls, cache_key: str) -> Path:
+        directory = get_directory(cls._get_phase_diagram_cache_directory())
+        return directory / f"{hashlib.sha256(cache_key.encode()).hexdigest()}.pkl"
+
+    @classmethod
+    def _load_cached_phase_diagram(cls, cache_key: str, version: dict):
+        # check memory first, and then the disk
+        cached = cls._phase_diagram_cache.get(cache_key)
+        if not cached or cached[0] != version:
+            filename = cls._get_phase_diagram_cache_filename(cache_key)
+            if not filename.exists():
+                return
+            with filename.open("rb") as file:
+                cached = pickle.load(file)
+        cls._add_to_phase_diagram_cache(cache_key, cached)
+
+        cached_version, phase_diagram = cached
+        return phase_diagram if cached_version == version else None
+
+    @classmethod
+    def _save_cached_phase_diagram(
+        cls,
+        cache_key: str,
+        version: dict,
+        phase_diagram: PhaseDiagram,
+    ):
+        cls._add_to_phase_diagram_cache(cache_key, (version, phase_diagram))
+        # write to a temporary file first so that other processes never read
+        # a partially written file
+        filename = cls._get_phase_diagram_cache_filename(cache_key)
+        temp_filename = filename.with_suffix(f".{os.getpid()}.tmp")
+        with temp_filename.open("wb") as file:
+            pickle.dump((version, phase_diagram), file)
+        os.replace(temp_filename, filename)
+
+        # remove the oldest files if there are too many
+        filenames = sorted(
+            filename.parent.glob("*.pkl"),
+            key=lambda f: f.stat().st_mtime_ns,
+        )
+        for old_filename in filenames[: -cls.phase_diagram_cache_files]:
+            old_filename.unlink(missing_ok=True)
+
+    @classmethod
+    def _add_to_phase_diagram_cache(cls, cache_key: str, cached: tuple):
+        # dictionaries keep their insertion order, so we move this entry to the
+        # end and then remove the least recently used entries from the start
+        cls._phase_diagram_cache.pop(cache_key, None)
+        cls._phase_diagram_cache[cache_key] = cached
+        while len(cls._phase_diagram_cache) > cls.phase_diagram_cache_size:
+            cls._phase_diagram_cache.pop(next(iter(cls._phase_diagram_cache)))
+
+    @classmethod
+    def clear_phase_diagram_cache(cls):
+        """
+        Removes all cached phase diagrams for this table. This is typically not
+        needed, as cached phase diagrams are automatically rebuilt when rows
+        are added or changed. See `get_phase_diagram` for more info.
+        """
+        for cache_key in list(cls._phase_diagram_cache.keys()):
+            if cache_key.split("|")[1] == cls.table_name:
+                cls._phase_diagram_cache.pop(cache_key)
+        directory = cls._get_phase_diagram_cache_directory()
+        shutil.rmtree(directory, ignore_errors=True)
+
 
 class HullDiagram(PlotlyFigure):
     method_type = "classmethod"
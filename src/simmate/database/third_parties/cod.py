@@ -1,5 +1,7 @@
 # -*- coding: utf-8 -*-
 
+import signal
+from contextlib import contextmanager
 from pathlib import Path
 
 from simmate.database.base_data_types import Structure, table_column
@@ -74,8 +76,10 @@ class CodStructure(Structure):
         cls,
         base_directory: str | Path = "cod/cif/",
         only_add_new_cifs: bool = True,
-        batch_size: int = 15000,
-        batch_timeout: float = 30 * 60,
+        batch_size: int = 5000,
+        nprocesses: int = None,
+        manifest_filename: str | Path = None,
+        cif_timeout: float = 5 * 60,
     ):
         """
         Only use this function if you are part of the Simmate dev team!
@@ -92,6 +96,34 @@ class CodStructure(Structure):
         [COD archive]([here](http://www.crystallography.net/archives/))
         and have it upacked to match your base_directory input.
 
+        #### Parameters
+
+        - `base_directory`:
+            The folder of the unpacked COD archive, which contains the
+            numbered folders of cif files.
+
+        - `only_add_new_cifs`:
+            Whether to skip cifs that have not changed since the last time this
+            method was called (see the manifest below). If False, every cif is
+            parsed and saved again.
+
+        - `batch_size`:
+            The number of cifs to parse before saving them to the database
+            and updating the manifest.
+
+        - `nprocesses`:
+            The number of processes used to parse cifs. Defaults to the number
+            of cpus available.
+
+        - `manifest_filename`:
+            Where to keep track of which cifs were already loaded. Defaults to
+            `simmate_manifest.json` in the `base_directory`.
+
+        - `cif_timeout`:
+            The maximum time (in seconds) to spend on a single cif. Cifs that
+            take longer are skipped, as they are typically problematic.
+            Defaults to 5 minutes.
+
         --- extra notes
 
         The COD let's you download all of their data as a zip file
@@ -110,77 +142,192 @@ class CodStructure(Structure):
         Note that some folders also don't have any cifs in them! There is also
         extra data in each cif file -- such as the doi of the paper it came from.
 
+        To update the database with a newer COD archive, unpack the archive
+        to the same directory and call this method again. A manifest of every
+        cif file's modified time, size, and content hash is kept so that only
+        new or changed cifs are parsed. The manifest is saved after each batch,
+        so if this method crashes, calling it again continues where it left off.
+
         There looks to be a lot of problematic cif files in the COD, but it's
         not worth parsing through all of these. Instead, I simply try to load
-        the cif file into a pymatgen Structure object, and if it fails, I just
-        move on. I'm slowly adding functionality to account for these problematic
-        cif files though.
+        the cif file into a pymatgen Structure object, and if it fails (or
+        takes longer than `cif_timeout`), I log the error and move on. I'm
+        slowly adding functionality to account for these problematic
+        cif files though. These failed cifs are also recorded in the manifest,
+        so they are only retried if the file changes. If a cif that was loaded
+        before is changed and now fails, its old database entry is removed.
         """
+        import json
+        import logging
+        import os
+        from concurrent.futures import ProcessPoolExecutor
+
+        from django.db import transaction
         from rich.progress import track
 
-        from simmate.configuration.dask import batch_submit
+        from simmate.utilities import chunk_list
 
         base_directory = Path(base_directory)
-
-        # We need to look at all the folders that have numbered-names (1,2,3..,9).
-        # and grab the folder inside that are also numbers. This continues until
-        # we find cif files that we can pull structures from. Note the name of
-        # the cif file is also the cod-id.
-        all_cifs = []
-        for folder_name1 in base_directory.iterdir():
-            # skip if the folder name isn't a number
-            if not folder_name1.stem.isnumeric():
-                continue
-            # otherwise go through the folders inside of this one
-            for folder_name2 in folder_name1.iterdir():
-                # and then one more level until we hit the cifs!
-                for folder_name3 in folder_name2.iterdir():
-                    # we now have all the main foldername we need and
-                    # can go through each cif file in this directory
-                    for cif_filename in folder_name3.iterdir():
-                        all_cifs.append(cif_filename)
-
-        # Sometimes we are retrying this function call from a previously failed
-        # run. In that case, we only want to run the cifs that haven't been loaded
-        # yet. We iterate throught the cif ids and select which ones aren't in
-        # the database yet.
-        if only_add_new_cifs:
-            print("Removing existing cifs from to-do list...")
-            new_cifs = []
-            existing_ids = list(cls.objects.values_list("id", flat=True).all())
-            for cif_filepath in track(all_cifs):
-                cif_id = "cod-" + cif_filepath.stem
-                if cif_id not in existing_ids:
-                    new_cifs.append(cif_filepath)
-            # replace our all_cifs with this updated list
-            all_cifs = new_cifs
-            print(f"Adding {len(all_cifs)} new entries...")
-
-        # We run this function in parallel using Dask.
-        # Dask seems to be unstable when we submit too much at once, so we chunk
-        # our submissions and wait for each to finished before submitting more.
-        # We only wait for all futures to complete in 30 min, and beyond that
-        # point, cancel any remaining. 30 min is plenty for a batch of
-        # 15,000 cifs. If this limit is ever hit, it's typically because a
-        # single cif is taking >15min and is problematic.
-        batch_submit(
-            function=cls._load_single_cif,
-            args_list=all_cifs,
-            batch_size=batch_size,
-            batch_timeout=batch_timeout,
+        nprocesses = nprocesses or os.cpu_count()
+        if not manifest_filename:
+            manifest_filename = base_directory / "simmate_manifest.json"
+        manifest_filename = Path(manifest_filename)
+
+        # The manifest maps each cif's path (relative to the base directory) to
+        # [modified time, file size, sha256 hash, whether it was loaded]
+        manifest = {}
+        if only_add_new_cifs and manifest_filename.exists():
+            with manifest_filename.open() as file:
+                manifest = json.load(file)
+
+        # The cif files are organized into folders based on their first few
+        # numbers -- for example, the cif 1234567 would be in the folder
+        # /1/23/45/1234567.cif -- so we only look at that depth. Note the name
+        # of the cif file is also the cod-id.
+        all_cifs = sorted(base_directory.glob("[0-9]*/*/*/*.cif"))
+
+        # Sets give us fast lookups, even for hundreds of thousands of ids
+        existing_ids = (
+            set(cls.objects.values_list("id", flat=True))
+            if only_add_new_cifs
+            else set()
         )
 
+        # Figure out which cifs need to be (re)parsed. Cifs with the same
+        # modified time and size as the manifest are unchanged. Others are
+        # sent to be hashed, and only parsed if their content changed.
+        todo = []
+        for cif_filepath in track(all_cifs, description="Checking for changes..."):
+            key = cif_filepath.relative_to(base_directory).as_posix()
+            stats = cif_filepath.stat()
+            previous = manifest.get(key)
+            cif_id = "cod-" + cif_filepath.stem
+
+            if not previous:
+                todo.append((cif_filepath, None))
+            elif previous[3] and cif_id not in existing_ids:
+                # the cif was loaded before but is now missing from the database
+                todo.append((cif_filepath, None))
+            elif previous[:2] != [stats.st_mtime_ns, stats.st_size]:
+                todo.append((cif_filepath, previous[2]))
+
+        logging.info(f"Found {len(todo)} new or modified cifs out of {len(all_cifs)}")
+
+        def save_manifest():
+            # write to a temporary file first so a crash never leaves us with
+            # a partially written manifest
+            temp_filename = manifest_filename.with_suffix(".tmp")
+            with temp_filename.open("w") as file:
+                json.dump(manifest, file)
+            os.replace(temp_filename, manifest_filename)
+
+        with ProcessPoolExecutor(max_workers=nprocesses) as executor:
+            for batch in chunk_list(todo, chunk_size=batch_size):
+                cif_filepaths, previous_hashes = zip(*batch)
+                results = executor.map(
+                    cls._build_single_cif,
+                    cif_filepaths,
+                    previous_hashes,
+                    [cif_timeout] * len(batch),
+                    chunksize=max(len(batch) // (nprocesses * 4), 1),
+                )
+
+                new_entries = []
+                modified_ids = []
+                for cif_filepath, (file_hash, structure_db, is_modified) in zip(
+                    cif_filepaths, results
+                ):
+                    key = cif_filepath.relative_to(base_directory).as_posix()
+                    stats = cif_filepath.stat()
+                    if is_modified:
+                        modified_ids.append("cod-" + cif_filepath.stem)
+                        is_loaded = structure_db is not None
+                        if is_loaded:
+                            new_entries.append(structure_db)
+                    else:
+                        # only the modified time changed
+                        is_loaded = manifest[key][3]
+                    manifest[key] = [
+                        stats.st_mtime_ns,
+                        stats.st_size,
+                        file_hash,
+                        is_loaded,
+                    ]
+
+                # changed cifs replace their old database entry. If a changed
+                # cif now fails to load, its old (stale) entry is still removed.
+                with transaction.atomic():
+                    cls.objects.filter(id__in=modified_ids).delete()
+                    cls.objects.bulk_create(new_entries, batch_size=1000)
+                existing_ids.difference_update(modified_ids)
+                existing_ids.update(entry.id for entry in new_entries)
+
+                # the manifest is only updated once the batch is committed
+                save_manifest()
+                logging.info(f"Saved {len(new_entries)} entries to the database")
+
+        save_manifest()
+
+    @classmethod
+    def _build_single_cif(
+        cls,
+        cif_filepath: Path,
+        previous_hash: str = None,
+        timeout: float = None,
+    ) -> tuple[str, Structure, bool]:
+        """
+        Same as `_parse_single_cif`, but the entry is also converted to an
+        (unsaved) database object, which includes the symmetry analysis.
+
+        Any cif that raises an error or takes longer than `timeout` seconds is
+        logged and returned without a database object. This way, a single
+        problematic cif never stops the full import.
+
+        You typically shouldn't call this function directly. We make this a
+        separate function to allow parallelization in `_load_all_structures`.
+        """
+        import hashlib
+        import logging
+
+        try:
+            with _time_limit(timeout):
+                file_hash, entry_dict, is_modified = cls._parse_single_cif(
+                    cif_filepath,
+                    previous_hash,
+                )
+                if entry_dict is None:
+                    return file_hash, None, is_modified
+                return file_hash, cls.from_toolkit(**entry_dict), is_modified
+        except Exception as error:
+            logging.warning(f"Failed to load {cif_filepath}: {error!r}")
+            file_hash = hashlib.sha256(Path(cif_filepath).read_bytes()).hexdigest()
+            return file_hash, None, True
+
     @staticmethod
-    def _load_single_cif(cif_filepath: str):
+    def _parse_single_cif(
+        cif_filepath: Path,
+        previous_hash: str = None,
+    ) -> tuple[str, dict, bool]:
         """
-        Loads a single COD cif into the Simmate database.
+        Reads a single COD cif and returns a tuple of its content hash, the
+        entry data for `CodStructure.from_toolkit` (or None if the cif could
+        not be parsed), and whether the cif was modified.
+
+        If the content hash matches `previous_hash`, the cif is not parsed
+        and the entry is None.
 
         You typically shouldn't call this function directly. We make this a
-        separate function to allow parallelization in `load_all_structures`.
+        separate function to allow parallelization in `_load_all_structures`.
         """
+        import hashlib
 
         from pymatgen.io.cif import CifParser
 
+        cif_filepath = Path(cif_filepath)
+        file_hash = hashlib.sha256(cif_filepath.read_bytes()).hexdigest()
+        if file_hash == previous_hash:
+            return file_hash, None, False
+
         # Load the structure and extra data from the cif file.
         # Note, some occupancies are not scaled to sum to 1. For
         # example, a disordered site may have [Ca:1, Sr:1] instead of
@@ -207,7 +354,7 @@ class CodStructure(Structure):
             if error.args != ("Invalid cif file with no structures!",):
                 raise error
             # otherwise exit
-            return
+            return file_hash, None, True
 
         if (
             "Structure has implicit hydrogens defined, parsed structure"
@@ -233,6 +380,19 @@ class CodStructure(Structure):
             # "paper_title": data[key].get("_publ_section_title"),
         }
 
+        return file_hash, entry_dict, True
+
+    @staticmethod
+    def _load_single_cif(cif_filepath: str):
+        """
+        Loads a single COD cif into the Simmate database.
+
+        For loading many cifs, use `_load_all_structures` instead.
+        """
+        _, entry_dict, _ = CodStructure._parse_single_cif(cif_filepath)
+        if entry_dict is None:
+            return
+
         # now convert the entry to a database object
         structure_db = CodStructure.from_toolkit(**entry_dict)
 
@@ -753,3 +913,27 @@ class CodStructure(Structure):
             # "_citation_journal_id_ASTM",
             # "_database_code_amcsd",
         ]
+
+
+@contextmanager
+def _time_limit(seconds: float = None):
+    """
+    Raises a TimeoutError if the code inside this context takes longer than
+    the given number of seconds. This relies on alarm signals, so the limit
+    is skipped on platforms without them (e.g. Windows) or when `seconds`
+    is None.
+    """
+    if not seconds or not hasattr(signal, "SIGALRM"):
+        yield
+        return
+
+    def raise_timeout(signum, frame):
+        raise TimeoutError(f"Time limit of {seconds} seconds was exceeded")
+
+    previous_handler = signal.signal(signal.SIGALRM, raise_timeout)
+    signal.setitimer(signal.ITIMER_REAL, seconds)
+    try:
+        yield
+    finally:
+        signal.setitimer(signal.ITIMER_REAL, 0)
+        signal.signal(signal.SIGALRM, previous_handler)
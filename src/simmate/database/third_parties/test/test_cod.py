@@ -0,0 +1,92 @@
+# -*- coding: utf-8 -*-
+
+import json
+import time
+
+import pytest
+
+from simmate.database.third_parties import CodStructure
+
+
+def write_cifs(directory, cif_ids, structures):
+    # make a small copy of the COD folder layout (e.g. /1/23/45/1234567.cif)
+    cif_filenames = []
+    for cif_id, structure in zip(cif_ids, structures):
+        folder = directory / cif_id[0] / cif_id[1:3] / cif_id[3:5]
+        folder.mkdir(parents=True, exist_ok=True)
+        cif_filename = folder / f"{cif_id}.cif"
+        structure.to(filename=str(cif_filename), fmt="cif")
+        cif_filenames.append(cif_filename)
+    return cif_filenames
+
+
+@pytest.mark.django_db
+def test_load_all_structures(tmp_path, sample_structures):
+    cif_ids = ["1234567", "1234568", "2345678"]
+    structures = [
+        sample_structures["C_mp-48_primitive"],
+        sample_structures["Fe_mp-13_primitive"],
+        sample_structures["SiO2_mp-7029_primitive"],
+    ]
+    cif_filenames = write_cifs(tmp_path, cif_ids, structures)
+    # a cif that can't be parsed
+    bad_filename = tmp_path / "3" / "45" / "67" / "3456789.cif"
+    bad_filename.parent.mkdir(parents=True)
+    bad_filename.write_text("data_bad\n")
+
+    CodStructure._load_all_structures(tmp_path, nprocesses=2, batch_size=2)
+    assert set(CodStructure.objects.values_list("id", flat=True)) == {
+        f"cod-{cif_id}" for cif_id in cif_ids
+    }
+    manifest_filename = tmp_path / "simmate_manifest.json"
+    manifest = json.loads(manifest_filename.read_text())
+    assert len(manifest) == 4
+    assert manifest["3/45/67/3456789.cif"][3] is False
+
+    # nothing changed, so nothing should be parsed again
+    CodStructure.objects.filter(id="cod-1234567").update(is_ordered=False)
+    CodStructure._load_all_structures(tmp_path, nprocesses=2)
+    assert not CodStructure.objects.get(id="cod-1234567").is_ordered
+
+    # a changed cif replaces its entry and a missing entry is reloaded
+    structures[2].to(filename=str(cif_filenames[0]), fmt="cif")
+    CodStructure.objects.filter(id="cod-1234568").delete()
+    CodStructure._load_all_structures(tmp_path, nprocesses=2)
+    assert CodStructure.objects.count() == 3
+    assert CodStructure.objects.get(id="cod-1234567").formula_reduced == "SiO2"
+    assert CodStructure.objects.get(id="cod-1234568").is_ordered
+
+    # a changed cif that now fails to load removes its stale entry
+    cif_filenames[2].write_text("data_bad\n")
+    CodStructure._load_all_structures(tmp_path, nprocesses=2)
+    assert not CodStructure.objects.filter(id="cod-2345678").exists()
+    assert CodStructure.objects.count() == 2
+
+
+@pytest.mark.django_db
+def test_load_all_structures_failures(tmp_path, sample_structures, monkeypatch):
+    cif_ids = ["1234567", "1234568", "2345678"]
+    structures = [
+        sample_structures["C_mp-48_primitive"],
+        sample_structures["Fe_mp-13_primitive"],
+        sample_structures["SiO2_mp-7029_primitive"],
+    ]
+    write_cifs(tmp_path, cif_ids, structures)
+
+    # one cif raises an unexpected error and another never finishes. These
+    # are skipped (in the worker processes) without stopping the import.
+    parse_single_cif = CodStructure._parse_single_cif
+
+    def parse_with_failures(cif_filepath, previous_hash=None):
+        if cif_filepath.stem == "1234567":
+            raise RuntimeError("unexpected cif error")
+        elif cif_filepath.stem == "1234568":
+            time.sleep(60)
+        return parse_single_cif(cif_filepath, previous_hash)
+
+    monkeypatch.setattr(CodStructure, "_parse_single_cif", parse_with_failures)
+    CodStructure._load_all_structures(tmp_path, nprocesses=2, cif_timeout=1)
+    assert list(CodStructure.objects.values_list("id", flat=True)) == ["cod-2345678"]
+
+    manifest = json.loads((tmp_path / "simmate_manifest.json").read_text())
+    assert [manifest[key][3] for key in sorted(manifest)] == [False, False, True]
@@ -2,7 +2,6 @@
 
 import logging
 import shutil
-import urllib
 
 from simmate.configuration import settings
 from simmate.database.third_parties import (
@@ -12,7 +11,7 @@ from simmate.database.third_parties import (
     MatprojStructure,
     OqmdStructure,
 )
-from simmate.utilities import get_directory
+from simmate.utilities import get_cached_download, get_directory
 
 
 def load_remote_archives(**kwargs):
@@ -24,9 +23,11 @@ def load_remote_archives(**kwargs):
     Accepts the same parameters as the `load_remote_archive` method
 
     WARNING:
-    This can take several hours to run and there is no pause/continuation
-    implemented. This runs substantially faster when you are using a cloud
-    database backend (e.g. Postgres) and use `parallel=True`.
+    This can take several hours to run. Downloads are cached and resumed if
+    interrupted, and tables that were already loaded from the same archive
+    are skipped, so calling this again will continue where it left off. This
+    runs substantially faster when you are using a cloud database backend
+    (e.g. Postgres) and use `parallel=True`.
 
     If you are using SQLite, we highly recommend using `load_default_sqlite3_build`
     instead of this utility, which downloads a full database that was built using
@@ -67,25 +68,18 @@ def load_default_sqlite3_build():
     # check if the prebuild directory exists, and create it if not
     archive_dir = get_directory(settings.config_directory / "sqlite-prebuilds")
 
-    archive_filename_full = archive_dir / archive_filename
-
-    # check if the archive has been downloaded before. If not, download!
-    if not archive_filename_full.exists():
-        remote_archive_link = f"https://archives.simmate.org/{archive_filename}"
-        # Download the archive zip file from the URL to the current working dir
-        logging.info("Downloading database file...")
-        urllib.request.urlretrieve(remote_archive_link, archive_filename_full)
-        logging.info("Done downloading.")
-    else:
-        logging.info(
-            f"Found past download at {archive_filename_full}. Using archive as base."
-        )
+    # Download the archive (or use a verified copy from a past download)
+    remote_archive_link = f"https://archives.simmate.org/{archive_filename}"
+    archive_filename_full, _ = get_cached_download(
+        remote_archive_link,
+        directory=archive_dir,
+    )
 
     logging.info("Unpacking prebuilt to active database...")
     # uncompress the zip file to archive directory
     shutil.unpack_archive(
         archive_filename_full,
-        extract_dir=archive_dir,
+        extract_dir=archive_filename_full.parent,
     )
 
     # rename and move the sqlite file to be the new database
@@ -1,7 +1,9 @@
 # -*- coding: utf-8 -*-
 
+import io
 import logging
 
+import numpy
 from django.apps import apps
 from django.core.management import call_command
 from django.db.utils import DatabaseError
@@ -252,6 +254,73 @@ def load_database_from_json(filename: str = "database_dump.json"):
     )
 
 
+def pack_arrays(arrays: dict) -> bytes:
+    """
+    Converts a dictionary of numpy arrays into compressed bytes, which can be
+    stored in a `BinaryField` column. Compared to storing the same data as JSON
+    lists, this keeps the array types (e.g. float32), is much smaller, and is
+    much faster to load. Use `unpack_arrays` to convert the data back.
+    """
+    buffer = io.BytesIO()
+    numpy.savez_compressed(buffer, **arrays)
+    return buffer.getvalue()
+
+
+def unpack_arrays(data: bytes, keys: list[str] = None) -> dict:
+    """
+    Converts bytes made by `pack_arrays` back into a dictionary of numpy arrays.
+
+    #### Parameters
+
+    - `data`:
+        The bytes to convert (e.g. the value of a `BinaryField` column)
+
+    - `keys`:
+        The arrays to load. Each array is compressed separately, so only these
+        will be decompressed. By default, all arrays are loaded.
+    """
+    # Postgres gives a memoryview rather than bytes
+    with numpy.load(io.BytesIO(bytes(data)), allow_pickle=False) as file:
+        return {key: file[key] for key in (keys or file.files)}
+
+
+def downsample_array(array: numpy.ndarray, max_points: int, axis: int = -1):
+    """
+    Reduces the length of an array along one axis to at most `max_points`, by
+    averaging neighboring values together. This is meant for preparing data
+    for display (e.g. a plot of a density of states) where thousands of points
+    are more than what can be seen. Unlike taking every n-th point, averaging
+    doesn't skip over sharp peaks.
+    """
+    npoints = array.shape[axis]
+    if npoints <= max_points:
+        return array
+    bin_starts = numpy.linspace(0, npoints, max_points, endpoint=False).astype(int)
+    bin_sizes = numpy.diff(numpy.append(bin_starts, npoints))
+    bin_sums = numpy.add.reduceat(array, bin_starts, axis=axis)
+    shape = [1] * array.ndim
+    shape[axis] = max_points
+    return bin_sums / bin_sizes.reshape(shape)
+
+
+def get_downsample_indices(
+    npoints: int,
+    max_points: int,
+    keep: list[int] = [],
+) -> numpy.ndarray:
+    """
+    Gives evenly spaced indices for selecting at most `max_points` from an
+    array of length `npoints` (always including the first and last point).
+    Indices listed in `keep` are always included as well, which means the
+    final number of points can be slightly above `max_points`. This is useful
+    when certain points must be shown, such as high-symmetry k-points.
+    """
+    if npoints <= max_points:
+        return numpy.arange(npoints)
+    indices = numpy.linspace(0, npoints - 1, max_points).round().astype(int)
+    return numpy.union1d(indices, numpy.array(keep, dtype=int))
+
+
 # BUG: This function isn't working as intended
 # def graph_database(filename="database_graph.png"):
 #     # using django-extensions, we want to make an image of all the available
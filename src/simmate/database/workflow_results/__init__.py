@@ -6,6 +6,7 @@ from simmate.database.base_data_types import (
     DiffusionAnalysis,
     Dynamics,
     DynamicsIonicStep,
+    DynamicsTrajectory,
     IonicStep,
     MigrationHop,
     MigrationImage,
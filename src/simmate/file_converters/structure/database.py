@@ -111,6 +111,20 @@ class DatabaseAdapter:
         structures = [s.to_toolkit() for s in database_objects]
         return structures
 
+    @staticmethod
+    def get_toolkits_from_database_strings(
+        structure_strings: list[str],
+    ) -> list[ToolkitStructure]:
+        """
+        Loads a list of toolkit structures from a list of strings stored in
+        the 'structure' column. This is a top-level method (rather than a
+        lambda or local function) so that it can be sent to other processes.
+        """
+        return [
+            DatabaseAdapter.get_toolkit_from_database_string(structure_string)
+            for structure_string in structure_strings
+        ]
+
     @staticmethod
     def get_toolkit_from_database_object(
         structure_object: DatabaseStructure,
@@ -107,53 +107,61 @@ class StructureCreator(ABC):
         """
         pass
 
-    def create_structure_with_validation(self, validators=[], max_attempts=100):
+    def create_structure_with_validation(
+        self,
+        validators=[],
+        max_attempts=100,
+        batch_size: int = 1,
+    ):
         # While some structure creators go through validation while they are being
         # created (e.g. a site-distances check), there may be higher-level
         # validations that need to be done. I may need to rethink and refactor
         # the distinction between the two though.
 
         # Until we get a new valid structure (or run out of attempts), keep trying
-        # with our given source. Assume we don't have a valid structure until
-        # proven otherwise
+        # with our given source. New structures are made `batch_size` at a time
+        # and each validator checks the batch at once (see
+        # Validator.check_structures). Note, validators that keep a record of
+        # past structures (e.g. fingerprint validators) will also record the
+        # valid structures of a batch that aren't returned.
         logging.info(f"Creating new structure with {self.name}")
-        new_structure = False
         attempt = 0
-        while not new_structure and attempt <= max_attempts:
-            # add an attempt
-            attempt += 1
-            # make a new structure
-            new_structure = self.create_structure()
-
-            # check to see if the structure passes all validation checks.
-            if new_structure:
-                for validator in validators:
-                    is_valid = validator.check_structure(new_structure)
-
-                    if not is_valid:
-                        # if it is not unique, we can throw away the structure and
-                        # try the loop again.
-                        logging.info(
-                            "Generated structure is failed validation by "
-                            f"{validator.name}. Trying again."
-                        )
-                        new_structure = None
-
-                        # one failed validation is enough to stop. There is no
-                        # need to test the other validation methods.
-                        break
-
-        # see if we got a structure or if we hit the max attempts and there's
+        while attempt <= max_attempts:
+            # add the attempts for this batch
+            nattempts = min(batch_size, max_attempts + 1 - attempt)
+            attempt += nattempts
+
+            # make new structures, skipping any that failed
+            new_structures = [self.create_structure() for _ in range(nattempts)]
+            new_structures = [s for s in new_structures if s]
+
+            # check to see which structures pass all validation checks. Each
+            # validator only checks the structures that passed the ones before.
+            for validator in validators:
+                if not new_structures:
+                    break
+                is_valid = validator.check_structures(new_structures)
+
+                if not is_valid.all():
+                    # if it is not unique, we can throw away the structure and
+                    # try the loop again.
+                    logging.info(
+                        f"{(~is_valid).sum()} generated structure(s) failed "
+                        f"validation by {validator.name}. Trying again."
+                    )
+                    new_structures = [
+                        s for s, valid in zip(new_structures, is_valid) if valid
+                    ]
+
+            if new_structures:
+                logging.info("Creation Successful.")
+                # return the first valid structure
+                return new_structures[0]
+
+        # if we make it here, we hit the max attempts and there's
         # a serious problem!
-        if not new_structure:
-            logging.warning(
-                "Failed to create a structure! Consider changing your settings or"
-                " contact our team for help."
-            )
-            return False, False
-
-        # Otherwise we were successful
-        logging.info("Creation Successful.")
-
-        # return the structure and its parents
-        return new_structure
+        logging.warning(
+            "Failed to create a structure! Consider changing your settings or"
+            " contact our team for help."
+        )
+        return False, False
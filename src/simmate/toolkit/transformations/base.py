@@ -153,45 +153,51 @@ class Transformation:
         structures,  # either a structure or list of structures. Depends on ninput.
         validators=[],
         max_attempts=100,
+        batch_size: int = 1,
     ):
         # Until we get a new valid structure (or run out of attempts), keep trying
-        # with our given source. Assume we don't have a valid structure until
-        # proven otherwise
-        new_structure = False
+        # with our given source. New structures are made `batch_size` at a time
+        # and each validator checks the batch at once (see
+        # Validator.check_structures). Note, validators that keep a record of
+        # past structures (e.g. fingerprint validators) will also record the
+        # valid structures of a batch that aren't returned.
         attempt = 0
-        while not new_structure and attempt <= max_attempts:
-            # add an attempt
-            attempt += 1
-
-            # make a new structure
-            new_structure = self.apply_transformation(structures)
-
-            # check to see if the structure passes all validation checks.
-            if new_structure:
-                for validator in validators:
-                    is_valid = validator.check_structure(new_structure)
-
-                    if not is_valid:
-                        # if it is not unique, we can throw away the structure and
-                        # try the loop again.
-                        logging.debug(
-                            "Generated structure failed validation by "
-                            f"{validator.name}. Trying again."
-                        )
-                        new_structure = None
-
-                        # one failed validation is enough to stop. There is no
-                        # need to test the other validation methods.
-                        break
-
-        # see if we got a structure or if we hit the max attempts and there's
+        while attempt <= max_attempts:
+            # add the attempts for this batch
+            nattempts = min(batch_size, max_attempts + 1 - attempt)
+            attempt += nattempts
+
+            # make new structures, skipping any failed transformations
+            new_structures = [
+                self.apply_transformation(structures) for _ in range(nattempts)
+            ]
+            new_structures = [s for s in new_structures if s]
+
+            # check to see which structures pass all validation checks. Each
+            # validator only checks the structures that passed the ones before.
+            for validator in validators:
+                if not new_structures:
+                    break
+                is_valid = validator.check_structures(new_structures)
+
+                if not is_valid.all():
+                    # if it is not unique, we can throw away the structure and
+                    # try the loop again.
+                    logging.debug(
+                        f"{(~is_valid).sum()} generated structure(s) failed "
+                        f"validation by {validator.name}. Trying again."
+                    )
+                    new_structures = [
+                        s for s, valid in zip(new_structures, is_valid) if valid
+                    ]
+
+            if new_structures:
+                # return the first valid structure
+                return new_structures[0]
+
+        # if we make it here, we hit the max attempts and there's
         # a serious problem!
-        if not new_structure:
-            logging.warning(
-                "Failed to create a structure from input after "
-                f"{max_attempts} attempts"
-            )
-            return False
-
-        # return the structure and its parents
-        return new_structure
+        logging.warning(
+            f"Failed to create a structure from input after {max_attempts} attempts"
+        )
+        return False
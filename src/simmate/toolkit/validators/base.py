@@ -1,5 +1,6 @@
 # -*- coding: utf-8 -*-
 
+import numpy
 from dask import bag
 from dask.diagnostics import ProgressBar
 
@@ -22,6 +23,20 @@ class Validator:
             "make sure you add a custom 'check_structure' method to your Validator"
         )
 
+    def check_structures(self, structures: list) -> numpy.ndarray:
+        """
+        Checks many structures at once and gives a boolean mask, where True
+        means that the structure passed the check.
+
+        By default, this just calls `check_structure` on each structure in
+        order. Validators can overwrite this method to share work between
+        structures (e.g. making all fingerprints at once).
+        """
+        return numpy.array(
+            [bool(self.check_structure(structure)) for structure in structures],
+            dtype=bool,
+        )
+
     def check_many_structures(self, structures, progressbar=True, mode="threads"):
         # REFACTOR: switch to the get_dask_client utility here.
 
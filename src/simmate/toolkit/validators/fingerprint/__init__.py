@@ -2,7 +2,9 @@
 # circular imports errors, so we prevent isort from changing this file.
 # isort: skip_file
 
+from .array import FingerprintArray
 from .base import FingerprintValidator
+from .index import FingerprintIndex
 
 from .rdf import RdfFingerprint
 from .prdf import PartialRdfFingerprint
@@ -0,0 +1,190 @@
+# -*- coding: utf-8 -*-
+
+import tempfile
+from pathlib import Path
+
+import numpy
+
+
+class FingerprintArray:
+    """
+    A 2D array of fingerprints (one per row) that can efficiently grow.
+
+    Adding rows with `numpy.append` copies the entire array every time, which
+    becomes very slow for large pools. Instead, this class keeps extra space
+    allocated (its "capacity") and doubles this space whenever it fills up.
+    Adding N fingerprints therefore only requires ~log(N) copies.
+
+    For very large pools, the data can also be stored in a file on disk
+    (via `numpy.memmap`) rather than in memory.
+
+    ``` python
+    pool = FingerprintArray()
+    pool.append(fingerprint)
+    pool.extend(many_fingerprints)
+
+    # works with most numpy functions and indexing
+    pool[0]
+    pool[10:20]
+    numpy.linalg.norm(pool - fingerprint, axis=1)
+    ```
+    """
+
+    def __init__(
+        self,
+        fingerprints: numpy.ndarray = None,
+        capacity: int = 1024,
+        dtype: type = numpy.float64,
+        filename: Path | str = None,
+        use_memmap: bool = False,
+    ):
+        """
+        #### Parameters
+
+        - `fingerprints`:
+            Fingerprints to start the array with.
+
+        - `capacity`:
+            The number of rows to initially allocate space for.
+
+        - `dtype`:
+            The data type of the fingerprints.
+
+        - `filename`:
+            A file to store the data in (as a memory-mapped array). If the
+            file exists, it will be overwritten. Giving a filename sets
+            `use_memmap` to True.
+
+        - `use_memmap`:
+            Whether to store the data in a file rather than in memory. If no
+            `filename` is given, a temporary file is used.
+        """
+        self.capacity = max(capacity, 1)
+        self.dtype = numpy.dtype(dtype)
+        self.use_memmap = use_memmap or filename is not None
+        self.filename = Path(filename) if filename else None
+
+        self._data = None  # allocated once we know the fingerprint length
+        self._length = 0
+
+        if fingerprints is not None:
+            self.extend(fingerprints)
+
+    # -------------------------------------------------------------------------
+    # Adding fingerprints
+    # -------------------------------------------------------------------------
+
+    def append(self, fingerprint: numpy.ndarray):
+        """
+        Adds a single fingerprint to the end of the array.
+        """
+        self.extend(numpy.asarray(fingerprint, dtype=self.dtype).reshape(1, -1))
+
+    def extend(self, fingerprints: numpy.ndarray):
+        """
+        Adds many fingerprints to the end of the array.
+        """
+        fingerprints = numpy.asarray(fingerprints, dtype=self.dtype)
+        if fingerprints.size == 0:
+            return
+        if fingerprints.ndim == 1:
+            fingerprints = fingerprints.reshape(1, -1)
+
+        if self._data is None:
+            self._allocate(fingerprints.shape[1])
+        elif fingerprints.shape[1] != self._data.shape[1]:
+            raise ValueError(
+                f"Fingerprints must have a length of {self._data.shape[1]}, "
+                f"but a length of {fingerprints.shape[1]} was given."
+            )
+
+        new_length = self._length + len(fingerprints)
+        if new_length > self.capacity:
+            new_capacity = self.capacity
+            while new_capacity < new_length:
+                new_capacity *= 2
+            self._resize(new_capacity)
+
+        self._data[self._length : new_length] = fingerprints
+        self._length = new_length
+
+    def truncate(self, length: int):
+        """
+        Removes all fingerprints after the first `length`. The capacity (and
+        any file) is kept so the space can be reused.
+        """
+        self._length = min(max(length, 0), self._length)
+
+    def _allocate(self, nfeatures: int):
+        shape = (self.capacity, nfeatures)
+        if not self.use_memmap:
+            self._data = numpy.empty(shape, dtype=self.dtype)
+            return
+
+        if not self.filename:
+            self._tempfile = tempfile.NamedTemporaryFile(suffix=".dat")
+            self.filename = Path(self._tempfile.name)
+        self._data = numpy.memmap(
+            self.filename, dtype=self.dtype, mode="w+", shape=shape
+        )
+
+    def _resize(self, capacity: int):
+        nfeatures = self._data.shape[1]
+        if not self.use_memmap:
+            new_data = numpy.empty((capacity, nfeatures), dtype=self.dtype)
+            new_data[: self._length] = self._data[: self._length]
+            self._data = new_data
+        else:
+            # For files, we grow the file itself and then map the larger file.
+            # The existing data never needs to be copied.
+            self._data.flush()
+            del self._data
+            with self.filename.open("r+b") as file:
+                file.truncate(capacity * nfeatures * self.dtype.itemsize)
+            self._data = numpy.memmap(
+                self.filename,
+                dtype=self.dtype,
+                mode="r+",
+                shape=(capacity, nfeatures),
+            )
+        self.capacity = capacity
+
+    # -------------------------------------------------------------------------
+    # Reading fingerprints (which lets this class act like a numpy array)
+    # -------------------------------------------------------------------------
+
+    @property
+    def data(self) -> numpy.ndarray:
+        """
+        A view of the filled rows as a numpy array. This does not copy the data.
+        """
+        if self._data is None:
+            return numpy.empty((0, 0), dtype=self.dtype)
+        return self._data[: self._length]
+
+    def __array__(self, dtype=None, copy=None):
+        return self.data if dtype is None else self.data.astype(dtype)
+
+    def __len__(self) -> int:
+        return self._length
+
+    def __iter__(self):
+        return iter(self.data)
+
+    def __getitem__(self, key):
+        return self.data[key]
+
+    @property
+    def shape(self) -> tuple:
+        return self.data.shape
+
+    @property
+    def size(self) -> int:
+        return self.data.size
+
+    @property
+    def ndim(self) -> int:
+        return 2
+
+    def __repr__(self) -> str:
+        return f"FingerprintArray({self.data!r})"
@@ -1,15 +1,21 @@
 # -*- coding: utf-8 -*-
 
+import hashlib
+import json
 import logging
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
 
 import numpy
-import scipy
 from django.core.exceptions import MultipleObjectsReturned
 from django.utils import timezone
 from rich.progress import track
+from scipy.spatial.distance import cdist
 
 from simmate.toolkit import Structure
 from simmate.toolkit.validators import Validator
+from simmate.toolkit.validators.fingerprint.array import FingerprintArray
+from simmate.toolkit.validators.fingerprint.index import FingerprintIndex
 from simmate.utilities import chunk_list
 
 
@@ -22,7 +28,9 @@ class FingerprintValidator(Validator):
         - custom
 
     For 'custom', you must write a custom 'get_fingerprint_distance(fp1, fp2)'
-    static method that will be used.
+    static method that will be used. For speed, you can also write a
+    'get_fingerprint_distances(fp, fp_pool)' method that compares against
+    many fingerprints at once.
     """
 
     distance_tolerance: float = 0.005
@@ -30,14 +38,39 @@ class FingerprintValidator(Validator):
     The value used to signify different structures
     """
 
+    comparison_chunk_size: int = 10000
+    """
+    When checking a fingerprint against the pool, this many fingerprints
+    are compared at once (see `get_fingerprint_distances`).
+    """
+
+    featurizer_version: str = "1"
+    """
+    The version of this validator's featurizer code. Fingerprints saved to the
+    database are only reused by validators with the same version, so this
+    should be changed whenever an update changes the fingerprints made. Saved
+    fingerprints from other versions are deleted the next time a validator
+    with the same settings is made.
+    """
+
+    featurize_chunk_size: int = 500
+    """
+    When updating the pool from a database table, this many structures are
+    loaded and featurized at a time (see `update_fingerprint_pool`).
+    """
+
     def __init__(
         self,
         distance_tolerance: float = None,  # defaults to class attr
         structure_pool: list[Structure] = [],  # OR a queryset from a Structure table
         use_database: bool = False,
+        fingerprint_pool_filename: str = None,
+        use_index: bool = False,
+        nprocesses: int = 1,
         **kwargs,
     ):
         self.use_database = use_database
+        self.nprocesses = nprocesses
         self.distance_tolerance = distance_tolerance or self.distance_tolerance
 
         # setup featurizer with the given composition
@@ -76,22 +109,51 @@ class FingerprintValidator(Validator):
             # TODO: _serialize_parameters should be a utility and not
             # attached to the workflow class
 
-            self.database_pool = FingerprintPool.objects.get_or_create(
+            # Pools are shared by all validators that make the same
+            # fingerprints, even if other settings (such as distance_tolerance)
+            # differ. The init_kwargs of the first validator are stored.
+            self.database_pool, created = FingerprintPool.objects.get_or_create(
                 method=self.name,
-                init_kwargs=self.init_kwargs,
                 database_table=structure_pool.model.table_name,
-            )[0]
+                settings_hash=self.settings_hash,
+                featurizer_version=self.featurizer_version,
+                defaults=dict(init_kwargs=self.init_kwargs),
+            )
             # BUG: There is a race condition here. If a pool is started up from
             # multiple locations, this could result in duplicate pools.
-
-            # we also keep a log of the last update so we only grab new structures
-            # each time we update the database. To start, we set this as the
-            # earliest possible date, which tells our update_fingerprint_pool
-            # method to include ALL structures
+            if created:
+                self._delete_outdated_pools()
+
+        # we also keep a log of the last update so we only grab new structures
+        # each time we update the pool. To start, we set this as the
+        # earliest possible date, which tells our update_fingerprint_pool
+        # method to include ALL structures
+        if self.structure_pool_queryset != "local_only":
             self.last_update = timezone.make_aware(
                 timezone.datetime.min, timezone.get_default_timezone()
             )
 
+        # both types of structure pools start out empty. For very large pools,
+        # the fingerprints can be stored in a file rather than in memory.
+        self.fingerprint_pool = FingerprintArray(filename=fingerprint_pool_filename)
+        self.source_pool = []
+
+        # For large pools, we can keep a nearest-neighbor index of all
+        # fingerprints so that each check doesn't scan the full pool. We use
+        # the exact (balltree) backend so that results match the full scan.
+        self.fingerprint_index = None
+        if use_index:
+            metrics = {"linalg_norm": "euclidean", "cos": "cosine"}
+            if self.comparison_mode not in metrics:
+                raise Exception(
+                    "Indexes are only supported for fingerprints that use "
+                    "'linalg_norm' or 'cos' comparison modes."
+                )
+            self.fingerprint_index = FingerprintIndex(
+                metric=metrics[self.comparison_mode],
+                backend="balltree",
+            )
+
         # next we address what initial structures were given.
 
         # check if we were given a list of pymatgen structures. If so, we can
@@ -114,8 +176,6 @@ class FingerprintValidator(Validator):
         # otherwise we have a queryset that should be used to populate the
         # fingerprint database
         else:
-            self.fingerprint_pool = numpy.array([])
-            self.source_pool = []
             self.update_fingerprint_pool()
 
     # -------------------------------------------------------------------------
@@ -157,7 +217,10 @@ class FingerprintValidator(Validator):
         fingerprint = self._get_fingerprint(structure)
 
         # compare this new fingerprint to all others
-        is_unique = self._check_fingerprint(fingerprint, self.fingerprint_pool)
+        if self.fingerprint_index is not None:
+            is_unique = self._check_fingerprint_with_index(fingerprint)
+        else:
+            is_unique = self._check_fingerprint(fingerprint, self.fingerprint_pool)
 
         # add this new fingerprint to the database if it was requested.
         if is_unique and add_unique_to_pool:
@@ -171,6 +234,63 @@ class FingerprintValidator(Validator):
         # Return that we were successful
         return is_unique
 
+    def check_structures(
+        self,
+        structures: list[Structure],
+        add_unique_to_pool: bool = True,
+    ) -> numpy.ndarray:
+        """
+        Gives the same result as calling `check_structure` on each structure
+        in order, but all fingerprints are made up front (in parallel if
+        `nprocesses` is above 1) and are compared to the pool at once.
+
+        When `add_unique_to_pool` is True, each structure is also compared to
+        the unique structures before it in the list -- just as if these had
+        been added to the pool by earlier `check_structure` calls.
+        """
+        if not len(structures):
+            return numpy.array([], dtype=bool)
+
+        fingerprints = numpy.array(self._get_fingerprints(structures), dtype=float)
+
+        # compare all new fingerprints to the current pool
+        if self.fingerprint_index is not None:
+            is_unique = numpy.array(
+                [self._check_fingerprint_with_index(fp) for fp in fingerprints],
+                dtype=bool,
+            )
+        else:
+            is_unique = self._check_many_fingerprints(
+                fingerprints, self.fingerprint_pool
+            )
+
+        if not add_unique_to_pool:
+            return is_unique
+
+        # compare to the unique fingerprints earlier in the list
+        unique_positions = []
+        for position in numpy.flatnonzero(is_unique):
+            if not self._check_fingerprint(
+                fingerprints[position],
+                fingerprints[unique_positions],
+            ):
+                is_unique[position] = False
+                continue
+            unique_positions.append(position)
+
+        # BUG-FIX:
+        # in case a pymatgen structure was given, set the source to {}
+        for position in unique_positions:
+            if not hasattr(structures[position], "source"):
+                structures[position].source = {}
+
+        self._add_many_to_pool(
+            fingerprints[unique_positions],
+            [structures[position].source for position in unique_positions],
+        )
+
+        return is_unique
+
     def _check_fingerprint(
         self,
         fingerprint: numpy.array,
@@ -179,35 +299,141 @@ class FingerprintValidator(Validator):
         # We now want to get the distance of this fingerprint relative to all others.
         # If the distance is within the specified tolerance, then the structures
         # are too similar - and we return  for a failure.
-        is_unique = True  # consider it unique until proven otherwise
-        # min_dist = 9999  # start with high value
-        for fingerprint2 in fingerprint_pool:
-            # check fingerprint based on the mode set
-            if self.comparison_mode == "linalg_norm":
-                distance = numpy.linalg.norm(fingerprint - fingerprint2)
-            elif self.comparison_mode == "cos":
-                distance = scipy.spatial.distance.cosine(fingerprint, fingerprint2)
-            elif self.comparison_mode == "custom":
-                distance = self.get_fingerprint_distance(fingerprint, fingerprint2)
-            else:
-                raise NotImplementedError("Unknown comparison_mode provided.")
-
-            # keep track of the most similar structure
-            # if min_dist > distance:
-            #     min_dist = distance
+        if not len(fingerprint_pool):
+            return True
 
-            # and determine if we have a match
-            if distance < self.distance_tolerance:
+        # Custom comparisons without a batch form have to be done one at a time
+        if self.comparison_mode == "custom" and not self._has_batch_distances:
+            for fingerprint2 in fingerprint_pool:
+                distance = self.get_fingerprint_distance(fingerprint, fingerprint2)
                 # we can end the whole for-loop as soon as one structure is
                 # deemed too similar
-                is_unique = False
-                break
+                if distance < self.distance_tolerance:
+                    return False
+            return True
+
+        # Otherwise, we compare against many fingerprints at once. This is done
+        # in chunks so that we can still stop early once a match is found.
+        fingerprint = numpy.asarray(fingerprint, dtype=float)
+        for start in range(0, len(fingerprint_pool), self.comparison_chunk_size):
+            chunk = numpy.asarray(
+                fingerprint_pool[start : start + self.comparison_chunk_size],
+                dtype=float,
+            )
+            distances = self.get_fingerprint_distances(fingerprint, chunk)
+            if (distances < self.distance_tolerance).any():
+                return False
 
         # If we make it through all structures and no distance is below the
         # tolerance, then we have a new and unique fingerprint
+        return True
+
+    def _check_fingerprint_with_index(self, fingerprint: numpy.array):
+        # Same as _check_fingerprint with the full fingerprint_pool, but using
+        # the nearest fingerprint from our index.
+        _, distances = self.fingerprint_index.query(fingerprint, k=1)
+        return not (distances < self.distance_tolerance).any()
+
+    def _check_many_fingerprints(
+        self,
+        fingerprints: numpy.array,
+        fingerprint_pool: list[numpy.array],
+    ) -> numpy.array:
+        # Same as _check_fingerprint, but for many fingerprints at once. Each
+        # chunk of the pool is compared only to fingerprints that are still
+        # unique, so we can stop early once all have a match.
+        is_unique = numpy.ones(len(fingerprints), dtype=bool)
+
+        if self.comparison_mode == "custom" and not self._has_batch_distances:
+            for position, fingerprint in enumerate(fingerprints):
+                is_unique[position] = self._check_fingerprint(
+                    fingerprint, fingerprint_pool
+                )
+            return is_unique
+
+        for start in range(0, len(fingerprint_pool), self.comparison_chunk_size):
+            remaining = numpy.flatnonzero(is_unique)
+            if not len(remaining):
+                break
+            chunk = numpy.asarray(
+                fingerprint_pool[start : start + self.comparison_chunk_size],
+                dtype=float,
+            )
+            distances = self._get_distance_matrix(fingerprints[remaining], chunk)
+            is_unique[remaining] = ~(distances < self.distance_tolerance).any(axis=1)
 
         return is_unique
 
+    def _get_distance_matrix(
+        self,
+        fingerprints: numpy.array,
+        fingerprint_pool: numpy.array,
+    ) -> numpy.array:
+        # Same as get_fingerprint_distances, but for many fingerprints at once.
+        # Gives a 2D array where each row is for one of the fingerprints.
+        if self.comparison_mode == "linalg_norm":
+            return cdist(fingerprints, fingerprint_pool, metric="euclidean")
+        elif self.comparison_mode == "cos":
+            norms = numpy.linalg.norm(fingerprint_pool, axis=1)
+            fingerprint_norms = numpy.linalg.norm(fingerprints, axis=1)
+            with numpy.errstate(divide="ignore", invalid="ignore"):
+                similarity = (
+                    fingerprints
+                    @ fingerprint_pool.T
+                    / numpy.outer(fingerprint_norms, norms)
+                )
+            return 1 - numpy.clip(similarity, -1, 1)
+        else:
+            return numpy.array(
+                [
+                    self.get_fingerprint_distances(fingerprint, fingerprint_pool)
+                    for fingerprint in fingerprints
+                ]
+            ).reshape(len(fingerprints), len(fingerprint_pool))
+
+    def get_fingerprint_distances(
+        self,
+        fingerprint: numpy.array,
+        fingerprint_pool: numpy.array,
+    ) -> numpy.array:
+        """
+        Gives the distance between a fingerprint and every fingerprint in a
+        2D array, where each row is a fingerprint.
+
+        For the 'custom' comparison mode, you can overwrite this method to
+        compare against many fingerprints at once, which is much faster than
+        the one-at-a-time `get_fingerprint_distance`.
+        """
+        if self.comparison_mode == "linalg_norm":
+            return numpy.linalg.norm(fingerprint_pool - fingerprint, axis=1)
+        elif self.comparison_mode == "cos":
+            # same as scipy.spatial.distance.cosine, but for all rows at once
+            norms = numpy.linalg.norm(fingerprint_pool, axis=1)
+            with numpy.errstate(divide="ignore", invalid="ignore"):
+                similarity = (
+                    fingerprint_pool
+                    @ fingerprint
+                    / (norms * numpy.linalg.norm(fingerprint))
+                )
+            return 1 - numpy.clip(similarity, -1, 1)
+        elif self.comparison_mode == "custom":
+            return numpy.array(
+                [
+                    self.get_fingerprint_distance(fingerprint, fingerprint2)
+                    for fingerprint2 in fingerprint_pool
+                ]
+            )
+        else:
+            raise NotImplementedError("Unknown comparison_mode provided.")
+
+    @property
+    def _has_batch_distances(self) -> bool:
+        # whether a subclass wrote its own get_fingerprint_distances method
+        return (
+            type(self).get_fingerprint_distances
+            is not FingerprintValidator.get_fingerprint_distances
+        )
+
     def _get_fingerprint(self, structure: Structure):
         # make the fingerprint for this structure into a numpy array for speed
         fingerprint = numpy.array(self.featurizer.featurize(structure))
@@ -217,12 +443,69 @@ class FingerprintValidator(Validator):
 
         return fingerprint
 
+    def _get_fingerprints(self, structures: list[Structure]) -> list[numpy.array]:
+        # Same as _get_fingerprint, but for many structures. When using
+        # several processes, the structures are split into chunks that are
+        # featurized in parallel.
+        if self.nprocesses == 1 or len(structures) == 1:
+            return [self._get_fingerprint(structure) for structure in structures]
+
+        chunk_size = min(
+            self.featurize_chunk_size,
+            -(-len(structures) // self.nprocesses),
+        )
+        chunks = list(chunk_list(structures, chunk_size=chunk_size))
+        with ProcessPoolExecutor(max_workers=self.nprocesses) as executor:
+            results = executor.map(
+                _featurize_structures,
+                [self.__class__] * len(chunks),
+                [self.featurizer] * len(chunks),
+                chunks,
+            )
+            return [fingerprint for chunk in results for fingerprint in chunk]
+
     # -------------------------------------------------------------------------
     # Methods that populate the pool and database with information
     # -------------------------------------------------------------------------
 
+    @property
+    def settings_hash(self) -> str:
+        """
+        A hash of the featurizer class and the settings used to make it. Two
+        validators with the same hash make the same fingerprints, so they can
+        share saved fingerprints.
+        """
+        featurizer_class = type(self.featurizer)
+        settings = {
+            "method": self.name,
+            "featurizer": f"{featurizer_class.__module__}.{featurizer_class.__name__}",
+            "featurizer_kwargs": {
+                key: value
+                for key, value in self.init_kwargs.items()
+                if key != "distance_tolerance"
+            },
+        }
+        settings_str = json.dumps(settings, sort_keys=True, default=str)
+        return hashlib.sha256(settings_str.encode()).hexdigest()
+
+    def _delete_outdated_pools(self):
+        # Removes saved fingerprints that were made with the same settings
+        # but a different version of the featurizer code
+        outdated_pools = self.database_pool.__class__.objects.filter(
+            method=self.name,
+            database_table=self.database_pool.database_table,
+            settings_hash=self.settings_hash,
+        ).exclude(featurizer_version=self.featurizer_version)
+        for pool in outdated_pools:
+            logging.info(
+                f"Deleting fingerprint pool {pool.id}, which was made with an "
+                f"outdated featurizer (version {pool.featurizer_version})"
+            )
+            pool.delete_similarity_index()
+        outdated_pools.delete()
+
     def update_fingerprint_pool(self):
-        if not self.use_database or self.structure_pool_queryset == "local_only":
+        if self.structure_pool_queryset == "local_only":
             raise Exception(
                 "This method should only be used when your structure pool"
                 " is based on a Simmate database table!"
@@ -235,10 +518,29 @@ class FingerprintValidator(Validator):
         last_update_safe = self.last_update
         self.last_update = timezone.now()
 
+        # If anything below fails, we undo what this call added to the pool
+        # and reset our timestamp, so the next update retries every new
+        # structure without adding any of them twice. Fingerprints that were
+        # already saved to the database are kept and reused by the retry.
+        pool_length = len(self.source_pool)
+        try:
+            self._add_new_structures_to_pool(last_update_safe)
+        except BaseException:
+            self._truncate_pool(pool_length)
+            self.last_update = last_update_safe
+            raise
+
+    def _add_new_structures_to_pool(self, last_update_safe):
+        """
+        Adds all structures created since the given timestamp to the pool.
+        This is the main logic behind `update_fingerprint_pool`.
+        """
         # Now grab all the new structure ids that need to be added to the database
-        new_ids = self.structure_pool_queryset.filter(
-            created_at__gte=last_update_safe
-        ).values_list("id", flat=True)
+        new_ids = list(
+            self.structure_pool_queryset.filter(
+                created_at__gte=last_update_safe
+            ).values_list("id", flat=True)
+        )
 
         # If there aren't any new structures, just exit without printing the
         # message and progress bar
@@ -284,7 +586,7 @@ class FingerprintValidator(Validator):
             self._add_many_to_pool(fingerprints, sources, skip_database=True)
 
             # reset the new_structures list to those that are actually still needed
-            existing_ids = [fp.database_id for fp in all_results]
+            existing_ids = {fp.database_id for fp in all_results}
             new_ids = [i for i in new_ids if i not in existing_ids]
 
         # same as before -- exit if there aren't any new ids
@@ -293,23 +595,69 @@ class FingerprintValidator(Validator):
 
         logging.info(f"Found {len(new_ids)} new structure(s) for the fingerprint pool.")
 
-        new_structures = self.structure_pool_queryset.filter(
-            id__in=new_ids
-        ).to_toolkit()
+        # We only load a chunk of structures at a time, so memory use stays
+        # bounded for very large pools. Fingerprints are added to the pool
+        # in the same order as new_ids, even when chunks are featurized in
+        # parallel.
+        table_name = self.structure_pool_queryset.model.table_name
+        for chunk_ids, fingerprints in track(
+            self._iter_fingerprint_chunks(new_ids),
+            total=-(-len(new_ids) // self.featurize_chunk_size),
+        ):
+            sources = [
+                {"database_table": table_name, "database_id": database_id}
+                for database_id in chunk_ids
+            ]
+            self._add_many_to_pool(fingerprints, sources)
 
-        # OPTIMIZE: I attempted to calculate fingerprints with Dask, but without
-        # any luck. Ends up crashing in many scenarios.
-        # from simmate.configuration.dask import get_dask_client
-        # with get_dask_client() as client:
-        #     futures = [client.submit(self._get_fingerprint, s) for s in new_structures]
-        #     fingerprints = [future.result() for future in track(futures)]
+    def _iter_fingerprint_chunks(self, ids: list[int]):
+        """
+        Featurizes the structures with the given ids in chunks, yielding a
+        tuple of (chunk_ids, fingerprints) for each chunk in order.
+        """
+
+        # only the structure column is loaded (rather than full database objects)
+        def load_chunk(chunk_ids):
+            structure_strings = dict(
+                self.structure_pool_queryset.filter(id__in=chunk_ids).values_list(
+                    "id", "structure"
+                )
+            )
+            # the query does not return the ids in order, so we reorder them
+            return [structure_strings[i] for i in chunk_ids]
+
+        chunks = chunk_list(ids, chunk_size=self.featurize_chunk_size)
+
+        if self.nprocesses == 1:
+            for chunk_ids in chunks:
+                yield chunk_ids, _featurize_structure_strings(
+                    self.__class__, self.featurizer, load_chunk(chunk_ids)
+                )
+            return
 
-        # calculate each fingerprint and add it to the database
-        fingerprints = [
-            self._get_fingerprint(structure) for structure in track(new_structures)
-        ]
-        sources = [structure.source for structure in new_structures]
-        self._add_many_to_pool(fingerprints, sources)
+        # We only keep a few chunks submitted at any given time, so that the
+        # full set of structures is never loaded at once. Results are returned
+        # in the order they were submitted.
+        executor = ProcessPoolExecutor(max_workers=self.nprocesses)
+        try:
+            pending = deque()
+            for chunk_ids in chunks:
+                future = executor.submit(
+                    _featurize_structure_strings,
+                    self.__class__,
+                    self.featurizer,
+                    load_chunk(chunk_ids),
+                )
+                pending.append((chunk_ids, future))
+                if len(pending) >= self.nprocesses * 2:
+                    chunk_ids, future = pending.popleft()
+                    yield chunk_ids, future.result()
+            while pending:
+                chunk_ids, future = pending.popleft()
+                yield chunk_ids, future.result()
+        finally:
+            # on errors (or interrupts), we don't wait for queued chunks
+            executor.shutdown(cancel_futures=True)
 
     def _add_many_to_pool(self, fingerprints, sources, skip_database: bool = False):
         """
@@ -320,12 +668,12 @@ class FingerprintValidator(Validator):
         self.source_pool += sources
 
         # fingerprint
-        # Numpy arrays begin differently when empty
-        if self.fingerprint_pool.size == 0:
-            self.fingerprint_pool = numpy.array(fingerprints)
-        else:
-            self.fingerprint_pool = numpy.append(
-                self.fingerprint_pool, fingerprints, axis=0
+        start = len(self.fingerprint_pool)
+        self.fingerprint_pool.extend(fingerprints)
+        if self.fingerprint_index is not None and len(fingerprints):
+            self.fingerprint_index.add(
+                fingerprints,
+                ids=range(start, len(self.fingerprint_pool)),
             )
 
         # store in database
@@ -335,6 +683,25 @@ class FingerprintValidator(Validator):
             # OPTIMIZE: I'm not sure how to do this in a single query
             # https://stackoverflow.com/questions/27047630
 
+    def _truncate_pool(self, length: int):
+        """
+        Removes all fingerprints (and their sources) after the first `length`
+        from the pool. This does not remove anything from the database.
+        """
+        del self.source_pool[length:]
+        self.fingerprint_pool.truncate(length)
+        # indexes can't remove vectors, so we rebuild it from the pool
+        if self.fingerprint_index is not None:
+            self.fingerprint_index = FingerprintIndex(
+                metric=self.fingerprint_index.metric,
+                backend=self.fingerprint_index.backend,
+            )
+            if len(self.fingerprint_pool):
+                self.fingerprint_index.add(
+                    self.fingerprint_pool.data,
+                    ids=range(len(self.fingerprint_pool)),
+                )
+
     def _add_to_pool(
         self,
         fingerprint,
@@ -344,21 +711,18 @@ class FingerprintValidator(Validator):
         """
         Adds a new fingerprint to the pool.
 
-        This is very slow for >1000 additions though. For bulk additions, use
-        _add_many_to_pool method instead. See:
-            https://stackoverflow.com/questions/7133885
+        For bulk additions, use _add_many_to_pool method instead.
         """
 
         # source
         self.source_pool.append(source)
 
         # fingerprint
-        # Numpy arrays begin differently when empty
-        if self.fingerprint_pool.size == 0:
-            self.fingerprint_pool = numpy.array([fingerprint])
-        else:
-            self.fingerprint_pool = numpy.append(
-                self.fingerprint_pool, [fingerprint], axis=0
+        self.fingerprint_pool.append(fingerprint)
+        if self.fingerprint_index is not None:
+            self.fingerprint_index.add(
+                fingerprint,
+                ids=[len(self.fingerprint_pool) - 1],
             )
 
         # store in database
@@ -385,19 +749,117 @@ class FingerprintValidator(Validator):
     # Extra high level methods that are useful for analyzing a structure pool
     # -------------------------------------------------------------------------
 
-    def remove_duplicates(self, structures: list[Structure]) -> list[Structure]:
-        raise NotImplementedError("This method is still under development")
-        # This might need to be a class method because I don't want to use
-        # an already existing fingerprint_pool
-        structures_unique = []
-        for structure in track(structures):
-            if self.check_structure(structure):
-                structures_unique.append(structure)
+    def group_duplicates(self, fingerprints: numpy.array) -> list[list[int]]:
+        """
+        Groups fingerprints that are within the `distance_tolerance` of one
+        another.
+
+        Fingerprints are handled in the order given: the first fingerprint
+        that is not in a group yet starts a new group, and all other
+        ungrouped fingerprints within the tolerance of it are added to that
+        group. The first fingerprint of each group can therefore be used as
+        its representative, and no two representatives are within the
+        tolerance of one another.
+
+        For the 'linalg_norm' and 'cos' comparison modes, a nearest-neighbor
+        index (see `FingerprintIndex`) is used so that each fingerprint is only
+        compared to nearby ones, rather than to every other fingerprint.
+
+        #### Parameters
+
+        - `fingerprints`:
+            A 2D array where each row is a fingerprint.
+
+        #### Returns
+
+        A list of groups, where each group is a list of positions in
+        `fingerprints` and the representative is listed first.
+        """
+        fingerprints = numpy.asarray(fingerprints, dtype=float)
+        group_ids = numpy.full(len(fingerprints), -1)
+
+        metrics = {"linalg_norm": "euclidean", "cos": "cosine"}
+        index = None
+        if self.comparison_mode in metrics:
+            index = FingerprintIndex(
+                metric=metrics[self.comparison_mode],
+                backend="balltree",
+            )
+            index.add(fingerprints, ids=range(len(fingerprints)))
+
+        groups = []
+        for position, fingerprint in enumerate(fingerprints):
+            if group_ids[position] >= 0:
+                continue  # this fingerprint is already in a group
+
+            if index is not None:
+                matches, distances = index.query_radius(
+                    fingerprint,
+                    radius=self.distance_tolerance,
+                )
+            else:
+                # earlier fingerprints are all in groups already, so we only
+                # need to compare to the ones after this one
+                matches = numpy.arange(position, len(fingerprints))
+                distances = self.get_fingerprint_distances(
+                    fingerprint,
+                    fingerprints[position:],
+                )
+            # same as _check_fingerprint, where equal to the tolerance is unique
+            matches = matches[(distances < self.distance_tolerance)]
+            matches = matches[(group_ids[matches] < 0) & (matches != position)]
+
+            group = [position] + sorted(matches.tolist())
+            group_ids[group] = len(groups)
+            groups.append(group)
+
+        return groups
+
+    def remove_duplicates(
+        self,
+        structures: list[Structure],
+        key: callable = None,
+    ) -> list[Structure]:
+        """
+        Gives the unique structures from a list, where structures within the
+        `distance_tolerance` of one another are grouped together and only one
+        structure from each group is kept (see `group_duplicates`).
+
+        Note, this does not use or change the fingerprint pool of this validator.
+
+        ``` python
+        # keep the lowest energy structure of each group
+        structures = MyTable.objects.to_toolkit()
+        validator.remove_duplicates(
+            structures,
+            key=lambda s: s.database_object.energy_per_atom,
+        )
+        ```
+
+        #### Parameters
+
+        - `structures`:
+            The list of structures to remove duplicates from.
+
+        - `key`:
+            A function that is given a structure and returns a value to sort
+            by (e.g. its energy). The structure with the lowest value is kept
+            for each group. By default, the first structure in the list is kept.
+
+        #### Returns
+
+        The unique structures, sorted by `key`.
+        """
+        if key:
+            structures = sorted(structures, key=key)
+        fingerprints = [self._get_fingerprint(s) for s in track(structures)]
+        groups = self.group_duplicates(fingerprints)
+        return [structures[group[0]] for group in groups]
 
     def get_unique_from_pool(self) -> list[Structure]:
         # order of the input structures is important for this method
         if (
-            self.structure_pool_queryset
+            self.structure_pool_queryset != "local_only"
             and not self.structure_pool_queryset.query.order_by
         ):
             logging.warning(
@@ -407,25 +869,8 @@ class FingerprintValidator(Validator):
             )
 
         logging.info("Isolating unique structures")
-
-        # The first structure in our pool is unique by default so this
-        # starts out our list
-        unique_sources = [self.source_pool[0]]
-        unique_fingerprints = numpy.array([self.fingerprint_pool[0]])
-
-        # The rest need to be checked one at a time
-        for source, fingerprint in track(
-            list(zip(self.source_pool, self.fingerprint_pool))
-        ):
-            is_unique = self._check_fingerprint(
-                fingerprint,
-                unique_fingerprints,
-            )
-            if is_unique:
-                unique_sources.append(source)
-                unique_fingerprints = numpy.append(
-                    unique_fingerprints, [fingerprint], axis=0
-                )
+        groups = self.group_duplicates(self.fingerprint_pool)
+        unique_sources = [self.source_pool[group[0]] for group in groups]
 
         logging.info(
             f"{len(unique_sources)} unique entries found. "
@@ -438,3 +883,35 @@ class FingerprintValidator(Validator):
         structures = DatabaseAdapter.get_toolkits_from_database_dicts(unique_sources)
 
         return structures
+
+
+def _featurize_structure_strings(
+    validator_class: type,
+    featurizer,
+    structure_strings: list[str],
+) -> list[numpy.array]:
+    """
+    Makes the fingerprint for each structure string (as stored in the
+    'structure' column of a database table). This is a top-level function
+    so that it can be sent to other processes.
+    """
+    # local import to avoid circular dependency
+    from simmate.file_converters.structure.database import DatabaseAdapter
+
+    structures = DatabaseAdapter.get_toolkits_from_database_strings(structure_strings)
+    return _featurize_structures(validator_class, featurizer, structures)
+
+
+def _featurize_structures(
+    validator_class: type,
+    featurizer,
+    structures: list[Structure],
+) -> list[numpy.array]:
+    """
+    Makes the fingerprint for each structure. This is a top-level function
+    so that it can be sent to other processes.
+    """
+    return [
+        validator_class.format_fingerprint(numpy.array(featurizer.featurize(s)))
+        for s in structures
+    ]
@@ -110,35 +110,80 @@ class SiteStatsFingerprint(BaseFeaturizer):
 
     def featurize(self, s):
         # Get each feature for each site
-        vals = [[] for t in self._site_labels]
-        for i, site in enumerate(s.sites):
-            if (self.min_oxi is None or site.specie.oxi_state >= self.min_oxi) and (
-                self.max_oxi is None or site.specie.oxi_state >= self.max_oxi
-            ):
-                opvalstmp = self.site_featurizer.featurize(s, i)
-                for j, opval in enumerate(opvalstmp):
-                    if opval is None:
-                        vals[j].append(0.0)
-                    else:
-                        vals[j].append(opval)
+        site_indices = [
+            i
+            for i, site in enumerate(s.sites)
+            if (self.min_oxi is None or site.specie.oxi_state >= self.min_oxi)
+            and (self.max_oxi is None or site.specie.oxi_state >= self.max_oxi)
+        ]
+        vals = self._get_site_features(s, site_indices)
 
         # If the user does not request statistics, return the site features now
         if self.stats is None:
-            return vals
+            return vals.tolist()
 
-        # Compute the requested statistics
-        stats = []
-        for op in vals:
-            for stat in self.stats:
-                stats.append(PropertyStats().calc_stat(op, stat))
+        return self._compute_stats(vals, nsites_total=len(s))
+
+    def _get_site_features(self, s, site_indices):
+        """
+        Gives a 2D array of site features, where each row is a single feature
+        and each column is a site (in the order of `site_indices`). Missing
+        (None) features are set to 0.
+
+        Note, sites are still featurized one at a time. Site featurizers such
+        as CrystalNNFingerprint find neighbors per site within pymatgen, and a
+        single tessellation of the whole cell does not give the same results.
+        """
+        vals = np.zeros((len(self._site_labels), len(site_indices)))
+        for column, i in enumerate(site_indices):
+            opvalstmp = self.site_featurizer.featurize(s, i)
+            vals[:, column] = [0.0 if opval is None else opval for opval in opvalstmp]
+        return vals
+
+    # These statistics are computed for all features at once using numpy
+    # reductions. They give the same result as matminer's PropertyStats,
+    # which is used for all other statistics (one feature at a time).
+    _array_stats = {
+        "mean": lambda vals: np.mean(vals, axis=1),
+        "std_dev": lambda vals: np.std(vals, axis=1),
+        "minimum": lambda vals: np.min(vals, axis=1),
+        "maximum": lambda vals: np.max(vals, axis=1),
+        "range": lambda vals: np.max(vals, axis=1) - np.min(vals, axis=1),
+        "avg_dev": lambda vals: np.mean(
+            np.abs(vals - np.mean(vals, axis=1, keepdims=True)), axis=1
+        ),
+    }
+
+    def _compute_stats(self, vals, nsites_total):
+        """
+        Computes the requested statistics (and covariances) of a 2D array of
+        site features from `_get_site_features`.
+        """
+        # rows must be contiguous so numpy sums each feature the same way
+        # it would for a 1D list of values
+        vals = np.ascontiguousarray(vals)
+        nfeatures, nsites = vals.shape
+
+        # Each row of stats is a feature and each column is a statistic
+        stats = np.zeros((nfeatures, len(self.stats)))
+        for column, stat in enumerate(self.stats):
+            if stat == "std_dev" and nsites == 1:
+                continue  # matminer gives 0 for a single site
+            elif stat in self._array_stats and nsites:
+                stats[:, column] = self._array_stats[stat](vals)
+            else:
+                stats[:, column] = [
+                    PropertyStats().calc_stat(op.tolist(), stat) for op in vals
+                ]
+        stats = stats.ravel().tolist()
 
         # If desired, compute covariances
         if self.covariance:
-            if len(s) == 1:
-                stats.extend([0] * int(len(vals) * (len(vals) - 1) / 2))
+            if nsites_total == 1:
+                stats.extend([0] * int(nfeatures * (nfeatures - 1) / 2))
             else:
                 covar = np.cov(vals)
-                tri_ind = np.triu_indices(len(vals), 1)
+                tri_ind = np.triu_indices(nfeatures, 1)
                 stats.extend(covar[tri_ind].tolist())
 
         return stats
@@ -360,48 +405,37 @@ class PartialsSiteStatsFingerprint(SiteStatsFingerprint):
         if not hasattr(self, "elements_") or self.elements_ is None:
             raise Exception("You must run 'fit' first!")
 
+        # Each site is featurized once, and then the features are broken
+        # down by element.
+        site_symbols = np.array([site.specie.symbol for site in s.sites])
+        site_indices = np.flatnonzero(np.isin(site_symbols, self.elements_))
+        vals = self._get_site_features(s, site_indices)
+
         output = []
         for e in self.elements_:
-            pssf_stats = self.compute_pssf(s, e)
+            pssf_stats = self.compute_pssf(
+                s, e, vals[:, site_symbols[site_indices] == e]
+            )
             output.append(pssf_stats)
 
         return np.hstack(output)
 
-    def compute_pssf(self, s, e):
+    def compute_pssf(self, s, e, vals=None):
         # This code is extremely similar to super().featurize(). The key
         # difference is that only one specific element is analyzed.
 
-        # Get each feature for each site
-        vals = [[] for t in self._site_labels]
-        for i, site in enumerate(s.sites):
-            if site.specie.symbol == e:
-                opvalstmp = self.site_featurizer.featurize(s, i)
-                for j, opval in enumerate(opvalstmp):
-                    if opval is None:
-                        vals[j].append(0.0)
-                    else:
-                        vals[j].append(opval)
+        # Get each feature for each site of this element (unless they were given)
+        if vals is None:
+            site_indices = [
+                i for i, site in enumerate(s.sites) if site.specie.symbol == e
+            ]
+            vals = self._get_site_features(s, site_indices)
 
         # If the user does not request statistics, return the site features now
         if self.stats is None:
-            return vals
-
-        # Compute the requested statistics
-        stats = []
-        for op in vals:
-            for stat in self.stats:
-                stats.append(PropertyStats().calc_stat(op, stat))
-
-        # If desired, compute covariances
-        if self.covariance:
-            if len(s) == 1:
-                stats.extend([0] * int(len(vals) * (len(vals) - 1) / 2))
-            else:
-                covar = np.cov(vals)
-                tri_ind = np.triu_indices(len(vals), 1)
-                stats.extend(covar[tri_ind].tolist())
+            return vals.tolist()
 
-        return stats
+        return self._compute_stats(vals, nsites_total=len(s))
 
     def feature_labels(self):
         if not hasattr(self, "elements_") or self.elements_ is None:
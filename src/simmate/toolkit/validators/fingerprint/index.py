@@ -0,0 +1,322 @@
+# -*- coding: utf-8 -*-
+
+import json
+from pathlib import Path
+
+import numpy
+
+from simmate.toolkit.validators.fingerprint.array import FingerprintArray
+
+
+class FingerprintIndex:
+    """
+    A nearest-neighbor index over fingerprint vectors. This lets you find the
+    most similar fingerprints (top-k) or all fingerprints within some distance
+    (radius) without comparing against every vector in a pool.
+
+    Vectors can be added incrementally and the index can be saved to and loaded
+    from disk.
+
+    ``` python
+    index = FingerprintIndex(metric="euclidean")
+    index.add(vectors, ids)
+
+    # the 5 closest vectors
+    ids, distances = index.query(vector, k=5)
+
+    # all vectors within a distance of 0.1
+    ids, distances = index.query_radius(vector, radius=0.1)
+
+    index.save("my_index.npz")
+    index = FingerprintIndex.load("my_index.npz")
+    ```
+
+    Two backends are available:
+
+    - `balltree`: an exact search using scikit-learn's BallTree. Newly added
+      vectors are compared directly until there are enough of them to make
+      rebuilding the tree worthwhile.
+    - `hnsw`: an approximate search using the `hnswlib` package, which is
+      faster for very large pools (>1 million). Install it with
+      `pip install hnswlib`.
+
+    By default (`auto`), `hnsw` is used if it is installed and `balltree`
+    is used otherwise.
+    """
+
+    metrics = ["euclidean", "cosine"]
+
+    def __init__(
+        self,
+        metric: str = "euclidean",
+        backend: str = "auto",
+        rebuild_fraction: float = 0.1,
+    ):
+        """
+        #### Parameters
+
+        - `metric`:
+            The distance to use. Either "euclidean" or "cosine", where cosine
+            distances are given as 1 - (cosine similarity).
+
+        - `backend`:
+            Either "auto", "balltree", or "hnsw". See the class description.
+
+        - `rebuild_fraction`:
+            For the balltree backend, the tree is rebuilt once the number of
+            vectors added since the last build is larger than this fraction
+            of the vectors in the tree.
+        """
+        if metric not in self.metrics:
+            raise Exception(f"Unknown metric '{metric}'. Options are {self.metrics}")
+
+        if backend == "auto":
+            try:
+                import hnswlib  # noqa: F401
+
+                backend = "hnsw"
+            except ModuleNotFoundError:
+                backend = "balltree"
+        elif backend == "hnsw":
+            try:
+                import hnswlib  # noqa: F401
+            except ModuleNotFoundError:
+                raise ModuleNotFoundError(
+                    "You must have hnswlib installed to use the hnsw backend. "
+                    "Install it with 'pip install hnswlib'"
+                )
+        elif backend != "balltree":
+            raise Exception(f"Unknown backend '{backend}'")
+
+        self.metric = metric
+        self.backend = backend
+        self.rebuild_fraction = rebuild_fraction
+
+        # Both are stored in growable arrays so that adding vectors one at a
+        # time does not copy all previous vectors
+        self.vectors = FingerprintArray()
+        self._ids = FingerprintArray(dtype=numpy.int64)
+        self._tree = None
+        self._ntree = 0  # the number of vectors included in the tree
+
+        self.metadata = {}
+        """
+        Extra information that is saved with the index, such as what has
+        been added so far. This must be JSON-serializable.
+        """
+
+    def __len__(self) -> int:
+        return len(self._ids)
+
+    @property
+    def ids(self) -> numpy.ndarray:
+        """
+        The id of each vector in the index (in the order they were added)
+        """
+        return self._ids.data[:, 0] if len(self) else numpy.array([], dtype=int)
+
+    # -------------------------------------------------------------------------
+    # Adding vectors
+    # -------------------------------------------------------------------------
+
+    def add(self, vectors: numpy.ndarray, ids: list[int]):
+        """
+        Adds new vectors to the index, where each vector has an integer id
+        (such as the id of the structure it came from).
+        """
+        vectors = self._prepare_vectors(vectors)
+        if not len(vectors):
+            return
+
+        self.vectors.extend(vectors)
+        self._ids.extend(numpy.asarray(ids, dtype=numpy.int64).reshape(-1, 1))
+
+        if self.backend == "hnsw":
+            self._add_to_hnsw(vectors)
+        elif len(self) - self._ntree > max(self.rebuild_fraction * self._ntree, 100):
+            self._build_balltree()
+
+    def _prepare_vectors(self, vectors: numpy.ndarray) -> numpy.ndarray:
+        vectors = numpy.array(vectors, dtype=numpy.float64)
+        if vectors.ndim == 1:
+            vectors = vectors.reshape(1, -1)
+        # For cosine distances, we normalize all vectors so that euclidean
+        # distances can be used for the search. This lets us use the same
+        # search methods for both metrics.
+        if self.metric == "cosine":
+            norms = numpy.linalg.norm(vectors, axis=1, keepdims=True)
+            vectors = vectors / numpy.where(norms == 0, 1, norms)
+        return vectors
+
+    def _build_balltree(self):
+        from sklearn.neighbors import BallTree
+
+        self._tree = BallTree(self.vectors.data)
+        self._ntree = len(self.vectors)
+
+    def _add_to_hnsw(self, vectors: numpy.ndarray):
+        import hnswlib
+
+        if self._tree is None:
+            self._tree = hnswlib.Index(space="l2", dim=vectors.shape[1])
+            self._tree.init_index(max_elements=max(len(vectors), 1000))
+        # grow the index in large steps, as resizing is slow
+        if len(self) > self._tree.get_max_elements():
+            self._tree.resize_index(2 * len(self))
+        # labels are the position of each vector (rather than its id)
+        self._tree.add_items(vectors, numpy.arange(self._ntree, len(self)))
+        self._ntree = len(self)
+
+    # -------------------------------------------------------------------------
+    # Searching
+    # -------------------------------------------------------------------------
+
+    def query(self, vector: numpy.ndarray, k: int = 1) -> tuple:
+        """
+        Finds the `k` vectors closest to the one given. Returns a tuple of
+        (ids, distances) with the closest vector first.
+        """
+        if not len(self):
+            return numpy.array([], dtype=int), numpy.array([])
+
+        vector = self._prepare_vectors(vector)
+        k = min(k, len(self))
+
+        if self.backend == "hnsw":
+            self._tree.set_ef(max(k, 50))
+            positions, distances = self._tree.knn_query(vector, k=k)
+            positions, distances = positions[0], numpy.sqrt(distances[0])
+        else:
+            positions, distances = self._get_balltree_candidates(vector, k=k)
+            order = numpy.argsort(distances)[:k]
+            positions, distances = positions[order], distances[order]
+
+        return self.ids[positions], self._convert_distances(distances)
+
+    def query_radius(self, vector: numpy.ndarray, radius: float) -> tuple:
+        """
+        Finds all vectors within a given distance of the one given. Returns a
+        tuple of (ids, distances) sorted with the closest vector first.
+        """
+        if not len(self):
+            return numpy.array([], dtype=int), numpy.array([])
+
+        vector = self._prepare_vectors(vector)
+        # convert the radius to a euclidean distance of normalized vectors
+        if self.metric == "cosine":
+            radius = numpy.sqrt(2 * radius)
+
+        if self.backend == "hnsw":
+            # hnsw doesn't support radius searches, so we repeat a top-k search
+            # with a larger k until we find a vector outside of the radius
+            k = 10
+            while True:
+                ids, distances = self.query(vector, k=k)
+                distances = self._convert_distances(distances, inverse=True)
+                if distances[-1] > radius or k >= len(self):
+                    break
+                k *= 4
+            keep = distances <= radius
+            return ids[keep], self._convert_distances(distances[keep])
+
+        positions, distances = self._get_balltree_candidates(vector, radius=radius)
+        keep = distances <= radius
+        positions, distances = positions[keep], distances[keep]
+        order = numpy.argsort(distances)
+        return self.ids[positions[order]], self._convert_distances(distances[order])
+
+    def _get_balltree_candidates(
+        self,
+        vector: numpy.ndarray,
+        k: int = None,
+        radius: float = None,
+    ) -> tuple:
+        # Vectors that were added after the tree was built are compared
+        # directly, so we combine those with the results from the tree.
+        positions = []
+        distances = []
+
+        if self._tree is not None and self._ntree:
+            if radius is not None:
+                tree_positions, tree_distances = self._tree.query_radius(
+                    vector, r=radius, return_distance=True
+                )
+            else:
+                tree_distances, tree_positions = self._tree.query(
+                    vector, k=min(k, self._ntree)
+                )
+            positions.append(tree_positions[0])
+            distances.append(tree_distances[0])
+
+        if len(self) > self._ntree:
+            new_vectors = self.vectors[self._ntree :]
+            positions.append(numpy.arange(self._ntree, len(self)))
+            distances.append(numpy.linalg.norm(new_vectors - vector, axis=1))
+
+        return numpy.concatenate(positions).astype(int), numpy.concatenate(distances)
+
+    def _convert_distances(self, distances, inverse: bool = False):
+        # For normalized vectors, the cosine distance is half of the squared
+        # euclidean distance
+        if self.metric != "cosine":
+            return distances
+        return numpy.sqrt(2 * distances) if inverse else distances ** 2 / 2
+
+    # -------------------------------------------------------------------------
+    # Saving and loading
+    # -------------------------------------------------------------------------
+
+    def save(self, filename: Path | str):
+        """
+        Writes the index to a file (in numpy's `.npz` format). For the hnsw
+        backend, the graph is also written to a file of the same name with a
+        `.hnsw` extension.
+        """
+        filename = Path(filename)
+        # we give an open file so that numpy doesn't change the file extension
+        with filename.open("wb") as file:
+            numpy.savez(
+                file,
+                vectors=self.vectors.data,
+                ids=self.ids,
+                metric=self.metric,
+                backend=self.backend,
+                rebuild_fraction=self.rebuild_fraction,
+                metadata=json.dumps(self.metadata),
+            )
+        if self.backend == "hnsw" and self._tree is not None:
+            self._tree.save_index(str(filename.with_suffix(".hnsw")))
+
+    @classmethod
+    def load(cls, filename: Path | str):
+        """
+        Loads an index that was written with the `save` method.
+        """
+        filename = Path(filename)
+        with numpy.load(filename) as data:
+            index = cls(
+                metric=str(data["metric"]),
+                backend=str(data["backend"]),
+                rebuild_fraction=float(data["rebuild_fraction"]),
+            )
+            index.metadata = json.loads(str(data["metadata"]))
+            if data["ids"].size:
+                index.vectors.extend(data["vectors"])
+                index._ids.extend(data["ids"].reshape(-1, 1))
+
+        if not len(index):
+            return index
+
+        hnsw_filename = filename.with_suffix(".hnsw")
+        if index.backend == "hnsw" and hnsw_filename.exists():
+            import hnswlib
+
+            index._tree = hnswlib.Index(space="l2", dim=index.vectors.shape[1])
+            index._tree.load_index(str(hnsw_filename), max_elements=len(index))
+            index._ntree = len(index)
+        elif index.backend == "hnsw":
+            index._add_to_hnsw(index.vectors.data)
+        else:
+            index._build_balltree()
+
+        return index
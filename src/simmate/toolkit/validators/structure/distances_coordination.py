@@ -1,17 +1,183 @@
 # -*- coding: utf-8 -*-
 
-from simmate.toolkit.validators import Validator
+import math
+import warnings
+from collections import namedtuple
+
 import numpy as np
 import pandas as pd
-import math
 from pymatgen.analysis.molecule_structure_comparator import CovalentRadius
-import warnings
 from scipy.spatial import Voronoi
-from collections import namedtuple
 
+from simmate.toolkit.validators import Validator
 
 NNData= namedtuple("NNData", ["all_nninfo", "cn_weights", "cn_nninfo"])
 
+
+class VoronoiTessellation:
+    """
+    A Voronoi tessellation of a set of points that is computed once and then
+    reused for every coordination check on those points.
+
+    Lookups of each point's faces (and their solid angles and volumes) are
+    precomputed with numpy, rather than scanning all faces of the tessellation
+    for every point that is checked. Face geometry is only computed for the
+    points that are asked for, and is then cached.
+
+    #### Parameters
+
+    - `points`:
+        A (N, 3) array of cartesian coordinates
+
+    - `labels`:
+        The element of each point
+
+    - `indices`:
+        The site index of each point in the original structure (e.g. the
+        index of a sliced dataframe). Defaults to the position of each point.
+    """
+
+    def __init__(self, points, labels=None, indices=None):
+        self.points = np.asarray(points, dtype=float)
+        self.labels = np.asarray(labels) if labels is not None else None
+        self.indices = (
+            np.asarray(indices) if indices is not None else np.arange(len(points))
+        )
+        self.voronoi = Voronoi(self.points)
+
+        # For each point, we store the faces (ridges) that include it. These
+        # are kept in the same order as scipy's ridge_points.
+        ridge_points = self.voronoi.ridge_points
+        nridges = len(ridge_points)
+        owners = np.concatenate([ridge_points[:, 0], ridge_points[:, 1]])
+        ridge_ids = np.concatenate([np.arange(nridges), np.arange(nridges)])
+        order = np.lexsort((ridge_ids, owners))
+        self._point_ridges = ridge_ids[order]
+        self._offsets = np.searchsorted(owners[order], np.arange(len(points) + 1))
+
+        self._positions = {index: i for i, index in enumerate(self.indices)}
+        self._faces = {}
+
+    def get_position(self, index):
+        """
+        Gives the position in `points` of a site index from `indices`
+        """
+        return self._positions[index]
+
+    def get_neighbors(self, point):
+        """
+        Gives the position of every point that shares a face with the given one
+        """
+        ridges = self._point_ridges[self._offsets[point] : self._offsets[point + 1]]
+        pairs = self.voronoi.ridge_points[ridges]
+        return np.where(pairs[:, 0] == point, pairs[:, 1], pairs[:, 0])
+
+    def get_faces(self, point) -> dict:
+        """
+        Gives the faces of a point's Voronoi cell as a dictionary of arrays
+        with one entry per face: the neighboring point ("neighbors"), the solid
+        angle of the face from the point ("solid_angle"), the volume of the
+        pyramid between the face and the point ("volume"), and the number of
+        vertices of the face ("n_verts").
+        """
+        if point in self._faces:
+            return self._faces[point]
+
+        ridges = self._point_ridges[self._offsets[point] : self._offsets[point + 1]]
+        center = self.points[point]
+        vertices = self.voronoi.vertices
+
+        # Each face is broken up into triangles (0, 1, 2), (0, 2, 3), ...
+        # which are all evaluated at once
+        triangles = []
+        triangle_faces = []
+        n_verts = []
+        for face, ridge in enumerate(ridges):
+            vind = self.voronoi.ridge_vertices[ridge]
+            n_verts.append(len(vind))
+            for j, k in zip(vind[1:], vind[2:]):
+                triangles.append((vind[0], j, k))
+                triangle_faces.append(face)
+        triangles = np.array(triangles, dtype=int).reshape(-1, 3)
+        triangle_faces = np.array(triangle_faces, dtype=int)
+
+        angles = solid_angle_triangles(
+            center,
+            vertices[triangles[:, 0]],
+            vertices[triangles[:, 1]],
+            vertices[triangles[:, 2]],
+        )
+        volumes = vol_tetra_many(
+            center,
+            vertices[triangles[:, 0]],
+            vertices[triangles[:, 1]],
+            vertices[triangles[:, 2]],
+        )
+
+        faces = {
+            "neighbors": self.get_neighbors(point),
+            "solid_angle": np.bincount(
+                triangle_faces, weights=angles, minlength=len(ridges)
+            ),
+            "volume": np.bincount(
+                triangle_faces, weights=volumes, minlength=len(ridges)
+            ),
+            "n_verts": np.array(n_verts),
+        }
+        self._faces[point] = faces
+        return faces
+
+
+def vol_tetra_many(vt1, vt2, vt3, vt4):
+    """
+    Same as `DistancesCoordination.vol_tetra`, but for many tetrahedra at
+    once. Each input can be a single vertex or a (N, 3) array of vertices.
+    """
+    cross = np.cross(np.subtract(vt2, vt4), np.subtract(vt3, vt4))
+    return np.abs(np.sum(np.subtract(vt1, vt4) * cross, axis=-1)) / 6
+
+
+def solid_angle_triangles(center, vt1, vt2, vt3):
+    """
+    Gives the solid angle of many triangles (with vertices vt1, vt2, and vt3
+    as (N, 3) arrays) from a center point. Summing these for the triangles
+    (0, 1, 2), (0, 2, 3), ... of a face gives the same result as
+    `DistancesCoordination.solid_angle`.
+    """
+    # Following: https://en.wikipedia.org/wiki/Solid_angle#Tetrahedron
+    r0 = np.subtract(vt1, center)
+    ri = np.subtract(vt2, center)
+    rj = np.subtract(vt3, center)
+    n0 = np.linalg.norm(r0, axis=-1)
+    ni = np.linalg.norm(ri, axis=-1)
+    nj = np.linalg.norm(rj, axis=-1)
+
+    tp = np.abs(np.sum(r0 * np.cross(ri, rj), axis=-1))
+    # Faces can repeat a vertex, which gives triangles with no area. For these,
+    # the result depends on rounding (zero gives an angle of 2*pi, while a
+    # tiny value gives ~0), so we compute them exactly as `solid_angle` does.
+    repeated = np.flatnonzero(
+        np.all(r0 == ri, axis=-1)
+        | np.all(ri == rj, axis=-1)
+        | np.all(r0 == rj, axis=-1)
+    )
+    for i in repeated:
+        tp[i] = np.abs(np.dot(r0[i], np.cross(ri[i], rj[i])))
+    de = (
+        n0 * ni * nj
+        + nj * np.sum(r0 * ri, axis=-1)
+        + ni * np.sum(r0 * rj, axis=-1)
+        + n0 * np.sum(ri * rj, axis=-1)
+    )
+    with np.errstate(divide="ignore", invalid="ignore"):
+        angle = np.where(
+            de == 0,
+            np.where(tp > 0, 0.5 * np.pi, -0.5 * np.pi),
+            np.arctan(tp / de),
+        )
+    return np.where(angle > 0, angle, angle + np.pi) * 2
+
+
 class DistancesCoordination(Validator):
     def __init__(self, MinBondLength, BulkCoordinationRange, SurfaceCoordinationRange, SurfaceDistance):
             self.min_distances = MinBondLength
@@ -74,71 +240,40 @@ class DistancesCoordination(Validator):
     
         return angle
 
-
-    def get_site_statistics(self, voro, site_idx, struct, sliced_df):
+    def get_site_statistics(self, tessellation, site_idx, struct):
         site_statistics_dict = {}
-        all_vertices = voro.vertices
-        center_coords = voro.points[site_idx]
-        
-        for nn, vind in voro.ridge_dict.items():
-            # Get only those that include the site in question
-            if site_idx in nn:
-#                breakpoint()
-                other_site = nn[0] if nn[1] == site_idx else nn[1]
-                
-                # if -1 in vind:
-                #     # -1 indices correspond to the Voronoi cell
-                #     #  missing a face
-                #     raise RuntimeError("This structure is pathological, infinite vertex in the Voronoi construction")
-
-                # Get the solid angle of the face
-                
-                facets = [all_vertices[i] for i in vind]
-                angle = self.solid_angle(center_coords, facets)
-
-                # Compute the volume of associated with this face
-                volume = 0
-                # qvoronoi returns vertices in CCW order, so I can akak
-                # the face up in to segments (0,1,2), (0,2,3), ... to compute
-                # its area where each number is a vertex size
-                for j, k in zip(vind[1:], vind[2:]):
-                    volume += self.vol_tetra(
-                        center_coords,
-                        all_vertices[vind[0]],
-                        all_vertices[j],
-                        all_vertices[k],
-                    )
-
-                # Compute the distance of the site to the face
-                true_other_site = sliced_df.iloc[other_site].name
-                
-
-                
-                face_dist = np.linalg.norm(center_coords - struct.sites[true_other_site].coords) / 2
-                
-
-                # Compute the area of the face (knowing V=Ad/3)
-                face_area = 3 * volume / face_dist
-                
-                
-                
-
-                # Compute the normal of the facet
-                normal = np.subtract(struct.sites[true_other_site].coords, center_coords)
-                normal /= np.linalg.norm(normal)
-
-                # Store by face index
-                site_statistics_dict[other_site] = {
-                    "site": struct.sites[true_other_site],
-                    "normal": normal,
-                    "solid_angle": angle,
-                    "volume": volume,
-                    "face_dist": face_dist,
-                    "area": face_area,
-                    "n_verts": len(vind),
-                    "true_index": true_other_site,
-                    "index": other_site
-                }
+        center_coords = tessellation.points[site_idx]
+        faces = tessellation.get_faces(site_idx)
+
+        # Compute the distance of the site to each face (and each face normal)
+        true_other_sites = tessellation.indices[faces["neighbors"]]
+        other_coords = np.array(
+            [
+                struct.sites[true_other_site].coords
+                for true_other_site in true_other_sites
+            ]
+        ).reshape(-1, 3)
+        displacements = other_coords - center_coords
+        distances = np.linalg.norm(displacements, axis=1)
+        face_dists = distances / 2
+
+        # Compute the area of each face (knowing V=Ad/3)
+        face_areas = 3 * faces["volume"] / face_dists
+        normals = displacements / distances[:, None]
+
+        for i, other_site in enumerate(faces["neighbors"].tolist()):
+            # Store by face index
+            site_statistics_dict[other_site] = {
+                "site": struct.sites[true_other_sites[i]],
+                "normal": normals[i],
+                "solid_angle": faces["solid_angle"][i],
+                "volume": faces["volume"][i],
+                "face_dist": face_dists[i],
+                "area": face_areas[i],
+                "n_verts": faces["n_verts"][i],
+                "true_index": true_other_sites[i],
+                "index": other_site,
+            }
 
         return site_statistics_dict
 
@@ -264,36 +399,32 @@ class DistancesCoordination(Validator):
 
         return (area1 - area2) / (0.25 * math.pi * r**2)
 
-
-    def get_coordination(self,  move_indices, voro, sliced_df, points, struct):
-        
+    def get_coordination(self, move_indices, tessellation, struct):
         neighbor_list = []
         distance_list = []
         element_list = []
         coordination_number = int()
-        
+        points = tessellation.points
+
         """ Check that all bonds are longer than minimum distance"""
        
         for move_index in move_indices:
             # get absolute row position of move_index in sliced_df
             # this corresponds to absolute row position in the points array
-            true_move_index = sliced_df.index.get_loc(move_index)
-            neighbors = [x for x in voro.ridge_points if true_move_index in x] 
-            #ridge_points is a pair of atoms; we remove the pair that is not the center atom
-            neighbors = [a if b == true_move_index else b for a,b in neighbors]
-            
-            distances = []
+            true_move_index = tessellation.get_position(move_index)
+            neighbors = tessellation.get_neighbors(true_move_index)
+
             # get distances to neighbors
-            for neighbor in neighbors:
-                distances.append(np.linalg.norm(points[true_move_index]-points[neighbor]))
-            
+            distances = np.linalg.norm(
+                points[true_move_index] - points[neighbors], axis=1
+            )
+
             # compare distances to allowed distances based on element identity
             # return false if the distance is too short
-            center_element = sliced_df.at[move_index, 'el']
-            # breakpoint()
-            
-            for i,neighbor in enumerate(neighbors):
-                neighbor_element = sliced_df.iat[neighbor, sliced_df.columns.get_loc("el")]
+            center_element = tessellation.labels[true_move_index]
+
+            for i, neighbor in enumerate(neighbors):
+                neighbor_element = tessellation.labels[neighbor]
                 try:
                     allowed_distance = self.min_distances[(center_element, neighbor_element)]
                 except:
@@ -305,10 +436,7 @@ class DistancesCoordination(Validator):
             
         
 
-            """  Check that all coordination numbers fall within a range """
-        
-               
-            nns = self.get_site_statistics(voro, true_move_index, struct, sliced_df)
+            nns = self.get_site_statistics(tessellation, true_move_index, struct)
             nn_info = self._extract_nn_info(struct, nns)
     
             # we are ignoring samples that have explicity porosity.
@@ -421,11 +549,11 @@ class DistancesCoordination(Validator):
             
 
             for n in nn:
-                index = sliced_df.iloc[n['site_index']].name
+                index = tessellation.indices[n["site_index"]]
                 neighbor_list.append(index)
                 dist = nns[n['site_index']]['face_dist']*2
                 distance_list.append(dist)
-                el = sliced_df.iloc[n['site_index']]['el']
+                el = tessellation.labels[n["site_index"]]
                 element_list.append(el)
         return element_list,distance_list,center_element,coordination_number, neighbor_list
 
@@ -523,15 +651,25 @@ class DistancesCoordination(Validator):
                 pass        
             
             """ Call Voronoi function """
-          
-            points = sliced_df[["x", "y", "z"]].to_numpy()
-            voro = Voronoi(points)
-        
-        
+
+            # The tessellation is shared by the checks of the moved atom and
+            # all of its neighbors
+            tessellation = VoronoiTessellation(
+                points=sliced_df[["x", "y", "z"]].to_numpy(),
+                labels=sliced_df["el"].to_numpy(),
+                indices=sliced_df.index.to_numpy(),
+            )
+
             """ Checking coordination number """
             # run pymatgen-modified coordination number function on moved atom
             try:
-                element_list,distance_list,el,coordination_number,neighbor_list = self.get_coordination(move_images, voro, sliced_df, points, struct)
+                (
+                    element_list,
+                    distance_list,
+                    el,
+                    coordination_number,
+                    neighbor_list,
+                ) = self.get_coordination(move_images, tessellation, struct)
             except:
                 return False  # when distances are too short
             
@@ -567,7 +705,13 @@ class DistancesCoordination(Validator):
             
             for neighbor in neighbor_list:
                 try:
-                    element_list,distance_list,el,coordination_number,neighbor_list = self.get_coordination([neighbor], voro, sliced_df, points, struct)
+                    (
+                        element_list,
+                        distance_list,
+                        el,
+                        coordination_number,
+                        neighbor_list,
+                    ) = self.get_coordination([neighbor], tessellation, struct)
                 except:
                     return False  # when distances are too short
                 
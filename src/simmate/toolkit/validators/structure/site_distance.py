@@ -1,7 +1,5 @@
 # -*- coding: utf-8 -*-
 
-import itertools
-
 import numpy
 
 from simmate.toolkit.validators.base import Validator
@@ -26,6 +24,12 @@ class SiteDistance(Validator):
 
 
 class SiteDistanceMatrix(Validator):
+    chunk_size: int = 1000
+    """
+    The number of sites to search for neighbors at a time. Checks stop after
+    the first chunk that has a distance that is too short.
+    """
+
     def __init__(
         self,
         composition,
@@ -65,44 +69,71 @@ class SiteDistanceMatrix(Validator):
                 max_sites=-1
             )
 
-    def check_structure(self, structure):
-        # now using the matrix above, we need to look at the structure
-        # and determine if there are any distances that are below matrix limits
-        # to save time, we want to iterate through each site and see that the
-        # site meets all requirements. As soon as any requirement is failed for
-        # any site, the whole loop ends
+        # Because of the bug above, we compare sites by their element symbol
+        # and make a matrix of the cutoffs for each pair of symbols. When an
+        # element has several species, a pair of sites must meet the cutoffs
+        # of all of them, so the largest one is used. An extra row and column
+        # of zeros are added for elements that aren't in the composition.
+        self.symbol_indices = {}
+        for specie in self.composition:
+            self.symbol_indices.setdefault(specie.symbol, len(self.symbol_indices))
+        nsymbols = len(self.symbol_indices)
+        self.symbol_distance_matrix = numpy.zeros((nsymbols + 1, nsymbols + 1))
+        for i1, specie1 in enumerate(self.composition):
+            for i2, specie2 in enumerate(self.composition):
+                j1 = self.symbol_indices[specie1.symbol]
+                j2 = self.symbol_indices[specie2.symbol]
+                self.symbol_distance_matrix[j1, j2] = max(
+                    self.symbol_distance_matrix[j1, j2],
+                    self.element_distance_matrix[i1][i2],
+                )
 
-        # OPTIMIZE: Maybe instead of making all comparisons, we can only
-        # look at nearest neighbors
+    def check_structure(self, structure):
+        # Map each site to its row of the cutoff matrix. Elements that aren't in
+        # our composition get the final row, which is all zeros.
+        site_symbols = numpy.array(
+            [
+                self.symbol_indices.get(site.specie.symbol, len(self.symbol_indices))
+                for site in structure
+            ],
+            dtype=int,
+        )
 
-        # we get a massive speedup if we make this matrix upfront
-        # for extremely large structures with many sites, this might not be the
-        # case though
-        dm = structure.distance_matrix
+        # now using the matrix above, we need to look at the structure
+        # and determine if there are any distances that are below matrix limits.
+        # Only site pairs within the largest cutoff can fail, so rather than
+        # building the full distance matrix, we find the neighbors of each site
+        # within this cutoff (pymatgen does this with a cell list). To save
+        # time, we do this for a chunk of sites at a time and stop as soon as
+        # any chunk fails.
+        max_cutoff = self.symbol_distance_matrix.max()
+        if max_cutoff <= 0:
+            return True
+
+        for start in range(0, len(structure), self.chunk_size):
+            # NOTE: sites here are PeriodicSite objects, so we search all
+            # periodic images. This is extremely important because we want
+            # nearest image distance, which might not be in an adjacent cell!
+            centers, neighbors, _, distances = structure.get_neighbor_list(
+                r=max_cutoff,
+                sites=structure.sites[start : start + self.chunk_size],
+                exclude_self=False,
+            )
+            centers += start
+
+            # skip if we are looking at the same site (or its periodic image)
+            different_sites = centers != neighbors
+            centers = centers[different_sites]
+            neighbors = neighbors[different_sites]
+            distances = distances[different_sites]
+
+            # compare the distances to the cutoff matrix
+            cutoffs = self.symbol_distance_matrix[
+                site_symbols[centers], site_symbols[neighbors]
+            ]
+            if (distances < cutoffs).any():
+                # one False is enough to stop - end the whole function
+                return False
 
-        # go through each element-element combo and check distances
-        for i1, element1 in enumerate(self.composition):
-            element1_indicies = structure.indices_from_symbol(element1.symbol)
-            for i2, element2 in enumerate(self.composition):
-                # grab the cutoff distance for these two specie/element types
-                dist_cutoff = self.element_distance_matrix[i1][i2]
-                element2_indicies = structure.indices_from_symbol(element2.symbol)
-                combos = itertools.product(element1_indicies, element2_indicies)
-                for s1, s2 in combos:
-                    # skip if we are looking at the same site
-                    if s1 == s2:
-                        continue
-                    # grab the periodic sites
-                    # NOTE: sites here are PeriodicSite objects, not Site objects
-                    # This is extremely important because we want nearest
-                    # image distance, which might not be in an adjacent cell!
-                    # site1 = structure[s1]
-                    # site2 = structure[s2]
-                    # Now get the distance between the two periodic sites
-                    distance = dm[s1][s2]
-                    # compare the distance to the cutoff matrix
-                    if distance < dist_cutoff:
-                        # one False is enough to stop - end the whole function
-                        return False
         # the function will only reach this point if all distance criteria are met
         return True
@@ -0,0 +1,112 @@
+# -*- coding: utf-8 -*-
+
+import numpy
+import pandas
+import pytest
+from pymatgen.core import Lattice, Structure
+
+from simmate.toolkit.validators.structure import DistancesCoordination
+from simmate.toolkit.validators.structure.distances_coordination import (
+    VoronoiTessellation,
+)
+
+
+def test_voronoi_tessellation():
+    points = numpy.random.default_rng(12345).random((40, 3)) * 10
+    tessellation = VoronoiTessellation(points, indices=numpy.arange(40) + 100)
+    voro = tessellation.voronoi
+
+    assert tessellation.get_position(105) == 5
+
+    for point in [0, 5, 17]:
+        faces = tessellation.get_faces(point)
+        # compare to a scan over all faces, as done for a single face
+        expected = {}
+        for pair, vind in voro.ridge_dict.items():
+            if point not in pair:
+                continue
+            other = pair[0] if pair[1] == point else pair[1]
+            vertices = [voro.vertices[i] for i in vind]
+            volume = sum(
+                DistancesCoordination.vol_tetra(
+                    voro.points[point],
+                    voro.vertices[vind[0]],
+                    voro.vertices[j],
+                    voro.vertices[k],
+                )
+                for j, k in zip(vind[1:], vind[2:])
+            )
+            expected[other] = (
+                DistancesCoordination.solid_angle(voro.points[point], vertices),
+                volume,
+                len(vind),
+            )
+
+        assert sorted(faces["neighbors"]) == sorted(expected)
+        assert sorted(tessellation.get_neighbors(point)) == sorted(expected)
+        for i, other in enumerate(faces["neighbors"]):
+            angle, volume, n_verts = expected[other]
+            assert faces["solid_angle"][i] == pytest.approx(angle)
+            assert faces["volume"][i] == pytest.approx(volume)
+            assert faces["n_verts"][i] == n_verts
+
+        # results are cached
+        assert tessellation.get_faces(point) is faces
+
+
+def test_distances_coordination():
+    # a random slab of Al and O where no atoms are closer than 1.8 Angstroms
+    generator = numpy.random.default_rng(1)
+    coords = []
+    while len(coords) < 60:
+        coord = generator.random(3) * [10, 10, 5] + [0, 0, 3]
+        if all(numpy.linalg.norm(coord - other) > 1.8 for other in coords):
+            coords.append(coord)
+    structure = Structure(
+        Lattice.cubic(10),
+        ["Al"] * 24 + ["O"] * 36,
+        coords,
+        coords_are_cartesian=True,
+    )
+    for site in structure.sites:
+        site.oxi_state = 3 if site.species_string == "Al" else -2
+    structure.interpolated_radii = [("Al", 0.55), ("O", 1.35)]
+    z = structure.cart_coords[:, 2]
+    structure.thickness_z = {
+        "min_z": z.min(),
+        "max_z": z.max(),
+        "thickness": z.max() - z.min(),
+    }
+
+    def set_dataframes():
+        df = pandas.DataFrame(
+            [[*site.coords, site.species_string] for site in structure.sites],
+            columns=["x", "y", "z", "el"],
+        )
+        structure.xyz_df = {
+            "df_x": df.sort_values("x"),
+            "df_y": df.sort_values("y"),
+            "df_z": df.sort_values("z"),
+        }
+
+    validator = DistancesCoordination(
+        MinBondLength={("Al", "Al"): 1.5, ("Al", "O"): 1.5, ("O", "O"): 1.5},
+        BulkCoordinationRange={"Al": [-1, 99], "O": [-1, 99]},
+        SurfaceCoordinationRange={"Al": [-1, 99], "O": [-1, 99]},
+        SurfaceDistance=1.5,
+    )
+
+    set_dataframes()
+    structure.move_indices = [30]
+    assert validator.check_structure(structure)
+
+    # move an atom so that it is too close to another
+    structure.replace(
+        30,
+        "O",
+        coords=structure.cart_coords[10] + [1.0, 0, 0],
+        coords_are_cartesian=True,
+    )
+    structure.sites[30].oxi_state = -2
+    set_dataframes()
+    assert not validator.check_structure(structure)
@@ -0,0 +1,282 @@
+# -*- coding: utf-8 -*-
+
+import numpy
+import pytest
+from matminer.featurizers.base import BaseFeaturizer
+from matminer.featurizers.utils.stats import PropertyStats
+from scipy.spatial.distance import cosine
+
+from simmate.toolkit.validators.fingerprint import (
+    FingerprintArray,
+    FingerprintValidator,
+    RdfFingerprint,
+)
+from simmate.toolkit.validators.fingerprint.featurizers import (
+    PartialsSiteStatsFingerprint,
+    SiteStatsFingerprint,
+)
+
+
+class DummyFingerprint(FingerprintValidator):
+    @staticmethod
+    def get_featurizer(**kwargs):
+        return None
+
+
+class DummyCustomFingerprint(DummyFingerprint):
+    comparison_mode = "custom"
+
+    def get_fingerprint_distance(self, fingerprint1, fingerprint2):
+        return numpy.abs(fingerprint1 - fingerprint2).sum()
+
+
+class DummyBatchFingerprint(DummyCustomFingerprint):
+    def get_fingerprint_distances(self, fingerprint, fingerprint_pool):
+        return numpy.abs(fingerprint_pool - fingerprint).sum(axis=1)
+
+
+@pytest.mark.parametrize(
+    "validator_class, distance_function",
+    [
+        (DummyFingerprint, lambda fp1, fp2: numpy.linalg.norm(fp1 - fp2)),
+        (DummyCustomFingerprint, lambda fp1, fp2: numpy.abs(fp1 - fp2).sum()),
+        (DummyBatchFingerprint, lambda fp1, fp2: numpy.abs(fp1 - fp2).sum()),
+    ],
+)
+def test_check_fingerprint(validator_class, distance_function):
+    validator = validator_class(distance_tolerance=0.5)
+    validator.comparison_chunk_size = 7
+
+    generator = numpy.random.default_rng(12345)
+    pool = generator.random((50, 4))
+    fingerprints = numpy.concatenate([generator.random((50, 4)), pool + 0.01])
+
+    # the vectorized check must match a one-at-a-time comparison
+    all_expected = []
+    for fingerprint in fingerprints:
+        expected = all(
+            distance_function(fingerprint, fp2) >= validator.distance_tolerance
+            for fp2 in pool
+        )
+        assert validator._check_fingerprint(fingerprint, pool) == expected
+        all_expected.append(expected)
+
+    # as well as checking many fingerprints at once
+    is_unique = validator._check_many_fingerprints(fingerprints, pool)
+    assert is_unique.tolist() == all_expected
+
+    assert validator._check_fingerprint(fingerprints[0], numpy.array([]))
+
+
+@pytest.mark.parametrize("comparison_mode", ["linalg_norm", "cos"])
+def test_check_fingerprint_with_index(comparison_mode):
+    class DummyModeFingerprint(DummyFingerprint):
+        pass
+
+    DummyModeFingerprint.comparison_mode = comparison_mode
+    tolerance = 0.2 if comparison_mode == "linalg_norm" else 0.005
+    validator = DummyModeFingerprint(distance_tolerance=tolerance, use_index=True)
+
+    generator = numpy.random.default_rng(12345)
+    pool = generator.random((500, 5))
+    validator._add_many_to_pool(pool[:250], [{}] * 250)
+    for fingerprint in pool[250:]:
+        validator._add_to_pool(fingerprint)
+    assert len(validator.fingerprint_index) == 500
+
+    # the index must give the same results as a full scan of the pool
+    fingerprints = numpy.concatenate(
+        [generator.random((200, 5)), pool[:200] + generator.normal(0, 0.05, (200, 5))]
+    )
+    verdicts = []
+    for fingerprint in fingerprints:
+        is_unique = validator._check_fingerprint_with_index(fingerprint)
+        assert is_unique == validator._check_fingerprint(fingerprint, pool)
+        verdicts.append(is_unique)
+    assert any(verdicts) and not all(verdicts)
+
+    DummyCustomFingerprint()  # custom modes don't need an index
+    with pytest.raises(Exception):
+        DummyCustomFingerprint(use_index=True)
+
+
+@pytest.mark.parametrize("validator_class", [DummyFingerprint, DummyCustomFingerprint])
+def test_group_duplicates(validator_class):
+    validator = validator_class(distance_tolerance=0.5)
+    generator = numpy.random.default_rng(12345)
+    centers = generator.random((30, 4)) * 20
+    fingerprints = numpy.concatenate([centers, centers + 0.01, centers[:10] - 0.01])
+
+    groups = validator.group_duplicates(fingerprints)
+    assert len(groups) == 30
+    assert [group[0] for group in groups] == list(range(30))
+    assert groups[0] == [0, 30, 60]
+    assert groups[20] == [20, 50]
+    assert sorted(sum(groups, [])) == list(range(70))
+
+    # an index and a full scan give the same groups
+    if validator_class == DummyFingerprint:
+        custom_groups = DummyCustomFingerprint(distance_tolerance=0.03)
+        custom_groups.get_fingerprint_distance = lambda fp1, fp2: numpy.linalg.norm(
+            fp1 - fp2
+        )
+        validator.distance_tolerance = 0.03
+        assert validator.group_duplicates(
+            fingerprints
+        ) == custom_groups.group_duplicates(fingerprints)
+
+    assert validator.group_duplicates(numpy.empty((0, 4))) == []
+
+
+def test_cosine_distances():
+    validator = DummyFingerprint()
+    validator.comparison_mode = "cos"
+    generator = numpy.random.default_rng(12345)
+    fingerprint = generator.random(10)
+    pool = generator.random((20, 10))
+    distances = validator.get_fingerprint_distances(fingerprint, pool)
+    expected = [cosine(fingerprint, fp2) for fp2 in pool]
+    assert numpy.allclose(distances, expected)
+
+
+def test_rdf_fingerprint(sample_structures):
+    structures = list(sample_structures.values())[:4]
+    validator = RdfFingerprint(cutoff=5, structure_pool=structures[:2])
+    assert not validator.check_structure(structures[0])
+    assert validator.check_structure(structures[3])
+    assert len(validator.fingerprint_pool) == 3
+
+
+@pytest.mark.parametrize("use_index", [False, True])
+def test_check_structures(sample_structures, use_index):
+    structures = list(sample_structures.values())[:6]
+    candidates = structures[2:] + [structures[0], structures[3].copy()]
+
+    # checking many structures at once must match checking them in order
+    validator = RdfFingerprint(cutoff=5, structure_pool=structures[:2])
+    expected = [validator.check_structure(s) for s in candidates]
+    assert expected == [True, True, True, True, False, False]
+
+    validator = RdfFingerprint(
+        cutoff=5,
+        structure_pool=structures[:2],
+        use_index=use_index,
+    )
+    is_unique = validator.check_structures(candidates)
+    assert is_unique.tolist() == expected
+    assert len(validator.fingerprint_pool) == 6
+
+    # without adding to the pool, later copies aren't compared to earlier ones
+    validator = RdfFingerprint(cutoff=5, structure_pool=structures[:2])
+    is_unique = validator.check_structures(candidates, add_unique_to_pool=False)
+    assert is_unique.tolist() == [True, True, True, True, False, True]
+    assert len(validator.fingerprint_pool) == 2
+    assert not validator.check_structures([]).size
+
+
+@pytest.mark.parametrize("use_memmap", [False, True])
+def test_fingerprint_array(use_memmap, tmp_path):
+    filename = tmp_path / "pool.dat" if use_memmap else None
+    pool = FingerprintArray(capacity=2, filename=filename)
+    assert len(pool) == 0 and pool.size == 0
+
+    generator = numpy.random.default_rng(12345)
+    expected = generator.random((25, 3))
+    pool.append(expected[0])
+    pool.extend(expected[1:5])
+    for fingerprint in expected[5:]:
+        pool.append(fingerprint)
+
+    # capacity grows by doubling
+    assert len(pool) == 25
+    assert pool.capacity == 32
+    if use_memmap:
+        assert filename.stat().st_size == 32 * 3 * 8
+
+    # acts like a numpy array
+    assert numpy.array_equal(numpy.asarray(pool), expected)
+    assert numpy.array_equal(pool[3:6], expected[3:6])
+    assert numpy.allclose(pool - expected[0], expected - expected[0])
+    assert pool.shape == (25, 3)
+    assert all(numpy.array_equal(a, b) for a, b in zip(pool, expected))
+
+    with pytest.raises(ValueError):
+        pool.append([1, 2])
+
+
+def test_remove_duplicates(sample_structures):
+    structures = list(sample_structures.values())[:4]
+    validator = RdfFingerprint(cutoff=5)
+
+    unique = validator.remove_duplicates(structures + structures[:2])
+    assert all(s1 is s2 for s1, s2 in zip(unique, structures))
+    assert len(unique) == 4
+
+    # the key picks which duplicate is kept
+    copies = [structure.copy() for structure in structures[:2]]
+    unique = validator.remove_duplicates(
+        structures + copies,
+        key=lambda s: 0 if any(s is copy for copy in copies) else 1,
+    )
+    assert all(s1 is s2 for s1, s2 in zip(unique, copies + structures[2:]))
+    assert len(unique) == 4
+
+
+class DummySiteFeaturizer(BaseFeaturizer):
+    def featurize(self, s, idx):
+        x = s[idx].frac_coords
+        return [x.sum(), None if idx % 3 == 0 else numpy.sin(x[0] * 10), idx]
+
+    def feature_labels(self):
+        return ["a", "b", "c"]
+
+    def citations(self):
+        return []
+
+    def implementors(self):
+        return []
+
+
+def _site_stats_reference(site_featurizer, structure, stats, element=None):
+    # The (slower) one-feature-at-a-time method that the array method replaced
+    vals = [[] for _ in site_featurizer.feature_labels()]
+    for i, site in enumerate(structure.sites):
+        if element and site.specie.symbol != element:
+            continue
+        for j, opval in enumerate(site_featurizer.featurize(structure, i)):
+            vals[j].append(0.0 if opval is None else opval)
+    output = [PropertyStats().calc_stat(op, stat) for op in vals for stat in stats]
+    covar = numpy.cov(vals)
+    output += covar[numpy.triu_indices(len(vals), 1)].tolist()
+    return output
+
+
+def test_site_stats_fingerprint(sample_structures):
+    stats = ["mean", "std_dev", "minimum", "maximum", "range", "avg_dev"]
+    stats.append("holder_mean::2")  # not an array stat
+    featurizer = SiteStatsFingerprint(
+        DummySiteFeaturizer(),
+        stats=stats,
+        covariance=True,
+    )
+    partials_featurizer = PartialsSiteStatsFingerprint(
+        DummySiteFeaturizer(),
+        stats=stats,
+        covariance=True,
+    )
+
+    for structure in list(sample_structures.values())[:6]:
+        structure = structure.copy()
+        structure.make_supercell([2, 2, 2])
+
+        # array statistics must match matminer's exactly
+        expected = _site_stats_reference(featurizer.site_featurizer, structure, stats)
+        assert featurizer.featurize(structure) == expected
+
+        partials_featurizer.fit([structure])
+        expected = []
+        for element in partials_featurizer.elements_:
+            expected += _site_stats_reference(
+                featurizer.site_featurizer, structure, stats, element
+            )
+        assert partials_featurizer.featurize(structure).tolist() == expected
@@ -0,0 +1,65 @@
+# -*- coding: utf-8 -*-
+
+import numpy
+
+from simmate.toolkit import Composition, Structure
+from simmate.toolkit.validators.structure import SiteDistanceMatrix
+
+
+def test_site_distance_matrix():
+    composition = Composition("NaCl")
+    validator = SiteDistanceMatrix(composition, radius_method="atomic")
+    cutoffs = validator.element_distance_matrix
+
+    def check_with_distance_matrix(structure):
+        # compare every pair of sites, using the nearest-image distance
+        dm = structure.distance_matrix
+        for s1, site1 in enumerate(structure):
+            for s2, site2 in enumerate(structure):
+                i1 = composition.elements.index(site1.specie)
+                i2 = composition.elements.index(site2.specie)
+                if s1 != s2 and dm[s1][s2] < cutoffs[i1][i2]:
+                    return False
+        return True
+
+    generator = numpy.random.default_rng(12345)
+    structures = []
+    results = []
+    for _ in range(20):
+        structure = Structure(
+            lattice=numpy.eye(3) * generator.uniform(4, 7),
+            species=["Na", "Cl"] * 4,
+            coords=generator.random((8, 3)),
+        )
+        result = validator.check_structure(structure)
+        assert result == check_with_distance_matrix(structure)
+        structures.append(structure)
+        results.append(result)
+    # make sure both outcomes were tested
+    assert True in results and False in results
+    assert validator.check_structures(structures).tolist() == results
+
+    # overlapping sites always fail
+    structure.replace(1, "Cl", coords=structure.frac_coords[0])
+    assert not validator.check_structure(structure)
+
+    # larger supercells are checked by neighbor search
+    structure = Structure(
+        lattice=numpy.eye(3) * 5.64,
+        species=["Na"] * 4 + ["Cl"] * 4,
+        coords=[
+            [0, 0, 0],
+            [0.5, 0.5, 0],
+            [0.5, 0, 0.5],
+            [0, 0.5, 0.5],
+            [0.5, 0, 0],
+            [0, 0.5, 0],
+            [0, 0, 0.5],
+            [0.5, 0.5, 0.5],
+        ],
+    )
+    structure.make_supercell([6, 6, 6])
+    validator.chunk_size = 100
+    assert validator.check_structure(structure)
+    structure.translate_sites([1000], [1.5, 0, 0], frac_coords=False)
+    assert not validator.check_structure(structure)
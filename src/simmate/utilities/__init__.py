@@ -1,5 +1,6 @@
 # -*- coding: utf-8 -*-
 
+from .downloads import get_cached_download
 from .files import (
     archive_old_runs,
     chunk_read,
@@ -13,6 +14,7 @@ from .files import (
 from .other import (
     bypass_nones,
     check_if_using_latest_version,
+    chunk_iterable,
     chunk_list,
     deep_update,
     dotdict,
@@ -0,0 +1,186 @@
+# -*- coding: utf-8 -*-
+
+import hashlib
+import json
+import logging
+import urllib.request
+import zipfile
+from pathlib import Path
+
+from .files import get_directory
+
+
+def get_cached_download(
+    url: str,
+    directory: Path | str,
+    sha256: str = None,
+    check_remote: bool = True,
+    chunk_size: int = 1024 * 1024,
+) -> tuple[Path, str]:
+    """
+    Downloads a file to a local cache directory (unless an up-to-date copy is
+    already there) and returns the path to the cached file along with its
+    sha256 hash.
+
+    Files are cached by their URL. Before reusing a cached file, the server is
+    asked for the file's current ETag, Last-Modified, and size headers, and a
+    new download is only made if one of these changed. If a download is
+    stopped part way (e.g. a lost connection), calling this function again will
+    continue where it left off -- as long as the server supports range
+    requests and the remote file did not change in the meantime.
+
+    Downloads are verified before they are added to the cache: the size must
+    match the server's Content-Length, the hash must match `sha256` (if given),
+    and zip files must pass an integrity check. Cached files are also checked
+    against their stored hash each time they are reused.
+
+    #### Parameters
+
+    - `url`:
+        The URL of the file to download.
+
+    - `directory`:
+        The folder to store cached files in.
+
+    - `sha256`:
+        The expected sha256 hash of the file. If the download does not match,
+        an error is raised.
+
+    - `check_remote`:
+        Whether to ask the server if the file changed before reusing a cached
+        copy. If False (or if the server can't be reached), a cached copy is
+        used as-is.
+
+    - `chunk_size`:
+        The number of bytes to download and write at a time.
+
+    #### Returns
+
+    A tuple of the cached file's path and its sha256 hash.
+    """
+    directory = Path(directory)
+
+    # Files are stored in a folder named by a hash of their URL, so that
+    # different URLs with the same file name do not overwrite one another.
+    url_hash = hashlib.sha256(url.encode()).hexdigest()[:12]
+    filename = get_directory(directory / url_hash) / url.split("/")[-1]
+    partial_filename = filename.with_name(filename.name + ".part")
+    metadata_filename = filename.with_name(filename.name + ".json")
+
+    metadata = {}
+    if metadata_filename.exists():
+        with metadata_filename.open() as file:
+            metadata = json.load(file)
+
+    # ask the server for the current version of the file
+    remote = {}
+    if check_remote or not filename.exists():
+        try:
+            remote = _get_remote_version(url)
+        except urllib.error.URLError as error:
+            if not filename.exists():
+                raise error
+            logging.warning(
+                f"Unable to reach {url} ({error}). Using the cached file instead."
+            )
+    is_same_version = all(metadata.get(key) == value for key, value in remote.items())
+
+    # use the cached file if it is up to date and has not been corrupted
+    if filename.exists() and is_same_version and metadata.get("sha256"):
+        if (not sha256 or sha256 == metadata["sha256"]) and _get_file_hash(
+            filename
+        ) == metadata["sha256"]:
+            logging.info(f"Using cached download of {url}")
+            return filename, metadata["sha256"]
+        logging.warning(f"Cached download of {url} failed verification.")
+
+    # A partial download can only be continued if it is from the same
+    # version of the remote file.
+    if not is_same_version or not remote:
+        partial_filename.unlink(missing_ok=True)
+    metadata = {"url": url, **remote}
+    with metadata_filename.open("w") as file:
+        json.dump(metadata, file)
+
+    _download_to_file(url, partial_filename, remote, chunk_size)
+
+    # verify the download before adding it to the cache
+    file_hash = _get_file_hash(partial_filename)
+    error = None
+    if remote.get("size") and partial_filename.stat().st_size != remote["size"]:
+        error = "the file size does not match the server's"
+    elif sha256 and file_hash != sha256:
+        error = f"the sha256 hash ({file_hash}) does not match {sha256}"
+    elif zipfile.is_zipfile(partial_filename):
+        with zipfile.ZipFile(partial_filename) as archive:
+            if archive.testzip() is not None:
+                error = "the zip archive is corrupted"
+    if error:
+        partial_filename.unlink()
+        raise Exception(f"The download of {url} failed verification: {error}")
+
+    partial_filename.replace(filename)
+    metadata["sha256"] = file_hash
+    with metadata_filename.open("w") as file:
+        json.dump(metadata, file)
+
+    return filename, file_hash
+
+
+def _get_remote_version(url: str) -> dict:
+    """
+    Gives the headers that tell us which version of a remote file is available.
+    """
+    try:
+        request = urllib.request.Request(url, method="HEAD")
+        with urllib.request.urlopen(request) as response:
+            headers = response.headers
+    except urllib.error.HTTPError as error:
+        # Some servers don't allow HEAD requests. We then start a normal
+        # download and close it once we have the headers.
+        if error.code not in (405, 501):
+            raise error
+        with urllib.request.urlopen(url) as response:
+            headers = response.headers
+    remote = {
+        "etag": headers.get("ETag"),
+        "last_modified": headers.get("Last-Modified"),
+        "size": int(headers["Content-Length"]) if "Content-Length" in headers else None,
+    }
+    return {key: value for key, value in remote.items() if value is not None}
+
+
+def _download_to_file(url: str, filename: Path, remote: dict, chunk_size: int):
+    """
+    Downloads a file, continuing from the end of `filename` if it exists.
+    """
+    start = filename.stat().st_size if filename.exists() else 0
+    if start and start == remote.get("size"):
+        return  # the download finished but was never verified
+
+    headers = {}
+    if start:
+        headers["Range"] = f"bytes={start}-"
+        # If the file changed, the server will give us the full file
+        # instead of the requested range
+        if remote.get("etag") or remote.get("last_modified"):
+            headers["If-Range"] = remote.get("etag") or remote["last_modified"]
+        logging.info(f"Resuming download of {url} from byte {start}")
+    else:
+        logging.info(f"Downloading {url}")
+
+    request = urllib.request.Request(url, headers=headers)
+    with urllib.request.urlopen(request) as response:
+        # a status of 206 means the server sent only the requested range
+        mode = "ab" if start and response.status == 206 else "wb"
+        with filename.open(mode) as file:
+            while chunk := response.read(chunk_size):
+                file.write(chunk)
+
+
+def _get_file_hash(filename: Path, chunk_size: int = 1024 * 1024) -> str:
+    file_hash = hashlib.sha256()
+    with filename.open("rb") as file:
+        while chunk := file.read(chunk_size):
+            file_hash.update(chunk)
+    return file_hash.hexdigest()
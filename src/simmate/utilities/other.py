@@ -5,6 +5,7 @@ import logging
 import os
 import sys
 from functools import wraps
+from itertools import islice
 
 import requests
 
@@ -103,6 +104,17 @@ def chunk_list(full_list: list, chunk_size: int) -> list:
         yield full_list[i : i + chunk_size]
 
 
+def chunk_iterable(iterable, chunk_size: int):
+    """
+    Yields successive n-sized chunks (as lists) from any iterable. Unlike
+    `chunk_list`, this does not require the full input to be loaded into
+    memory, so it can be used with generators and database cursors.
+    """
+    iterator = iter(iterable)
+    while chunk := list(islice(iterator, chunk_size)):
+        yield chunk
+
+
 def str_to_datatype(
     parameter: str,
     value: str,
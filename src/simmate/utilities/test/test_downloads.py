@@ -0,0 +1,78 @@
+# -*- coding: utf-8 -*-
+
+import hashlib
+import json
+
+import pytest
+
+from simmate.utilities import get_cached_download
+
+
+def test_get_cached_download(tmp_path, local_file_server):
+    content = b"0123456789" * 1000
+    (local_file_server.directory / "example.txt").write_bytes(content)
+    url = f"{local_file_server.url}/example.txt"
+    cache_directory = tmp_path / "cache"
+    expected_hash = hashlib.sha256(content).hexdigest()
+
+    # first download
+    filename, file_hash = get_cached_download(url, cache_directory)
+    assert filename.read_bytes() == content
+    assert file_hash == expected_hash
+    assert local_file_server.range_requests == [None]
+
+    # unchanged files are not downloaded again
+    filename, file_hash = get_cached_download(url, cache_directory, sha256=file_hash)
+    assert file_hash == expected_hash
+    assert local_file_server.range_requests == [None]
+
+    # a corrupted cache file is downloaded again
+    filename.write_bytes(b"corrupted")
+    filename, file_hash = get_cached_download(url, cache_directory)
+    assert filename.read_bytes() == content
+    assert local_file_server.range_requests == [None, None]
+
+    # pretend the last download was interrupted half way and then resume it
+    partial_filename = filename.with_name(filename.name + ".part")
+    partial_filename.write_bytes(content[:4000])
+    filename.unlink()
+    filename, file_hash = get_cached_download(url, cache_directory)
+    assert filename.read_bytes() == content
+    assert local_file_server.range_requests[-1] == "bytes=4000-"
+
+    # a changed remote file is downloaded again, and a partial download of
+    # the old version is thrown out
+    new_content = content + b"more"
+    (local_file_server.directory / "example.txt").write_bytes(new_content)
+    partial_filename.write_bytes(content[:4000])
+    filename, file_hash = get_cached_download(url, cache_directory)
+    assert filename.read_bytes() == new_content
+    assert local_file_server.range_requests[-1] is None
+
+    # the expected hash is verified
+    with pytest.raises(Exception):
+        get_cached_download(url, cache_directory, sha256="0" * 64)
+
+    # the metadata is stored next to the file
+    metadata = json.loads(filename.with_name(filename.name + ".json").read_text())
+    assert metadata["url"] == url
+
+
+def test_get_cached_download_without_head(tmp_path, local_file_server):
+    # servers that don't allow HEAD requests still give the file's version
+    content = b"0123456789" * 1000
+    (local_file_server.directory / "example.txt").write_bytes(content)
+    url = f"{local_file_server.url}/example.txt"
+    cache_directory = tmp_path / "cache"
+    local_file_server.allow_head = False
+
+    filename, file_hash = get_cached_download(url, cache_directory)
+    assert filename.read_bytes() == content
+
+    # and the cached file is reused. Each call makes a GET request in place
+    # of the HEAD request, but only reads the headers from it.
+    modified_time = filename.stat().st_mtime_ns
+    filename, file_hash = get_cached_download(url, cache_directory)
+    assert file_hash == hashlib.sha256(content).hexdigest()
+    assert filename.stat().st_mtime_ns == modified_time
+    assert len(local_file_server.range_requests) == 3
@@ -1,6 +1,6 @@
 # -*- coding: utf-8 -*-
 
-from simmate.utilities import bypass_nones
+from simmate.utilities import bypass_nones, chunk_iterable
 
 
 def test_bypass_nones():
@@ -32,3 +32,9 @@ def test_bypass_nones():
 
     values_out = get_lens_dup(values=values_in)
     assert values_out == [expected_out, expected_out, expected_out]
+
+
+def test_chunk_iterable():
+    chunks = list(chunk_iterable(iter(range(7)), 3))
+    assert chunks == [[0, 1, 2], [3, 4, 5], [6]]
+    assert list(chunk_iterable([], 3)) == []
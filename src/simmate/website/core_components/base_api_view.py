@@ -1,13 +1,49 @@
 # -*- coding: utf-8 -*-
 
-from django.http import HttpRequest
+import copy
+import json
+import zlib
+from functools import cache
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import BinaryField
+from django.http import HttpRequest, StreamingHttpResponse
 
 # from rest_framework.generics import GenericAPIView
+from rest_framework.exceptions import ValidationError
 from rest_framework.response import Response
 from rest_framework.serializers import ModelSerializer
 from rest_framework.viewsets import GenericViewSet
 
 from simmate.database.base_data_types import DatabaseTable, SearchResults, Spacegroup
+from simmate.utilities import chunk_iterable
+from simmate.website.core_components.pagination import SimmateCursorPagination
+
+
+class CachedFieldsSerializer(ModelSerializer):
+    """
+    A ModelSerializer that only inspects the model to build its fields once.
+    Later serializers of the same class reuse a copy of these fields, which
+    is the same approach that DRF takes for fields declared on a normal
+    Serializer.
+    """
+
+    def get_fields(self):
+        serializer_class = type(self)
+        if "_cached_fields" not in serializer_class.__dict__:
+            serializer_class._cached_fields = super().get_fields()
+        fields = serializer_class._cached_fields
+
+        # The view can limit which fields are returned (see get_api_fields)
+        requested_fields = self.context.get("fields")
+        if requested_fields:
+            fields = {
+                name: field
+                for name, field in fields.items()
+                if name in requested_fields
+            }
+
+        return copy.deepcopy(fields)
 
 
 class SimmateAPIViewSet(GenericViewSet):
@@ -43,6 +79,100 @@ class SimmateAPIViewSet(GenericViewSet):
 
     max_query_size: int = 10000
 
+    cursor_pagination_class = SimmateCursorPagination
+    """
+    The pagination to use when `pagination=cursor` is given in the URL. Unlike
+    the default page-number pagination, this lets clients walk through all
+    results of a query (no matter the size) in constant time per page.
+    """
+
+    export_chunk_size: int = 2000
+    """
+    The number of rows fetched from the database at a time when streaming
+    an export (see `get_export_response`).
+    """
+
+    export_formats: dict = {
+        "ndjson": "application/x-ndjson",
+        "parquet": "application/vnd.apache.parquet",
+    }
+    """
+    The file formats supported by `get_export_response` and their content type.
+    """
+
+    @property
+    def use_cursor_pagination(self) -> bool:
+        query_params = self.request.GET
+        return query_params.get("pagination") == "cursor" or "cursor" in query_params
+
+    def get_api_fields(self) -> list[str]:
+        """
+        Gives the list of columns that should be returned by this request. This
+        limits both the serialized data and the columns loaded from the database.
+
+        Users can select columns with `?fields=id,energy_per_atom,...` or
+        request every column with `?fields=__all__`. Otherwise, large columns
+        are left out by default (see `DatabaseTable.api_default_fields`).
+
+        For the html format, None is returned because templates are given the
+        full database objects.
+        """
+        is_export = self.action == "get_export_response"
+        if not is_export and self.request.GET.get("format", "html") == "html":
+            return
+
+        table = self.queryset.model
+        fields_requested = self.request.GET.get("fields")
+
+        if not fields_requested:
+            return table.api_default_fields
+        elif fields_requested == "__all__":
+            return
+
+        fields_requested = [f.strip() for f in fields_requested.split(",")]
+        all_fields = self.get_table_api_columns(table)
+        unknown_fields = [f for f in fields_requested if f not in all_fields]
+        if unknown_fields:
+            raise ValidationError(
+                {"fields": f"Unknown fields requested: {unknown_fields}"}
+            )
+        return fields_requested
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        fields = self.get_api_fields()
+        if fields:
+            # Columns used for ordering must also be loaded, otherwise cursor
+            # pagination would make an extra query for every row.
+            ordering = self.request.GET.get("ordering") or ",".join(self.ordering or [])
+            all_fields = [f.name for f in queryset.model._meta.concrete_fields]
+            ordering_fields = [
+                column.strip().lstrip("-")
+                for column in ordering.split(",")
+                if column.strip().lstrip("-") in all_fields
+            ]
+            # select_related can't be used on columns that aren't loaded. The
+            # serializer only needs the ids of related rows, so we remove it.
+            queryset = queryset.select_related(None).only(*fields, *ordering_fields)
+        elif self.request.GET.get("format", "html") == "html":
+            # Templates are given full database objects, but large raw data
+            # columns are only loaded if the template actually uses them.
+            queryset = queryset.defer(*queryset.model.html_deferred_fields)
+        return queryset
+
+    def get_serializer_context(self) -> dict:
+        context = super().get_serializer_context()
+        context["fields"] = self.get_api_fields()
+        return context
+
+    @property
+    def paginator(self):
+        # The default paginator is set by the "pagination_class", so we only
+        # need to override it when cursor pagination is requested
+        if not hasattr(self, "_paginator") and self.use_cursor_pagination:
+            self._paginator = self.cursor_pagination_class()
+        return super().paginator
+
     def get_list_response(self, request: HttpRequest, *args, **kwargs) -> Response:
         # This code is modified from the ListModelMixin, where instead of returning
         # a response, we perform additional introspection first.
@@ -62,7 +192,10 @@ class SimmateAPIViewSet(GenericViewSet):
         # is a large number because counting queries really only becomes an
         # issue with >1mil rows in the dataset.
         # We still allow users to set "None" disable this feature.
-        if self.max_query_size:
+        # With cursor pagination, each page is found with a keyset filter
+        # so there is no need for this limit (and the queryset can't be sliced).
+        use_cursor_pagination = self.use_cursor_pagination
+        if self.max_query_size and not use_cursor_pagination:
             queryset = queryset[: self.max_query_size]
         # TODO: should max_query_size be attached to each model instead?
 
@@ -83,6 +216,19 @@ class SimmateAPIViewSet(GenericViewSet):
 
         # otherwise we assume the html format.
         else:
+            # OPTIMIZE: counting can take ~20 sec for ~10 mil rows, which is
+            # terrible for a web UI. I tried a series of fixes but no luck:
+            #   https://stackoverflow.com/questions/55018986/
+            # When using cursor pagination, we have no limit on the query size,
+            # so we fall back to the database's estimate for large counts.
+            if use_cursor_pagination:
+                exact_below = self.max_query_size or 10000
+                ncalculations_matching = queryset.count_approximate(exact_below)
+                ncalculations_is_estimate = ncalculations_matching >= exact_below
+            else:
+                ncalculations_matching = queryset.count()
+                ncalculations_is_estimate = False
+
             filterset = self.filterset_class(request.GET)
             data = {
                 "filterset": filterset,
@@ -90,10 +236,8 @@ class SimmateAPIViewSet(GenericViewSet):
                 "form": filterset.form,
                 "extra_filters": filterset._meta.model.api_filters_extra,
                 "calculations": serializer.instance,  # return python objs, not dict
-                # OPTIMIZE: counting can take ~20 sec for ~10 mil rows, which is
-                # terrible for a web UI. I tried a series of fixes but no luck:
-                #   https://stackoverflow.com/questions/55018986/
-                "ncalculations_matching": queryset.count(),
+                "ncalculations_matching": ncalculations_matching,
+                "ncalculations_is_estimate": ncalculations_is_estimate,
                 # "ncalculations_possible": self.get_queryset().count(), # too slow
                 **self.paginator.get_html_context(),
                 **self.get_list_context(request, **kwargs),
@@ -128,6 +272,94 @@ class SimmateAPIViewSet(GenericViewSet):
         else:
             return Response(serializer.data)
 
+    def get_export_response(
+        self,
+        request: HttpRequest,
+        *args,
+        **kwargs,
+    ) -> StreamingHttpResponse:
+        """
+        Streams all results of a query as a file download. Unlike the list
+        view, there is no limit on the number of rows: rows are read from the
+        database in chunks (using a server-side cursor on Postgres) and written
+        out as they are read, so memory use stays constant.
+
+        The same filters as the list view can be given in the URL, along with:
+
+        - `file_format`: either "ndjson" (default), where each line is one row
+          as a JSON object, or "parquet" (requires pyarrow on the server)
+        - `fields`: the columns to include (see `get_api_fields`)
+        - `compression`: set to "gzip" to compress the file as it is streamed
+        - `after`: only give rows with an id greater than this. Rows are
+          always exported in order of their id, so an interrupted download
+          can be resumed by passing the last id that was received.
+        """
+        file_format = request.GET.get("file_format", "ndjson")
+        if file_format not in self.export_formats:
+            raise ValidationError(
+                {"file_format": f"Must be one of {list(self.export_formats)}"}
+            )
+        if file_format == "parquet":
+            try:
+                import pyarrow  # noqa: F401
+            except ModuleNotFoundError:
+                raise ValidationError(
+                    {"file_format": "Parquet exports are not supported by this server"}
+                )
+
+        compression = request.GET.get("compression")
+        if compression not in [None, "gzip"]:
+            raise ValidationError({"compression": "Must be 'gzip' if given"})
+
+        queryset = self.filter_queryset(self.get_queryset())
+
+        # Rows are ordered by id (rather than the view's ordering) so that
+        # the export can be resumed with the "after" parameter.
+        table = queryset.model
+        primary_key = table._meta.pk.name
+        queryset = queryset.order_by(primary_key)
+        after = request.GET.get("after")
+        if after:
+            queryset = queryset.filter(**{f"{primary_key}__gt": after})
+
+        # We use the column names (e.g. "spacegroup_id") rather than the field
+        # names so that the columns are the same for every file format.
+        fields = self.get_api_fields() or self.get_table_api_columns(table)
+        columns = [table._meta.get_field(field).attname for field in fields]
+
+        if file_format == "ndjson":
+            content = self._iter_ndjson_bytes(queryset, columns)
+        elif file_format == "parquet":
+            content = queryset.iter_parquet_bytes(columns, self.export_chunk_size)
+
+        filename = f"{table.table_name}.{file_format}"
+        if compression == "gzip":
+            content = self._iter_gzip_bytes(content)
+            filename += ".gz"
+            content_type = "application/gzip"
+        else:
+            content_type = self.export_formats[file_format]
+
+        response = StreamingHttpResponse(content, content_type=content_type)
+        response["Content-Disposition"] = f'attachment; filename="{filename}"'
+        return response
+
+    def _iter_ndjson_bytes(self, queryset: SearchResults, columns: list[str]):
+        rows = queryset.values(*columns).iterator(chunk_size=self.export_chunk_size)
+        for chunk in chunk_iterable(rows, self.export_chunk_size):
+            lines = [json.dumps(row, cls=DjangoJSONEncoder) + "\n" for row in chunk]
+            yield "".join(lines).encode()
+
+    @staticmethod
+    def _iter_gzip_bytes(content):
+        # wbits=31 gives the gzip format (rather than raw zlib data)
+        compressor = zlib.compressobj(wbits=31)
+        for data in content:
+            compressed = compressor.compress(data)
+            if compressed:
+                yield compressed
+        yield compressor.flush()
+
     @classmethod
     def from_table(
         cls,
@@ -136,12 +368,94 @@ class SimmateAPIViewSet(GenericViewSet):
         initial_queryset: SearchResults = None,
         **kwargs,
     ):
-        # For all tables, we share all the data -- no columns are hidden. Therefore
-        # the code for the Serializer is always the same.
-        class NewSerializer(ModelSerializer):
+        # Building the viewset class (and DRF introspecting it) is slow, so the
+        # class is only made once per table & view type (see get_table_viewset_class).
+        # The initial queryset changes between requests, so this is instead
+        # given to the view when it is initialized.
+        if initial_queryset is None and not kwargs:
+            return cls._get_cached_view(table, view_type)
+
+        NewViewSet = cls.get_table_viewset_class(table, view_type)
+
+        # extra kwargs are new class attributes, which requires a new subclass
+        if kwargs:
+            NewViewSet = type(NewViewSet.__name__, (NewViewSet,), kwargs)
+
+        return NewViewSet.as_view(
+            cls._get_view_actions(view_type),
+            queryset=cls._get_table_queryset(table, initial_queryset),
+        )
+
+    @classmethod
+    @cache
+    def _get_cached_view(cls, table: DatabaseTable, view_type: str):
+        NewViewSet = cls.get_table_viewset_class(table, view_type)
+        return NewViewSet.as_view(cls._get_view_actions(view_type))
+
+    @staticmethod
+    def _get_view_actions(view_type: str) -> dict:
+        if view_type == "list":
+            return {"get": "get_list_response"}
+        elif view_type == "retrieve":
+            return {"get": "get_retrieve_response"}
+        elif view_type == "export":
+            return {"get": "get_export_response"}
+        else:
+            raise Exception(
+                "Unknown view type. Must be 'list', 'retrieve', or 'export'."
+            )
+
+    @staticmethod
+    def _get_table_queryset(
+        table: DatabaseTable,
+        initial_queryset: SearchResults = None,
+    ) -> SearchResults:
+        # we also want to preload spacegroup for the structure mixin
+        # Note, we can't use "initial_queryset or ..." here because checking
+        # the truth of a queryset runs it and loads every row into memory.
+        intial_queryset = (
+            initial_queryset if initial_queryset is not None else table.objects.all()
+        )
+        if issubclass(table, Spacegroup) and hasattr(table, "spacegroup"):
+            intial_queryset = intial_queryset.select_related("spacegroup")
+        return intial_queryset
+
+    @staticmethod
+    @cache
+    def get_table_serializer_class(table: DatabaseTable) -> ModelSerializer:
+        """
+        Dynamically creates (and caches) a serializer for a database table.
+        """
+
+        # For all tables, we share all the data -- no columns are hidden (other
+        # than binary ones, which can't be given as JSON). Therefore the code
+        # for the Serializer is always the same.
+        class NewSerializer(CachedFieldsSerializer):
             class Meta:
                 model = table
-                fields = "__all__"
+                fields = SimmateAPIViewSet.get_table_api_columns(table)
+
+        return NewSerializer
+
+    @staticmethod
+    def get_table_api_columns(table: DatabaseTable) -> list[str]:
+        """
+        Gives all columns of a table that can be returned by the API. Binary
+        columns (such as compressed arrays) can't be given as JSON, so these
+        are left out.
+        """
+        return [
+            field.name
+            for field in table._meta.concrete_fields
+            if not isinstance(field, BinaryField)
+        ]
+
+    @classmethod
+    @cache
+    def get_table_viewset_class(cls, table: DatabaseTable, view_type: str):
+        """
+        Dynamically creates (and caches) a viewset class for a database table.
+        """
 
         # For the source dataset, not all tables have a "created_at" column, but
         # when they do, we want to return results with the most recent additions first
@@ -151,41 +465,49 @@ class SimmateAPIViewSet(GenericViewSet):
             "-created_at" if hasattr(table, "created_at") else table._meta.pk.name
         )
 
-        # we also want to preload spacegroup for the structure mixin
-        intial_queryset = initial_queryset or table.objects.all()
-        if issubclass(table, Spacegroup) and hasattr(table, "spacegroup"):
-            intial_queryset = intial_queryset.select_related("spacegroup")
-
         NewViewSet = type(
             f"{table.table_name}ViewSet",
             (cls,),
             dict(
-                queryset=intial_queryset,
-                serializer_class=NewSerializer,
+                queryset=cls._get_table_queryset(table),
+                serializer_class=cls.get_table_serializer_class(table),
                 filterset_class=table.api_filterset,
                 ordering_fields="__all__",  # allowed to order by any field
                 ordering=[default_ordering_field],  # set default order
-                **kwargs,
             ),
         )
 
-        # these two parameters depend on the view_type
+        # the template depends on the view_type
         if view_type == "list":
             NewViewSet.template_name = (
                 table.html_template_table
                 if table.html_template_table
                 else cls.template_list
             )
-            return NewViewSet.as_view({"get": "get_list_response"})
         elif view_type == "retrieve":
             NewViewSet.template_name = (
                 table.html_template_entry
                 if table.html_template_entry
                 else cls.template_retrieve
             )
-            return NewViewSet.as_view({"get": "get_retrieve_response"})
+        elif view_type == "export":
+            pass  # exports are always files, so no template is needed
         else:
-            raise Exception("Unknown view type. Must be 'list' or 'retrieve'.")
+            raise Exception(
+                "Unknown view type. Must be 'list', 'retrieve', or 'export'."
+            )
+
+        return NewViewSet
+
+    @classmethod
+    def warm_up_cache(cls, tables: list[DatabaseTable]):
+        """
+        Builds the list and retrieve views for each table up-front, so that
+        the first request to each endpoint doesn't pay for class creation.
+        """
+        for table in tables:
+            for view_type in ["list", "retrieve", "export"]:
+                cls._get_cached_view(table, view_type)
 
     # -------------------------------------------------------------------------
 
@@ -201,22 +523,24 @@ class SimmateAPIViewSet(GenericViewSet):
         view = cls.from_table(table=cls.table, view_type="retrieve")
         return view(request, **request_kwargs)
 
+    @classmethod
+    def export_view(cls, request, **request_kwargs):
+        view = cls.from_table(table=cls.table, view_type="export")
+        return view(request, **request_kwargs)
+
     # -------------------------------------------------------------------------
 
     # METHODS FOR DYNAMIC VIEWS
 
-    # NOTE: These dynamically create a serializer and a view EVERY TIME a
-    # URL is requested. This means...
+    # NOTE: These dynamically create a serializer and a view the first time a
+    # URL is requested (and then reuse them for later requests). This means...
     #   1. there is no pre-set api that exists. The exisiting api must be inferred
     #       from lower level workflows and their tables
-    #   2. these views will be very inefficient if queried by a script
+    #   2. the first request to an endpoint is slower than the others
     # I chose dynamic creation over creating all endpoints on-startup to prevent
     # the `from simmate.database import connect` method from taking too long --
-    # as that would require import all workflows on start-up. However, if the
-    # (1) api spec or (2) speed of this method ever becomes an issue, I can
-    # address these by either...
-    #   1. having a utility that prints out the full API spec but isn't called on startup
-    #   2. making all APIViews up-front
+    # as that would require import all workflows on start-up. For a known
+    # list of tables, the `warm_up_cache` method can be used instead.
 
     @classmethod
     def get_table(cls, request: HttpRequest, *args, **kwargs) -> Response:
@@ -247,6 +571,17 @@ class SimmateAPIViewSet(GenericViewSet):
         )
         return view(request, **request_kwargs)
 
+    @classmethod
+    def dynamic_export_view(cls, request, **request_kwargs):
+        table = cls.get_table(request, **request_kwargs)
+        initial_queryset = cls.get_initial_queryset(request, **request_kwargs)
+        view = cls.from_table(
+            table=table,
+            initial_queryset=initial_queryset,
+            view_type="export",
+        )
+        return view(request, **request_kwargs)
+
     @classmethod
     def dynamic_retrieve_view(cls, request, **request_kwargs):
         table = cls.get_table(request, **request_kwargs)
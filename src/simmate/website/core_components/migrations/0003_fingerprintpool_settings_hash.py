@@ -0,0 +1,37 @@
+# Generated by Django 4.2.7 on 2026-10-19 09:16
+
+from django.db import migrations, models
+
+
+def delete_legacy_pools(apps, schema_editor):
+    # Pools made before this migration have no settings_hash, so validators
+    # would never reuse them (pools are looked up by their hash). Their
+    # fingerprints are only a cache of the structures they came from, so we
+    # remove these pools (and their fingerprints, via cascade) rather than
+    # leave them orphaned. The fingerprints are remade the next time a
+    # validator with the same settings updates its pool.
+    FingerprintPool = apps.get_model("core_components", "FingerprintPool")
+    FingerprintPool.objects.filter(settings_hash__isnull=True).delete()
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("core_components", "0002_alter_fingerprint_id_alter_fingerprintpool_id"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="fingerprintpool",
+            name="featurizer_version",
+            field=models.CharField(blank=True, max_length=25, null=True),
+        ),
+        migrations.AddField(
+            model_name="fingerprintpool",
+            name="settings_hash",
+            field=models.CharField(blank=True, db_index=True, max_length=64, null=True),
+        ),
+        migrations.RunPython(
+            delete_legacy_pools,
+            reverse_code=migrations.RunPython.noop,
+        ),
+    ]
@@ -0,0 +1,36 @@
+# -*- coding: utf-8 -*-
+
+from rest_framework.pagination import CursorPagination
+
+
+class SimmateCursorPagination(CursorPagination):
+    """
+    Keyset (or "cursor") pagination for the REST API. Rather than using
+    `?page=...`, each page links to the next one with an encoded `?cursor=...`
+    that stores the position of the last row. The next page is then found
+    with a filter such as `WHERE created_at < ...` instead of an OFFSET, so
+    every page takes the same amount of time to load -- even when walking
+    through an entire table with millions of rows.
+
+    The ordering used is the same as the viewset (i.e. `-created_at` by default
+    or the `ordering=...` given in the URL). Because columns such as
+    `created_at` can have ties, the primary key is always added as a final
+    ordering column. This gives a stable order, so rows that share a value are
+    never skipped or repeated between pages.
+
+    This class is not set as a default pagination. Instead, `SimmateAPIViewSet`
+    switches to it when `pagination=cursor` is given in the URL.
+    """
+
+    page_size_query_param = "page_size"
+    max_page_size = 1000
+
+    def get_ordering(self, request, queryset, view) -> tuple[str]:
+        ordering = super().get_ordering(request, queryset, view)
+        # break ties with the primary key, in the same direction as the
+        # first column
+        pk_name = queryset.model._meta.pk.name
+        if not any(column.lstrip("-") in (pk_name, "pk") for column in ordering):
+            descending = ordering[0].startswith("-")
+            ordering = (*ordering, f"-{pk_name}" if descending else pk_name)
+        return ordering
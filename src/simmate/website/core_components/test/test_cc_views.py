@@ -33,3 +33,171 @@ def test_structure_viewer_view(client, structure):
     response = client.get(f"/core-components/structure-viewer/?{url_data}")
     assert response.status_code == 200
     assertTemplateUsed(response, "core_components/structure_viewer.html")
+
+
+@pytest.mark.django_db
+def test_api_view_cache():
+    from simmate.website.core_components.base_api_view import SimmateAPIViewSet
+    from simmate.website.test_app.models import TestStructure
+
+    # views without an initial queryset are built once and then reused
+    view1 = SimmateAPIViewSet.from_table(table=TestStructure, view_type="list")
+    view2 = SimmateAPIViewSet.from_table(table=TestStructure, view_type="list")
+    assert view1 is view2
+
+    # views with an initial queryset still share the same viewset class
+    view3 = SimmateAPIViewSet.from_table(
+        table=TestStructure,
+        view_type="list",
+        initial_queryset=TestStructure.objects.filter(nsites=1),
+    )
+    assert view3 is not view1
+    assert view3.cls is view1.cls
+
+
+@pytest.mark.django_db
+def test_api_export_view():
+    import gzip
+    import json
+
+    from django.test import RequestFactory
+
+    from simmate.website.core_components.base_api_view import SimmateAPIViewSet
+    from simmate.website.test_app.models import TestStructure
+
+    view = SimmateAPIViewSet.from_table(table=TestStructure, view_type="export")
+    factory = RequestFactory()
+
+    def get_rows(params: dict):
+        response = view(factory.get("/", params))
+        assert response.status_code == 200
+        content = b"".join(response.streaming_content)
+        if params.get("compression") == "gzip":
+            content = gzip.decompress(content)
+        return [json.loads(line) for line in content.decode().splitlines()]
+
+    # all rows are exported in order of their id
+    rows = get_rows({"fields": "id,formula_full,spacegroup"})
+    ids = list(TestStructure.objects.order_by("id").values_list("id", flat=True))
+    assert [row["id"] for row in rows] == ids
+    assert set(rows[0].keys()) == {"id", "formula_full", "spacegroup_id"}
+
+    # filters and resuming from the last id
+    rows = get_rows({"nsites__range": "2,100", "after": ids[2], "compression": "gzip"})
+    expected = TestStructure.objects.filter(nsites__range=(2, 100), id__gt=ids[2])
+    assert {row["id"] for row in rows} == set(expected.values_list("id", flat=True))
+    # large columns are left out unless requested
+    assert "structure" not in rows[0].keys()
+
+    # an initial queryset (e.g. the results of a workflow) is only streamed
+    # and never loaded into memory all at once
+    initial_queryset = TestStructure.objects.filter(nsites__gte=1)
+    view = SimmateAPIViewSet.from_table(
+        table=TestStructure,
+        view_type="export",
+        initial_queryset=initial_queryset,
+    )
+    rows = get_rows({"fields": "id"})
+    assert len(rows) == initial_queryset.count()
+    assert initial_queryset._result_cache is None
+
+
+@pytest.mark.django_db
+def test_cursor_pagination_ties():
+    from django.test import RequestFactory
+    from django.utils import timezone
+    from rest_framework.request import Request
+
+    from simmate.website.core_components.base_api_view import SimmateAPIViewSet
+    from simmate.website.test_app.models import TestStructure
+
+    # every row has the same timestamp, so only the id can order them
+    TestStructure.objects.update(created_at=timezone.now())
+    ids = list(TestStructure.objects.values_list("id", flat=True))
+
+    view = SimmateAPIViewSet.from_table(table=TestStructure, view_type="list")
+    factory = RequestFactory()
+
+    params = {"format": "json", "pagination": "cursor", "page_size": 3}
+    url = "/"
+    ids_seen = []
+    while url:
+        response = view(factory.get(url, params))
+        assert response.status_code == 200
+        ids_seen += [row["id"] for row in response.data["results"]]
+        url = response.data["next"]
+        params = {}  # the next link includes all parameters
+
+    assert ids_seen == sorted(ids, reverse=True)
+
+    # the primary key is added to the ordering to break ties
+    paginator = view.cls.cursor_pagination_class()
+    for ordering, expected in [
+        (None, ("-created_at", "-id")),
+        ("volume", ("volume", "id")),
+        ("-nsites,id", ("-nsites", "id")),
+    ]:
+        request = Request(factory.get("/", {"ordering": ordering} if ordering else {}))
+        queryset = TestStructure.objects.all()
+        assert paginator.get_ordering(request, queryset, view.cls()) == expected
+
+
+@pytest.mark.django_db
+def test_fingerprint_search_view(client, tmp_path, monkeypatch):
+    from simmate.database.base_data_types import FingerprintPool
+    from simmate.toolkit.validators.fingerprint import RdfFingerprint
+    from simmate.website.test_app.models import TestStructure
+
+    monkeypatch.setattr(
+        FingerprintPool,
+        "similarity_index_filename",
+        property(lambda pool: tmp_path / f"pool-{pool.id}.npz"),
+    )
+    monkeypatch.setattr(FingerprintPool, "_similarity_indexes", {})
+
+    validator = RdfFingerprint(
+        cutoff=5,
+        structure_pool=TestStructure.objects.all(),
+        use_database=True,
+    )
+    pool = validator.database_pool
+    fingerprint = pool.fingerprints.first()
+
+    url = f"/core-components/fingerprint-pools/{pool.id}/search/"
+
+    response = client.get(f"{url}?database_id={fingerprint.database_id}&k=2")
+    assert response.status_code == 200
+    results = response.json()["results"]
+    assert len(results) == 2
+    assert results[0]["database_id"] == fingerprint.database_id
+
+    vector = ",".join(str(v) for v in fingerprint.fingerprint)
+    response = client.get(f"{url}?vector={vector}&radius=0.0001")
+    assert response.status_code == 200
+    assert response.json()["results"][0]["database_id"] == fingerprint.database_id
+
+    response = client.get(url)
+    assert response.status_code == 400
+
+    # badly formatted parameters are rejected rather than raising errors
+    for params in ["database_id=abc", "vector=1,x", "k=two", "k=0", "radius=-1"]:
+        if not params.startswith(("database_id", "vector")):
+            params += f"&database_id={fingerprint.database_id}"
+        response = client.get(f"{url}?{params}")
+        assert response.status_code == 400
+        assert "error" in response.json()
+
+    # ids that aren't in the pool's table are not found. The test table isn't
+    # a simmate table, so the pool needs its full import path to load it.
+    FingerprintPool.objects.filter(id=pool.id).update(
+        database_table="simmate.website.test_app.models.TestStructure"
+    )
+    missing_id = TestStructure.objects.order_by("-id").first().id + 1
+    response = client.get(f"{url}?database_id={missing_id}")
+    assert response.status_code == 404
+    assert "error" in response.json()
+
+    # so are pools that don't support similarity searches
+    monkeypatch.setattr(RdfFingerprint, "comparison_mode", "custom")
+    response = client.get(f"{url}?database_id={fingerprint.database_id}")
+    assert response.status_code == 400
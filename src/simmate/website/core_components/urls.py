@@ -25,6 +25,14 @@ urlpatterns = [
         name="spacegroup",
     ),
     #
+    # Returns the structures in a fingerprint pool that are most similar to
+    # a given structure or fingerprint (as json)
+    path(
+        route="fingerprint-pools/<int:pool_id>/search/",
+        view=views.fingerprint_search,
+        name="fingerprint_search",
+    ),
+    #
     # This view is strictly for testing different components and making sure
     # they are working.
     path(
@@ -4,10 +4,12 @@ import tempfile
 import time
 from pathlib import Path
 
-from django.shortcuts import render
+from django.core.exceptions import ObjectDoesNotExist
+from django.http import JsonResponse
+from django.shortcuts import get_object_or_404, render
 
 from simmate.configuration.django import settings
-from simmate.database.base_data_types import Spacegroup
+from simmate.database.base_data_types import FingerprintPool, Spacegroup
 from simmate.toolkit import Structure
 from simmate.utilities import get_directory
 from simmate.visualization.structure.blender import make_blender_structure
@@ -64,6 +66,75 @@ def structure_viewer(request):
     return render(request, template, context)
 
 
+def fingerprint_search(request, pool_id: int):
+    # Grabs all data after the '?' in the URL
+    query = request.GET.dict()
+
+    pool = get_object_or_404(FingerprintPool, id=pool_id)
+
+    comparison_mode = pool.get_validator().comparison_mode
+    if comparison_mode not in pool.similarity_metrics:
+        return JsonResponse(
+            {
+                "error": (
+                    "Similarity search is not supported for this pool's "
+                    f"comparison mode ('{comparison_mode}')."
+                )
+            },
+            status=400,
+        )
+
+    # the search can be for a structure already in the pool's table or for
+    # a fingerprint given as comma-separated values
+    try:
+        if "database_id" in query:
+            search_kwargs = dict(database_id=int(query["database_id"]))
+        elif "vector" in query:
+            vector = [float(value) for value in query["vector"].split(",")]
+            search_kwargs = dict(fingerprint=vector)
+        else:
+            return JsonResponse(
+                {"error": "Either 'database_id' or 'vector' must be given."},
+                status=400,
+            )
+
+        if "radius" in query:
+            search_kwargs["radius"] = float(query["radius"])
+            if search_kwargs["radius"] < 0:
+                raise ValueError
+        else:
+            search_kwargs["k"] = int(query.get("k", 10))
+            if search_kwargs["k"] < 1:
+                raise ValueError
+    except ValueError:
+        return JsonResponse(
+            {
+                "error": (
+                    "Invalid search parameters. 'database_id' and 'k' must be "
+                    "positive integers, 'radius' must be a non-negative number, "
+                    "and 'vector' must be comma-separated numbers."
+                )
+            },
+            status=400,
+        )
+
+    try:
+        results = pool.search_similar(**search_kwargs)
+    except ObjectDoesNotExist:
+        return JsonResponse(
+            {"error": f"No entry with id {search_kwargs['database_id']} exists."},
+            status=404,
+        )
+
+    return JsonResponse(
+        {
+            "pool_id": pool.id,
+            "database_table": pool.database_table,
+            "results": results,
+        }
+    )
+
+
 def test_viewer(request):
     # grab cif filenames to test with
     from simmate.toolkit import base_data_types
@@ -0,0 +1,144 @@
+# Generated by Django 4.2.7 on 2026-10-19 09:16
+
+from django.db import migrations, models
+
+from simmate.database.base_data_types import Structure
+
+MODEL_NAMES = [
+    "aflowprototype",
+    "aflowstructure",
+    "codstructure",
+    "jarvisstructure",
+    "matprojstructure",
+    "oqmdstructure",
+]
+
+
+def populate_elements_masks(apps, schema_editor):
+    # Existing rows need their element masks filled in, otherwise they would
+    # be missing from element-based searches (see
+    # Structure.update_all_elements_masks, which this mirrors).
+    for model_name in MODEL_NAMES:
+        model = apps.get_model("data_explorer", model_name)
+        entries = model.objects.filter(
+            elements__isnull=False,
+            elements_mask_low__isnull=True,
+        ).only("id", "elements")
+
+        entries_to_update = []
+        for entry in entries.iterator(chunk_size=5000):
+            (
+                entry.elements_mask_low,
+                entry.elements_mask_high,
+            ) = Structure.get_elements_mask(entry.elements)
+            entries_to_update.append(entry)
+            if len(entries_to_update) >= 5000:
+                model.objects.bulk_update(
+                    entries_to_update,
+                    ["elements_mask_low", "elements_mask_high"],
+                )
+                entries_to_update = []
+
+        if entries_to_update:
+            model.objects.bulk_update(
+                entries_to_update,
+                ["elements_mask_low", "elements_mask_high"],
+            )
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("data_explorer", "0002_alter_aflowprototype_id"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="aflowprototype",
+            name="elements_mask_high",
+            field=models.BigIntegerField(blank=True, db_index=True, null=True),
+        ),
+        migrations.AddField(
+            model_name="aflowprototype",
+            name="elements_mask_low",
+            field=models.BigIntegerField(blank=True, db_index=True, null=True),
+        ),
+        migrations.AddField(
+            model_name="aflowstructure",
+            name="elements_mask_high",
+            field=models.BigIntegerField(blank=True, db_index=True, null=True),
+        ),
+        migrations.AddField(
+            model_name="aflowstructure",
+            name="elements_mask_low",
+            field=models.BigIntegerField(blank=True, db_index=True, null=True),
+        ),
+        migrations.AddField(
+            model_name="codstructure",
+            name="elements_mask_high",
+            field=models.BigIntegerField(blank=True, db_index=True, null=True),
+        ),
+        migrations.AddField(
+            model_name="codstructure",
+            name="elements_mask_low",
+            field=models.BigIntegerField(blank=True, db_index=True, null=True),
+        ),
+        migrations.AddField(
+            model_name="jarvisstructure",
+            name="elements_mask_high",
+            field=models.BigIntegerField(blank=True, db_index=True, null=True),
+        ),
+        migrations.AddField(
+            model_name="jarvisstructure",
+            name="elements_mask_low",
+            field=models.BigIntegerField(blank=True, db_index=True, null=True),
+        ),
+        migrations.AddField(
+            model_name="matprojstructure",
+            name="elements_mask_high",
+            field=models.BigIntegerField(blank=True, db_index=True, null=True),
+        ),
+        migrations.AddField(
+            model_name="matprojstructure",
+            name="elements_mask_low",
+            field=models.BigIntegerField(blank=True, db_index=True, null=True),
+        ),
+        migrations.AddField(
+            model_name="oqmdstructure",
+            name="elements_mask_high",
+            field=models.BigIntegerField(blank=True, db_index=True, null=True),
+        ),
+        migrations.AddField(
+            model_name="oqmdstructure",
+            name="elements_mask_low",
+            field=models.BigIntegerField(blank=True, db_index=True, null=True),
+        ),
+        migrations.AlterField(
+            model_name="aflowprototype",
+            name="chemical_system",
+            field=models.CharField(blank=True, db_index=True, max_length=25, null=True),
+        ),
+        migrations.AlterField(
+            model_name="aflowstructure",
+            name="chemical_system",
+            field=models.CharField(blank=True, db_index=True, max_length=25, null=True),
+        ),
+        migrations.AlterField(
+            model_name="jarvisstructure",
+            name="chemical_system",
+            field=models.CharField(blank=True, db_index=True, max_length=25, null=True),
+        ),
+        migrations.AlterField(
+            model_name="matprojstructure",
+            name="chemical_system",
+            field=models.CharField(blank=True, db_index=True, max_length=25, null=True),
+        ),
+        migrations.AlterField(
+            model_name="oqmdstructure",
+            name="chemical_system",
+            field=models.CharField(blank=True, db_index=True, max_length=25, null=True),
+        ),
+        migrations.RunPython(
+            populate_elements_masks,
+            reverse_code=migrations.RunPython.noop,
+        ),
+    ]
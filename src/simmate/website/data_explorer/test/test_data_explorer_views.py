@@ -50,3 +50,80 @@ def test_workflows_by_type_view(client, provider_name):
     response = client.get(url)
     assert response.status_code == 404
     # assertTemplateUsed(response, "data_explorer/entry_detail.html")
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize("response_format", ["json", "html"])
+def test_cursor_pagination(client, response_format):
+    url = reverse(
+        "data_explorer:provider",
+        kwargs={"provider_name": "MatprojStructure"},
+    )
+    response = client.get(
+        url,
+        {"format": response_format, "pagination": "cursor"},
+    )
+    assert response.status_code == 200
+    if response_format == "json":
+        data = response.json()
+        assert "next" in data.keys()
+        assert "results" in data.keys()
+
+
+@pytest.mark.django_db
+def test_field_selection(client, sample_structures):
+    from simmate.database.third_parties import MatprojStructure
+
+    MatprojStructure.from_toolkit(
+        id="mp-22862",
+        structure=sample_structures["NaCl_mp-22862_primitive"],
+        energy=-1,
+    ).save()
+
+    url = reverse(
+        "data_explorer:provider",
+        kwargs={"provider_name": MatprojStructure.__name__},
+    )
+
+    # large columns are left out by default
+    response = client.get(url, {"format": "json"})
+    assert response.status_code == 200
+    row = response.json()["results"][0]
+    excluded_fields = MatprojStructure._get_columns_from_parents(
+        "api_exclude_by_default"
+    )
+    assert "structure" in excluded_fields
+    assert not set(excluded_fields).intersection(row.keys())
+    assert set(row.keys()) == set(MatprojStructure.api_default_fields)
+
+    # specific columns can be requested, including ones left out by default
+    for fields in ["id,energy", "id,structure"]:
+        response = client.get(url, {"format": "json", "fields": fields})
+        assert response.status_code == 200
+        row = response.json()["results"][0]
+        assert set(row.keys()) == set(fields.split(","))
+
+    # unknown columns give an error
+    response = client.get(url, {"format": "json", "fields": "id,fake_column"})
+    assert response.status_code == 400
+
+
+@pytest.mark.django_db
+def test_export(client):
+    url = reverse(
+        "data_explorer:provider-export",
+        kwargs={"provider_name": "MatprojStructure"},
+    )
+
+    response = client.get(url, {"fields": "id,energy"})
+    assert response.status_code == 200
+    assert response["Content-Type"] == "application/x-ndjson"
+    b"".join(response.streaming_content)
+
+    response = client.get(url, {"compression": "gzip", "after": "mp-1"})
+    assert response.status_code == 200
+    assert response["Content-Disposition"].endswith('.ndjson.gz"')
+    b"".join(response.streaming_content)
+
+    response = client.get(url, {"file_format": "fake_format"})
+    assert response.status_code == 400
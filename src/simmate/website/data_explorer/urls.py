@@ -15,6 +15,11 @@ urlpatterns = [
         view=views.ProviderAPIViewSet.dynamic_list_view,
         name="provider",
     ),
+    path(
+        route="<provider_name>/export/",
+        view=views.ProviderAPIViewSet.dynamic_export_view,
+        name="provider-export",
+    ),
     path(
         route="<provider_name>/<pk>/",
         view=views.ProviderAPIViewSet.dynamic_retrieve_view,
@@ -83,3 +83,8 @@ class ProviderAPIViewSet(SimmateAPIViewSet):
             "provider_name": provider_name,
             "entry_id": pk,
         }
+
+
+# The set of providers is fixed when the server starts, so we build all of
+# their API views up-front rather than on the first request to each.
+ProviderAPIViewSet.warm_up_cache(ALL_PROVIDERS.values())
@@ -0,0 +1,22 @@
+# Generated by Django 4.2.7 on 2026-10-19 09:16
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("workflows", "0002_elements_masks"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="bandstructurecalc",
+            name="band_structure_arrays",
+            field=models.BinaryField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name="densityofstatescalc",
+            name="density_of_states_arrays",
+            field=models.BinaryField(blank=True, null=True),
+        ),
+    ]
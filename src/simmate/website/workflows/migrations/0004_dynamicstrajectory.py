@@ -0,0 +1,42 @@
+# Generated by Django 4.2.7 on 2026-10-19 09:16
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("workflows", "0003_electronic_structure_arrays"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="DynamicsTrajectory",
+            fields=[
+                ("id", models.AutoField(primary_key=True, serialize=False)),
+                (
+                    "created_at",
+                    models.DateTimeField(auto_now_add=True, db_index=True, null=True),
+                ),
+                (
+                    "updated_at",
+                    models.DateTimeField(auto_now=True, db_index=True, null=True),
+                ),
+                ("source", models.JSONField(blank=True, null=True)),
+                ("nframes", models.IntegerField()),
+                ("nsites", models.IntegerField()),
+                ("species", models.JSONField()),
+                ("array_names", models.JSONField()),
+                ("frame_chunk_size", models.IntegerField(default=100)),
+                ("trajectory_data", models.BinaryField()),
+                (
+                    "dynamics_run",
+                    models.OneToOneField(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="trajectory",
+                        to="workflows.dynamics",
+                    ),
+                ),
+            ],
+        ),
+    ]
@@ -0,0 +1,24 @@
+# Generated by Django 4.2.7 on 2026-10-19 10:01
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("workflows", "0004_dynamicstrajectory"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="relaxation",
+            name="structure_start",
+            field=models.OneToOneField(
+                blank=True,
+                null=True,
+                on_delete=django.db.models.deletion.CASCADE,
+                related_name="relaxations_as_start",
+                to="workflows.ionicstep",
+            ),
+        ),
+    ]
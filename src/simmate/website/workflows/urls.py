@@ -36,6 +36,13 @@ urlpatterns = [
         name="workflow_run_detail",
     ),
     #
+    # Streams all results (with optional filters) as a file download
+    path(
+        route="<workflow_type>/<workflow_app>/<workflow_preset>/export",
+        view=views.WorkflowAPIViewSet.dynamic_export_view,
+        name="workflow_export",
+    ),
+    #
     # Submit a new calculation
     path(
         route="<workflow_type>/<workflow_app>/<workflow_preset>/submit",